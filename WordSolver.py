@@ -1,38 +1,440 @@
 
+import argparse
 import contextlib
 import sys
 import time
+STARTUP_STARTED = time.perf_counter()  # Start of the startup profile, before any other import
 import string
+import unicodedata
 import os
 import logging
-
-import keyboard
-from PyQt5.QtCore import Qt
+import logging.handlers
+import queue
+import threading
+import atexit
+import gc
+import heapq
+import itertools
+import tempfile
+import marshal
+import array
+import bisect
+import collections
+import math
+import zlib
+import random
+import re
+import struct
+import signal
+# The modules only some commands need (profiling, process pools, memory maps, diffs, the
+# keyboard hook) are imported where they are used, so they do not slow down startup
+STDLIB_IMPORTS_DONE = time.perf_counter()
+
+# The window classes below derive from Qt classes, so PyQt5 is needed to define them
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer, pyqtSignal
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QWidget, 
-                            QListWidget, QPushButton, QCheckBox, QComboBox, 
-                            QDialog, QHBoxLayout, QInputDialog, QMessageBox)
-from spellchecker import SpellChecker
-from functools import lru_cache
-import json
-
-import json
-
-def export_cache():
-    cache_dict = dict(word_list_manager.get_suggestions.cache_info().items())
-    with open('cache_file.json', 'w') as f:
-        json.dump(cache_dict, f)
-
-def load_cache():
-    with contextlib.suppress(FileNotFoundError):
-        with open('cache_file.json', 'r') as f:
-            cache_dict = json.load(f)
-        word_list_manager.get_suggestions.cache_clear()
-        for key, value in cache_dict.items():
-            word_list_manager.get_suggestions.cache_update(key, value)
+                            QListWidget, QListView, QPushButton, QCheckBox, QComboBox, 
+                            QDialog, QHBoxLayout, QInputDialog, QMessageBox, QGridLayout,
+                            QLabel, QSpinBox)
+from functools import wraps
+THIRD_PARTY_IMPORTS_DONE = time.perf_counter()
+# pyspellchecker loads its whole word frequency dictionary, so it is imported on first use,
+# see get_spell_checker()
 
 # Logging
-logging.basicConfig(filename="WordSolver2.log", level=logging.DEBUG, format="%(asctime)s %(levelname)s %(message)s")
+LOG_FILENAME = "WordSolver2.log"
+LOG_FORMAT = "%(asctime)s %(levelname)s %(message)s"
+LOG_MAX_BYTES = 5 * 1024 * 1024  # Rotate the log once it reaches 5 MB
+LOG_BACKUP_COUNT = 3  # Keep WordSolver2.log.1 .. WordSolver2.log.3
+KEYSTROKE_LOG_RATE = 10  # Debug records per second allowed from the keystroke path
+KEYSTROKE_LOG_BURST = 20  # Records allowed in a burst before rate limiting starts
+
+class RateLimitFilter(logging.Filter):
+    """
+    A logging filter that rate limits records with a token bucket
+
+    Per-keystroke debug messages are useful while diagnosing a problem, but at typing speed
+    they flood the log. This filter lets a burst of records through and then only `rate`
+    records per second. The number of dropped records is added to the next record that passes.
+
+    Attributes:
+        rate (float): The number of records allowed per second
+        burst (int): The maximum number of records allowed in a burst
+        suppressed (int): The number of records dropped since the last record that passed
+
+    Args:
+        rate (float): The number of records allowed per second
+        burst (int): The maximum number of records allowed in a burst
+
+    Returns:
+        None
+
+    Example:
+        keystroke_logger.addFilter(RateLimitFilter(rate=10, burst=20))
+    """
+    def __init__(self, rate, burst):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.suppressed = 0
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens < 1:
+                self.suppressed += 1
+                return False
+            self._tokens -= 1
+            suppressed, self.suppressed = self.suppressed, 0
+
+        if suppressed:
+            record.msg = f"{record.msg} (%d similar records suppressed)"
+            record.args = (*(record.args or ()), suppressed)
+        return True
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    A QueueHandler that leaves formatting to the QueueListener thread
+
+    The standard QueueHandler formats the message before putting it on the queue, which
+    would do the %-style formatting on the keyboard hook thread. The queue never leaves
+    this process, so the record can be handed over as is.
+    """
+    def prepare(self, record):
+        return record
+
+def setup_logging(level=logging.DEBUG, background=True):
+    """
+    Sets up the logging pipeline. Records are put on a queue by the calling thread and written
+    to a size-rotated WordSolver2.log by a background QueueListener thread, so logging never
+    blocks the keyboard hook on file I/O. The one-shot commands write their records directly
+    instead, so they run a single thread and can fork their board workers (see solve_board).
+
+    Args:
+        level (int): The logging level of the root logger
+        background (bool): Whether the records are written by a QueueListener thread
+
+    Returns:
+        QueueListener: The started listener, or None without one. It is stopped at exit,
+        flushing pending records.
+
+    Example:
+        listener = setup_logging(logging.DEBUG)
+    """
+    file_handler = logging.handlers.RotatingFileHandler(
+        LOG_FILENAME, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8", delay=True)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    if not background:
+        root_logger.addHandler(file_handler)
+        return None
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    root_logger.addHandler(DeferredQueueHandler(log_queue))
+    return listener
+
 logger = logging.getLogger(__name__)
+# Debug records written once per keystroke go through this logger so they can be rate limited
+keystroke_logger = logging.getLogger(f"{__name__}.keystroke")
+keystroke_logger.addFilter(RateLimitFilter(rate=KEYSTROKE_LOG_RATE, burst=KEYSTROKE_LOG_BURST))
+
+class StartupProfiler:
+    """
+    Records how long each phase of the startup takes
+
+    Attributes:
+        started (float): The perf_counter() value the profile starts at
+        phases (list): (phase name, seconds) pairs, in order
+
+    Methods:
+        mark: Ends the current phase
+        report: Returns the profile as text
+
+    Args:
+        started (float): The perf_counter() value the profile starts at
+
+    Returns:
+        None
+
+    Example:
+        profile = StartupProfiler(STARTUP_STARTED)
+        profile.mark("word lists")
+        logger.info(profile.report())
+    """
+    def __init__(self, started):
+        self.started = started
+        self.phases = []
+        self._last = started
+
+    def mark(self, phase, at=None):
+        now = time.perf_counter() if at is None else at
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self):
+        lines = ["Startup profile:"]
+        lines.extend(f"  {phase:<36}{seconds * 1000:9.1f} ms" for phase, seconds in self.phases)
+        lines.append(f"  {'total':<36}{(self._last - self.started) * 1000:9.1f} ms")
+        return "\n".join(lines)
+
+PROFILE_SECONDS = 30  # Default length of a profiling window, see HotPathProfiler
+PROFILE_TRACEMALLOC_FRAMES = 10  # Frames kept per allocation traceback while profiling
+PROFILE_REPORT_LINES = 40  # Functions and allocation sites listed in the text reports
+PROFILE_SIGNAL_POLL_MS = 500  # How often the Qt event loop lets Python handle the profiling signal
+
+class HotPathProfiler:
+    """
+    Profiles the hot paths of the running program for a time window, on demand
+
+    While a window is open, every call of a function wrapped with @profiled runs under a
+    cProfile profiler of its thread, and tracemalloc traces the allocations. When the window
+    closes, the reports are written next to LOG_FILENAME:
+        WordSolver2-profile-<time>.prof: the cProfile stats, for pstats or snakeviz
+        WordSolver2-profile-<time>.txt: the functions taking the most time
+        WordSolver2-profile-<time>.tracemalloc: the tracemalloc snapshot, for
+            tracemalloc.Snapshot.load
+        WordSolver2-profile-<time>-memory.txt: where the memory still in use at the end of
+            the window was allocated, e.g. caches growing
+    Outside a window, a wrapped function costs one attribute check per call.
+
+    Attributes:
+        active (bool): Whether a window is open
+        started (float): The time.time() the window opened at
+        directory (str): The directory the reports are written to
+
+    Methods:
+        start: Opens a window
+        stop: Closes the window and writes the reports
+        toggle: Opens a window, or closes the open one
+        call: Runs a function, profiled if a window is open
+
+    Args:
+        directory (str): The directory the reports are written to, that of LOG_FILENAME by default
+
+    Returns:
+        None
+
+    Example:
+        profiler.start(30) # The reports are written 30 seconds later
+    """
+    def __init__(self, directory=None):
+        self.active = False
+        self.started = None
+        self.directory = directory or os.path.dirname(os.path.abspath(LOG_FILENAME))
+        self._profiles = []
+        self._session = 0
+        self._local = threading.local()
+        self._in_flight = 0
+        self._skipped = 0
+        self._traced = False
+        self._timer = None
+        self._lock = threading.Condition()
+
+    def start(self, seconds=PROFILE_SECONDS):
+        """
+        Opens a profiling window of `seconds` seconds
+
+        Args:
+            seconds (float): The length of the window
+
+        Returns:
+            bool: False if a window was already open
+
+        Example:
+            profiler.start(60)
+        """
+        with self._lock:
+            if self.active:
+                return False
+            self._session += 1
+            self._profiles = []
+            self._skipped = 0
+            import tracemalloc
+            self._traced = not tracemalloc.is_tracing()
+            if self._traced:
+                tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+            self.started = time.time()
+            self.active = True
+            self._timer = threading.Timer(seconds, self.stop)
+            self._timer.daemon = True
+            self._timer.start()
+        logger.info("Profiling for %d s, the reports go to %s.", seconds, self.directory)
+        return True
+
+    def stop(self):
+        """
+        Closes the profiling window and writes the reports. Calls still being profiled are
+        waited for, a few seconds at most.
+
+        Args:
+            None
+
+        Returns:
+            list: The paths of the reports written, empty if no window was open
+
+        Example:
+            profiler.stop()
+        """
+        import pstats
+        import tracemalloc
+        with self._lock:
+            if not self.active:
+                return []
+            self.active = False
+            self._timer.cancel()
+            self._lock.wait_for(lambda: not self._in_flight, timeout=5)
+            # A thread whose calls were all skipped has an empty profile, which pstats rejects
+            profiles = [profile for profile in self._profiles if profile.getstats()]
+            skipped = self._skipped
+            snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+            if self._traced:
+                tracemalloc.stop()
+
+        base = os.path.join(self.directory, time.strftime("WordSolver2-profile-%Y%m%d-%H%M%S",
+                                                          time.localtime(self.started)))
+        seconds = time.time() - self.started
+        paths = []
+        try:
+            with open(f"{base}.txt", "w", encoding="utf-8") as f:
+                if skipped:
+                    f.write(f"WARNING: {skipped} calls were not profiled, as another profiler was running "
+                            f"(only one can run at a time since Python 3.12). They are missing below.\n")
+                f.write(f"Profiled for {seconds:.1f} s, {len(profiles)} threads\n\n")
+                if profiles:
+                    stats = pstats.Stats(*profiles, stream=f)
+                    stats.dump_stats(f"{base}.prof")
+                    paths.append(f"{base}.prof")
+                    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_REPORT_LINES)
+            paths.append(f"{base}.txt")
+            if snapshot is not None:
+                snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),
+                                                   tracemalloc.Filter(False, "<frozen importlib._bootstrap>")))
+                snapshot.dump(f"{base}.tracemalloc")
+                paths.append(f"{base}.tracemalloc")
+                statistics = snapshot.statistics("lineno")
+                with open(f"{base}-memory.txt", "w", encoding="utf-8") as f:
+                    f.write(f"Memory allocated while profiling and still in use: "
+                            f"{sum(stat.size for stat in statistics) / 1024:.0f} KiB\n\n")
+                    f.writelines(f"{stat}\n" for stat in statistics[:PROFILE_REPORT_LINES])
+                paths.append(f"{base}-memory.txt")
+        except OSError as e:
+            logger.error("Could not write the profile %s: %s", base, e)
+        if skipped:
+            logger.warning("%d calls were not profiled, as another profiler was running; "
+                           "the profile leaves them out.", skipped)
+        logger.info("Profile written: %s", ", ".join(paths))
+        return paths
+
+    def toggle(self, seconds=PROFILE_SECONDS):
+        if not self.start(seconds):
+            self.stop()
+
+    def call(self, func, args, kwargs):
+        """
+        Runs a function under the cProfile profiler of the calling thread. A call made
+        from a profiled call is part of it, and is not profiled again.
+
+        Args:
+            func (callable): The function
+            args (tuple): The positional arguments
+            kwargs (dict): The keyword arguments
+
+        Returns:
+            object: What the function returns
+
+        Example:
+            profiler.call(manager.get_suggestions, ("hel",), {})
+        """
+        local = self._local
+        with self._lock:
+            if not self.active or getattr(local, "depth", 0):
+                profile = None
+            else:
+                if getattr(local, "session", None) != self._session:
+                    import cProfile
+                    local.session = self._session
+                    local.profile = cProfile.Profile()
+                    self._profiles.append(local.profile)
+                profile = local.profile
+                self._in_flight += 1
+        if profile is None:
+            return func(*args, **kwargs)
+        local.depth = 1
+        try:
+            try:
+                profile.enable()
+            except ValueError:
+                # Since Python 3.12 only one profiler can run at a time
+                with self._lock:
+                    self._skipped += 1
+                return func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+        finally:
+            local.depth = 0
+            with self._lock:
+                self._in_flight -= 1
+                self._lock.notify_all()
+
+profiler = HotPathProfiler()
+
+def profiled(func):
+    """
+    Wraps a function so it is profiled while a HotPathProfiler window is open
+
+    Args:
+        func (callable): The function
+
+    Returns:
+        callable: The wrapped function
+
+    Example:
+        @profiled
+        def get_suggestions(self, current_word, settings=None):
+            ...
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not profiler.active:
+            return func(*args, **kwargs)
+        return profiler.call(func, args, kwargs)
+    return wrapper
+
+_spell_checker = None
+_spell_checker_lock = threading.Lock()
+
+def get_spell_checker():
+    """
+    Returns the spell checker, importing and creating it on first use. Creating it loads the
+    whole word frequency dictionary, which is why it is not done at startup.
+
+    Args:
+        None
+
+    Returns:
+        SpellChecker: The spell checker
+
+    Example:
+        misspelled = get_spell_checker().unknown(["helo"])
+    """
+    global _spell_checker
+    if _spell_checker is None:
+        with _spell_checker_lock:
+            if _spell_checker is None:
+                from spellchecker import SpellChecker
+                _spell_checker = SpellChecker()
+    return _spell_checker
 
 script_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
 
@@ -42,6 +444,329 @@ RISKY_WORD_LIST_FILENAME = "risky.txt"
 BABYHACKER_WORD_LIST_FILENAME = "Suspicious.txt"
 BESTLIST_WORD_LIST_FILENAME = "BestList.txt"
 EXTREMEHACKER_WORD_LIST_FILENAME = "Obvious.txt"
+# The word lists loaded at startup, in order; the last one found is selected
+DEFAULT_WORD_LISTS = [
+    ("Unnoticable", UNNOTICABLE_WORD_LIST_FILENAME),
+    ("Risky", RISKY_WORD_LIST_FILENAME),
+    ("BestList", BESTLIST_WORD_LIST_FILENAME),
+    ("Suspicious", BABYHACKER_WORD_LIST_FILENAME),
+    ("Obvious", EXTREMEHACKER_WORD_LIST_FILENAME),
+    ("Custom", CUSTOM_WORD_LIST_FILENAME),
+]
+
+KEY_RELEASE_DELAY = 0.05  # Seconds a key sent by the program is held down, or blocked
+HOT_PREFIX_LENGTH = 3  # Prefixes and suffixes up to this long have their completions precomputed
+HOT_PREFIX_K = 10  # Completions precomputed per hot prefix or suffix
+DELTA_COMPACT_SIZE = 256  # Edited words kept in a word list's delta before it is merged into the index
+WATCH_SECONDS = 2.0  # How often the word list files are checked for changes made by other programs
+RACK_BLANKS = "?_"  # Blank tiles in a rack, see WordListManager.find_anagrams
+
+SNAPSHOT_FILENAME = "wordsolver_snapshot.bin"  # The indexed word lists, to skip parsing at startup
+SNAPSHOT_VERSION = 6  # Bump when the layout of the snapshot or of the index changes
+
+def normalize_word(word, strip_accents=False):
+    """
+    Normalizes a word for the word list index. The word is NFKC normalized (so compatibility
+    forms such as ligatures and full-width letters match their plain letters) and case folded.
+    Optionally accents are stripped as well, so "café" and "cafe" share an index entry.
+
+    The same normalization is applied when the index is built and when it is queried.
+
+    Args:
+        word (str): The word to normalize
+        strip_accents (bool): Whether to remove accents and other combining marks
+
+    Returns:
+        str: The normalized word
+
+    Example:
+        normalize_word("AAH") # Returns "aah"
+        normalize_word("Café", strip_accents=True) # Returns "cafe"
+    """
+    if word.isascii():
+        return word.lower()  # Case folding ASCII is the same as lowering it
+    word = unicodedata.normalize("NFKC", word).casefold()
+    if strip_accents:
+        decomposed = unicodedata.normalize("NFD", word)
+        word = unicodedata.normalize("NFC", "".join(c for c in decomposed if not unicodedata.combining(c)))
+    return word
+
+class StringPool:
+    """
+    A pool of unique strings stored once, as length-prefixed UTF-8 bytes in one buffer
+
+    The word lists overlap heavily (risky.txt, Suspicious.txt and BestList.txt share most of
+    their words), so every word list refers to its words by integer id in one shared pool
+    instead of holding its own str objects. A word costs its UTF-8 bytes plus a length byte,
+    a 4 byte offset and a slot in the interning table, instead of a ~50 byte str object per list.
+
+    Each entry is one length byte followed by the bytes of the string; strings of 255 bytes
+    or more use a 255 byte followed by a 4 byte length. Strings are interned through an open
+    addressing hash table of ids (array "i", -1 for empty) keyed by the CRC-32 of the bytes,
+    which is kept per id so probes and growth never decode an entry, and no str object is
+    kept for lookups either. Strings are never removed.
+
+    Lookups take no lock: the table and its mask are stored as one tuple, replaced in one
+    assignment when the table grows, and a lookup reads the tuple once, so it never mixes the
+    mask of a new table with an old one. Interning takes the lock.
+
+    Attributes:
+        data (bytearray): The entries
+        offsets (array): The offset of each entry in `data`, by id
+
+    Methods:
+        intern: Returns the id of a string, adding it if needed
+        intern_many: Returns the ids of many strings, adding them if needed
+        find: Returns the id of a string, or -1
+        get: Returns the string of an id
+        dump: Returns the pool as bytes, for the snapshot
+        restore: Loads a pool written by dump
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Example:
+        pool = StringPool()
+        word_id = pool.intern("hello")
+        pool.get(word_id) # Returns "hello"
+    """
+    __slots__ = ("data", "offsets", "_hashes", "_index", "_lock")
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array.array("I")
+        self._hashes = array.array("I")  # The CRC-32 of each entry, by id
+        table = array.array("i", [-1]) * 1024
+        self._index = (table, len(table) - 1)  # The hash table of ids, and its mask
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _entry(self, word_id):
+        offset = self.offsets[word_id]
+        size = self.data[offset]
+        if size == 255:
+            size = int.from_bytes(self.data[offset + 1:offset + 5], "little")
+            offset += 4
+        return self.data[offset + 1:offset + 1 + size]
+
+    def _slot(self, encoded, crc, table, mask):
+        # The slot of `table` holding the id of `encoded`, or the empty slot where it belongs.
+        # Entries are compared in place, without slicing them out of the pool
+        hashes, data, offsets = self._hashes, self.data, self.offsets
+        size = len(encoded)
+        slot = crc & mask
+        while (word_id := table[slot]) >= 0:
+            if hashes[word_id] == crc:
+                offset = offsets[word_id]
+                if size < 255:
+                    if data[offset] == size and data.startswith(encoded, offset + 1):
+                        break
+                elif self._entry(word_id) == encoded:
+                    break
+            slot = (slot + 1) & mask
+        return slot
+
+    def find(self, word):
+        encoded = word.encode("utf-8")
+        table, mask = self._index
+        return table[self._slot(encoded, zlib.crc32(encoded), table, mask)]
+
+    def get(self, word_id):
+        return self._entry(word_id).decode("utf-8")
+
+    def intern(self, word):
+        """
+        Returns the id of a string, adding it to the pool if it is not there yet
+
+        Args:
+            word (str): The string
+
+        Returns:
+            int: The id of the string
+
+        Example:
+            pool.intern("hello") # Returns 0
+        """
+        with self._lock:
+            return self._intern(word.encode("utf-8"))
+
+    def intern_many(self, words):
+        """
+        Interns many strings at once, taking the lock once
+
+        Args:
+            words (iterable): The strings
+
+        Returns:
+            array: The ids of the strings, in order
+
+        Example:
+            ids = word_pool.intern_many(["hello", "world"])
+        """
+        with self._lock:
+            intern = self._intern
+            return array.array("I", [intern(word.encode("utf-8")) for word in words])
+
+    def _intern(self, encoded):
+        crc = zlib.crc32(encoded)
+        table, mask = self._index
+        slot = self._slot(encoded, crc, table, mask)
+        if (word_id := table[slot]) >= 0:
+            return word_id
+
+        word_id = len(self.offsets)
+        # The bytes are added before the offset, so a reader never sees an id without data
+        offset = len(self.data)
+        if len(encoded) < 255:
+            self.data.append(len(encoded))
+        else:
+            self.data.append(255)
+            self.data += len(encoded).to_bytes(4, "little")
+        self.data += encoded
+        self._hashes.append(crc)
+        self.offsets.append(offset)
+        table[slot] = word_id
+        if len(self.offsets) * 3 > len(table) * 2:
+            self._grow()
+        return word_id
+
+    def _grow(self):
+        table = array.array("i", [-1]) * (len(self._index[0]) * 2)
+        mask = len(table) - 1
+        for word_id, crc in enumerate(self._hashes):
+            slot = crc & mask
+            while table[slot] >= 0:
+                slot = (slot + 1) & mask
+            table[slot] = word_id
+        self._index = (table, mask)
+
+    def dump(self):
+        with self._lock:
+            return bytes(self.data), self.offsets.tobytes(), self._hashes.tobytes(), self._index[0].tobytes()
+
+    def restore(self, data, offsets, hashes, table):
+        """
+        Loads a pool written by dump, into an empty pool
+
+        Args:
+            data, offsets, hashes, table (bytes): The parts returned by dump
+
+        Returns:
+            bool: True if the pool was restored, False if it was not empty
+
+        Example:
+            word_pool.restore(*snapshot["pool"])
+        """
+        with self._lock:
+            if self.offsets:
+                return False
+            self.data = bytearray(data)
+            self.offsets = array.array("I", offsets)
+            self._hashes = array.array("I", hashes)
+            table = array.array("i", table)
+            self._index = (table, len(table) - 1)
+            return True
+
+# The pool shared by all word lists
+word_pool = StringPool()
+
+class WordDelta:
+    """
+    The words added to and deleted from a word list since its index was built
+
+    A delta is never changed once built: an edit builds a new delta and the word list swaps
+    it in with one assignment, so a query reading the delta never sees half an edit and
+    never waits for one. The added words get small tries of their own, so the queries on
+    the tries of the index run on them as well and the results are merged.
+
+    Attributes:
+        added (dict): The added keys, with their spelling
+        deleted (frozenset): The deleted keys, all of them in the index
+        trie_start (Trie): The added keys
+        trie_end (Trie): The added keys, reversed
+
+    Methods:
+        update: Returns the delta with more words added and deleted
+        rebase: Returns what is left of the delta once another delta is merged into the index
+
+    Args:
+        added (dict): The added keys, with their spelling
+        deleted (iterable): The deleted keys
+
+    Returns:
+        None
+
+    Example:
+        delta = WordDelta().update({"yeet": "yeet"}, [], word_list.base_contains_key)
+    """
+    __slots__ = ("added", "deleted", "trie_start", "trie_end")
+
+    def __init__(self, added=None, deleted=()):
+        self.added = added or {}
+        self.deleted = frozenset(deleted)
+        self.trie_start = Trie()
+        self.trie_end = Trie()
+        # In key order, like the tries of the index, so a search capped at k words keeps the
+        # first k words in that order
+        self.trie_start.insert_many(sorted(self.added))
+        self.trie_end.insert_many(sorted(key[::-1] for key in self.added))
+
+    def __len__(self):
+        return len(self.added) + len(self.deleted)
+
+    def update(self, add, remove, in_index):
+        """
+        Returns the delta with more words added and deleted
+
+        Args:
+            add (dict): The keys to add, with their spelling
+            remove (iterable): The keys to delete
+            in_index (callable): Returns whether a key is in the index
+
+        Returns:
+            WordDelta: The new delta
+
+        Example:
+            delta = delta.update({"yeet": "yeet"}, ["aah"], word_list.base_contains_key)
+        """
+        added = dict(self.added)
+        deleted = set(self.deleted)
+        for key, spelling in add.items():
+            deleted.discard(key)
+            if not in_index(key):
+                added[key] = spelling
+        for key in remove:
+            added.pop(key, None)
+            if in_index(key):
+                deleted.add(key)
+        return WordDelta(added, deleted)
+
+    def rebase(self, merged, spelling):
+        """
+        Returns what is left of this delta once an older delta, `merged`, has been merged
+        into the index. This delta holds the edits made since, relative to the old index.
+
+        Args:
+            merged (WordDelta): The delta merged into the index
+            spelling (callable): Returns the spelling of a key of the old index
+
+        Returns:
+            WordDelta: The delta relative to the new index
+
+        Example:
+            word_list.delta = word_list.delta.rebase(compacted, word_list.get_surface)
+        """
+        # A key added or deleted since the compaction started is still added or deleted,
+        # and a key added (deleted) by the merged delta and deleted (added) since is too
+        added = {key: spelling for key, spelling in self.added.items() if key not in merged.added}
+        added.update((key, spelling(key)) for key in merged.deleted - self.deleted)
+        deleted = (merged.added.keys() - self.added.keys()) | (self.deleted - merged.deleted)
+        return WordDelta(added, deleted)
 
 # Save the object to a file
 
@@ -49,12 +774,29 @@ class WordList:
     """
     A class for storing a list of words
 
+    The words are stored as ids in the shared word_pool, sorted by their normalized key, and
+    the list uses __slots__, so a word list that is not in use costs a few bytes per word.
+
     Attributes:
         name (str): The name of the word list
         file (str): The file containing the word list
-        words (list): The list of words
-        trie (Trie): The trie data structure used to store the words
+        words (list): The list of words, as they are written in the file, built on first use
+        ids (array): The word_pool ids of the normalized keys of the words, sorted by key
+        trie (Trie): The trie data structure used to store the words, built on first use
+        key_text (str): The keys joined by newlines, for pattern queries, built on first use
+        members (bytearray): A bit per word_pool id, set for the ids of the list, built with the ids
+        delta (WordDelta): The words added and deleted since the index was built
+        version (int): Changes whenever the words of the list change, for caches
+        stamp (tuple): The size and modification time of the file when it was last read
+        hot_prefixes (dict): The first completions of each prefix of up to HOT_PREFIX_LENGTH
+            letters, as start << 8 | count in `ids`, built with the ids
+        hot_suffixes (dict): The same for the words ending with each suffix, in `hot_suffix_ids`
+        hot_suffix_ids (array): The ids of the words ending with each suffix in `hot_suffixes`
         dir (str): The directory of the file
+        strip_accents (bool): Whether accents are stripped from the words in the index
+        surface_forms (dict): The original spelling of indexed words whose spelling differs
+            from their normalized form (and from `surface_case`)
+        surface_case (str): "upper" if most words in the file are written in uppercase, else "lower"
 
     Methods:
         get_name: Returns the name of the word list
@@ -65,10 +807,31 @@ class WordList:
         set_trie: Sets the trie data structure used to store the words
         get_dir: Returns the directory of the file
         set_dir: Sets the directory of the file
+        normalize: Normalizes a word the way the index of this list is normalized
+        get_surface: Returns the original spelling of a normalized word
+        set_surface_forms: Sets the original spellings of the normalized words
+        split_surfaces: Picks the default case of the spellings, and the spellings to store
+        get_keys: Returns the normalized keys of the words, sorted
+        get_key_text: Returns the normalized keys joined by newlines
+        set_keys: Sets the normalized keys of the words
+        set_ids: Sets the word_pool ids of the normalized keys, and their lookup tables
+        get_tables: Returns the lookup tables, for the snapshot
+        build_tables: Builds the lookup tables of sorted ids and keys
+        hot_completions: Returns the first completions of a short prefix or suffix
+        contains: Returns whether a word is in the list
+        contains_key: Returns whether a normalized key is in the list
+        base_contains_key: Returns whether a normalized key is in the index, ignoring the delta
+        get_all_keys: Returns the normalized keys of the words, with the delta applied
+        query: Runs a search on the tries of the index and of the delta, and merges the results
+        update_words: Adds and deletes words, in the delta
+        set_words_from: Adds and deletes words so the list holds the given words
+        compact: Merges the delta into a new index
+        get_version_tag: Returns a tag telling the versions of the words apart, for caches
 
     Args:
         name (str): The name of the word list
         file (str): The file containing the word list
+        strip_accents (bool): Whether accents are stripped from the words in the index
 
     Returns:
         None
@@ -76,12 +839,30 @@ class WordList:
     Example:
         word_list = WordList("English", "english.txt")
     """
-    def __init__(self, name, file):
+    __slots__ = ("name", "file", "words", "ids", "trie", "key_text", "members", "hot_prefixes", "hot_suffixes",
+                 "hot_suffix_ids", "delta", "version", "stamp", "dir", "strip_accents", "surface_forms",
+                 "surface_case", "_index_lock", "_compact_lock")
+
+    def __init__(self, name, file, strip_accents=False):
         self.name = name
         self.file = file
         self.words = []
+        self.ids = array.array("I")
         self.trie = None
+        self.key_text = None
+        self.members = bytearray()
+        self.hot_prefixes = {}
+        self.hot_suffixes = {}
+        self.hot_suffix_ids = array.array("I")
+        self.delta = WordDelta()
+        self.version = 0
+        self.stamp = None
         self.dir = os.path.join(script_dir, file)
+        self.strip_accents = strip_accents
+        self.surface_forms = {}
+        self.surface_case = "lower"
+        self._index_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
     
     def get_name(self):
         return self.name
@@ -90,12 +871,27 @@ class WordList:
         return self.file
     
     def get_words(self):
+        if self.words is None:
+            self.words = [self.get_surface(key) for key in self.get_all_keys()]
         return self.words
     
     def set_words(self, words):
         self.words = words
     
     def get_trie(self):
+        # The tries are the slowest part of loading a word list, so they are only built
+        # when the list is first used
+        if self.trie is None:
+            with self._index_lock:
+                if self.trie is None:
+                    keys = self.get_keys()
+                    trie_start = Trie()
+                    trie_end = Trie()
+                    trie_start.insert_many(keys)
+                    # Inserted in the order of the reversed words, so the suffix searches
+                    # return them in that order, like the hot suffix tables
+                    trie_end.insert_many(sorted(key[::-1] for key in keys))
+                    self.trie = (trie_start, trie_end)
         return self.trie
     
     def set_trie(self, trie):
@@ -107,12 +903,397 @@ class WordList:
     def set_dir(self, dir):
         self.dir = dir
 
+    def normalize(self, word):
+        return normalize_word(word, self.strip_accents)
+
+    def get_surface(self, key):
+        if surface := self.surface_forms.get(key) or self.delta.added.get(key):
+            return surface
+        return key.upper() if self.surface_case == "upper" else key
+
+    def set_surface_forms(self, surface_forms, surface_case="lower"):
+        self.surface_forms = surface_forms
+        self.surface_case = surface_case
+
+    def get_keys(self, ids=None):
+        # The keys of the index, without the words added or deleted since (see get_all_keys)
+        get = word_pool.get
+        return [get(word_id) for word_id in (self.ids if ids is None else ids)]
+
+    def get_all_keys(self):
+        delta = self.delta
+        if not delta:
+            return self.get_keys()
+        return sorted(set(self.get_keys()).difference(delta.deleted).union(delta.added))
+
+    def get_key_text(self):
+        # The keys joined by newlines, scanned by pattern queries that cannot use the trie
+        key_text = self.key_text
+        if key_text is None:
+            key_text = self.key_text = "\n".join(self.get_keys())
+        return key_text
+
+    def set_keys(self, keys):
+        self.set_ids(word_pool.intern_many(keys), keys=keys)
+
+    def set_ids(self, ids, tables=None, keys=None):
+        """
+        Sets the word_pool ids of the normalized keys, sorted by key, and the lookup tables
+        built from them: the membership bits and the hot prefix and suffix tables. The
+        tables are built unless they are given, as returned by get_tables.
+
+        Args:
+            ids (array): The ids of the keys, sorted by key
+            tables (dict): The tables of these ids, from the snapshot, or None to build them
+            keys (list): The keys of the ids, if already known, to build the tables
+
+        Returns:
+            None
+
+        Example:
+            word_list.set_ids(array.array("I", snapshot["ids"]), snapshot["tables"])
+        """
+        if tables is None:
+            tables = self.build_tables(ids, self.get_keys(ids) if keys is None else keys)
+        with self._index_lock:
+            self.ids = ids
+            self.members = bytearray(tables["members"])
+            self.hot_prefixes = tables["hot_prefixes"]
+            self.hot_suffixes = tables["hot_suffixes"]
+            self.hot_suffix_ids = array.array("I", tables["hot_suffix_ids"])
+            self.delta = WordDelta()
+            self.version += 1
+            self.words = None  # Rebuilt from the keys on first use
+            self.trie = None
+            self.key_text = None
+
+    def get_tables(self):
+        return {
+            "members": bytes(self.members),
+            "hot_prefixes": self.hot_prefixes,
+            "hot_suffixes": self.hot_suffixes,
+            "hot_suffix_ids": self.hot_suffix_ids.tobytes(),
+        }
+
+    @staticmethod
+    def build_tables(ids, keys):
+        """
+        Builds the lookup tables of a word list from its ids and keys, sorted by key.
+
+        Membership is a bit per pool id: the pool's hash table finds the id of a word, so a
+        lookup is a hash and a bit test, with no false positives, in len(word_pool) / 8 bytes.
+
+        The hot prefix table holds the first HOT_PREFIX_K completions of every prefix of up
+        to HOT_PREFIX_LENGTH letters, the ones typed most often and with the most words below
+        them in the trie. The keys are sorted, and the trie lists completions in that order,
+        so these are the first keys with the prefix: each entry only packs where they start
+        in `ids` and how many there are (start << 8 | count). The hot suffix table does the
+        same for the words ending with each suffix, ordered by reversed key, with the ids
+        stored in `hot_suffix_ids` since they are not contiguous in `ids`.
+
+        Args:
+            ids (array): The word_pool ids of the keys
+            keys (list): The keys, sorted
+
+        Returns:
+            dict: The tables, see get_tables
+
+        Example:
+            tables = WordList.build_tables(ids, keys)
+        """
+        members = bytearray((max(ids, default=-1) >> 3) + 1)
+        for word_id in ids:
+            members[word_id >> 3] |= 1 << (word_id & 7)
+
+        def runs(sorted_keys):
+            # The start and length (at most HOT_PREFIX_K) of the run of keys starting with each
+            # prefix of up to HOT_PREFIX_LENGTH letters; the keys with a prefix are contiguous
+            # A key shorter than `length` is its own prefix, so it needs no special case
+            prefixes = set()
+            for length in range(1, HOT_PREFIX_LENGTH + 1):
+                prefixes |= {key[:length] for key in sorted_keys}
+            for prefix in prefixes:
+                start = bisect.bisect_left(sorted_keys, prefix)
+                end = bisect.bisect_left(sorted_keys, prefix + "\U0010ffff", start,
+                                         min(start + HOT_PREFIX_K, len(sorted_keys)))
+                yield prefix, start, end - start
+
+        hot_prefixes = {prefix: start << 8 | count for prefix, start, count in runs(keys)}
+
+        # Only the few reversed keys kept in the table are looked up in the pool for their id
+        reversed_keys = sorted([key[::-1] for key in keys])
+        hot_suffixes = {}
+        hot_suffix_ids = array.array("I")
+        for prefix, start, count in runs(reversed_keys):
+            hot_suffixes[prefix[::-1]] = len(hot_suffix_ids) << 8 | count
+            hot_suffix_ids.extend(word_pool.find(key[::-1]) for key in reversed_keys[start:start + count])
+
+        return {"members": members, "hot_prefixes": hot_prefixes, "hot_suffixes": hot_suffixes,
+                "hot_suffix_ids": hot_suffix_ids}
+
+    def hot_completions(self, key, k, suffix=False):
+        """
+        Returns the first completions of a short key from the hot prefix (or suffix) table,
+        with one dictionary lookup, or None if the key is too long or `k` too large for the
+        table. These are the words Trie.collect returns for the prefix; for a suffix, they
+        are ordered by their reversed key.
+
+        Args:
+            key (str): The normalized key
+            k (int): The number of words wanted
+            suffix (bool): Whether to return the words ending with the key
+
+        Returns:
+            list or None: The first `k` keys starting (or ending) with the key
+
+        Example:
+            word_list.hot_completions("he", 5) # Returns ["he", "head", "heads", ...]
+        """
+        if not key or len(key) > HOT_PREFIX_LENGTH or k > HOT_PREFIX_K:
+            return None
+        entry = (self.hot_suffixes if suffix else self.hot_prefixes).get(key)
+        if entry is None:
+            return []
+        start, count = entry >> 8, min(entry & 0xFF, k)
+        ids = self.hot_suffix_ids if suffix else self.ids
+        get = word_pool.get
+        return [get(word_id) for word_id in ids[start:start + count]]
+
+    def contains(self, word):
+        return self.contains_key(self.normalize(word))
+
+    def contains_key(self, key):
+        delta = self.delta
+        if key in delta.added:
+            return True
+        return key not in delta.deleted and self.base_contains_key(key)
+
+    def get_version_tag(self):
+        # Tells the versions of the list apart, also across runs through the persisted
+        # suggestions cache: the file it was read from, and the edits since
+        size, modified = self.stamp or (0, 0)
+        return f"{size}.{modified}.{self.version}"
+
+    def base_contains_key(self, key):
+        word_id = word_pool.find(key)
+        members = self.members
+        return 0 <= word_id < len(members) << 3 and bool(members[word_id >> 3] & 1 << (word_id & 7))
+
+    def query(self, search, base=None, order=None):
+        """
+        Runs a search on the tries of the index and on the tries of the words added since,
+        and merges the results: the deleted words are dropped from the results of the index,
+        and the results of the added words are merged in order, or follow them.
+
+        Args:
+            search (callable): Takes the prefix and suffix tries, returns an iterable of keys
+                (None items, like the ticks of Trie.search_fuzzy, are passed through)
+            base (iterable): The results of the index, if already known (e.g. from the hot
+                tables), instead of running the search on the tries of the index
+            order (callable): The sort key the results of the index are sorted by, or None
+                if they are not sorted
+
+        Returns:
+            iterator: The keys found
+
+        Example:
+            list(word_list.query(lambda trie_start, trie_end: trie_start.search("hel"), order=str))
+        """
+        delta = self.delta
+        if base is None:
+            base = search(*self.get_trie())
+        if delta.deleted:
+            deleted = delta.deleted
+            base = (key for key in base if key is None or key not in deleted)
+        if not delta.added:
+            return iter(base)
+        added = search(delta.trie_start, delta.trie_end)
+        if order is None:
+            return itertools.chain(base, added)
+        return heapq.merge(base, sorted(added, key=order), key=order)
+
+    def update_words(self, add=(), remove=()):
+        """
+        Adds and deletes words without rebuilding the index: the edits go into a new delta,
+        merged with the index at query time, and the version of the list changes. Once the
+        delta holds DELTA_COMPACT_SIZE words, it is merged into a new index in the background.
+
+        Args:
+            add (iterable): The words to add, as they are written
+            remove (iterable): The words to delete
+
+        Returns:
+            None
+
+        Example:
+            word_list.update_words(add=["yeet"], remove=["aah"])
+        """
+        entries = {}
+        for word in add:
+            key = self.normalize(word)
+            if key.isalpha():
+                entries.setdefault(key, word)
+        removed = {self.normalize(word) for word in remove} - entries.keys()
+        with self._index_lock:
+            delta = self.delta.update(entries, removed, self.base_contains_key)
+            if delta.added == self.delta.added and delta.deleted == self.delta.deleted:
+                return  # Nothing changed: the version and the cached suggestions stay
+            self.delta = delta
+            self.version += 1
+            self.words = None
+        if len(self.delta) >= DELTA_COMPACT_SIZE:
+            threading.Thread(target=self.compact, name=f"compact {self.name}", daemon=True).start()
+
+    def set_words_from(self, words):
+        """
+        Updates the list to hold exactly the given words, e.g. after its file changed, by
+        adding and deleting the words that differ
+
+        Args:
+            words (iterable): The words, as they are written
+
+        Returns:
+            None
+
+        Example:
+            word_list.set_words_from(["apple", "pear"])
+        """
+        entries = {}
+        for word in words:
+            key = self.normalize(word)
+            if key.isalpha():
+                entries.setdefault(key, word)
+        current = set(self.get_all_keys())
+        self.update_words(add=[entries[key] for key in entries.keys() - current],
+                          remove=current - entries.keys())
+
+    def compact(self):
+        """
+        Merges the delta into a new index, built in the calling thread while queries keep
+        using the current index and delta, then swapped in at once. The tries are built
+        before the swap if the list is in use, so no query waits for them. Edits made while
+        the new index is built are kept in the delta.
+
+        Args:
+            None
+
+        Returns:
+            bool: True if the delta was merged, False if another compaction was running or
+                there was nothing to merge
+
+        Example:
+            threading.Thread(target=word_list.compact, daemon=True).start()
+        """
+        if not self._compact_lock.acquire(blocking=False):
+            return False
+        try:
+            merged = self.delta
+            if not merged:
+                return False
+            started = time.perf_counter()
+            base_ids = self.ids
+            keys = sorted(set(self.get_keys(base_ids)).difference(merged.deleted).union(merged.added))
+            surfaces = {key: merged.added.get(key) or self.get_surface(key) for key in keys}
+            surface_forms, surface_case = self.split_surfaces(len(keys), surfaces)
+            ids = word_pool.intern_many(keys)
+            tables = self.build_tables(ids, keys)
+            trie = None
+            if self.trie is not None:
+                trie = (Trie(), Trie())
+                trie[0].insert_many(keys)
+                trie[1].insert_many(sorted(key[::-1] for key in keys))
+
+            with self._index_lock:
+                if self.ids is not base_ids:
+                    return False  # The list was reloaded meanwhile
+                delta = self.delta.rebase(merged, self.get_surface)
+                self.ids = ids
+                self.members = bytearray(tables["members"])
+                self.hot_prefixes = tables["hot_prefixes"]
+                self.hot_suffixes = tables["hot_suffixes"]
+                self.hot_suffix_ids = tables["hot_suffix_ids"]
+                self.surface_forms, self.surface_case = surface_forms, surface_case
+                self.trie = trie
+                self.delta = delta  # The same words: the version does not change
+                self.words = None
+                self.key_text = None
+            logger.info("Compacted %d edits of word list %s in %.2f s, %d left.",
+                        len(merged), self.name, time.perf_counter() - started, len(delta))
+            return True
+        finally:
+            self._compact_lock.release()
+
+    def index_words(self, words):
+        """
+        Builds the normalized index of the given words: the tries and the map back to the
+        original spelling. Words that normalize to the same key share one entry; the first
+        spelling is kept.
+
+        Args:
+            words (iterable): The words, as they are written in the file
+
+        Returns:
+            None
+
+        Example:
+            word_list.index_words(["Apple", "apple", "AAH"])
+        """
+        entries = {}
+        for word in words:
+            key = self.normalize(word)
+            if key.isalpha():
+                entries.setdefault(key, word)
+        self.set_index(sorted(entries), entries)
+
+    def set_index(self, keys, surfaces):
+        """
+        Sets the sorted normalized keys (the tries are built from them on first use) and stores the original spellings.
+        Only the spellings that cannot be derived from the key are kept: in a list that is
+        mostly uppercase (like risky.txt) uppercase words cost nothing extra.
+
+        Args:
+            keys (list): The normalized keys, sorted
+            surfaces (dict): The original spelling of keys, for keys spelled differently
+
+        Returns:
+            None
+
+        Example:
+            word_list.set_index(["aah", "apple"], {"aah": "AAH"})
+        """
+        self.set_surface_forms(*self.split_surfaces(len(keys), surfaces))
+        self.set_keys(keys)
+
+    @staticmethod
+    def split_surfaces(count, surfaces):
+        """
+        Picks the case the keys of a list are spelled in by default, uppercase if most are,
+        and keeps only the spellings that differ from it
+
+        Args:
+            count (int): The number of keys of the list
+            surfaces (dict): The spelling of keys, at least of those spelled differently
+
+        Returns:
+            tuple: The spellings to store and the default case, "upper" or "lower"
+
+        Example:
+            WordList.split_surfaces(2, {"aah": "AAH"}) # Returns ({"aah": "AAH"}, "lower")
+        """
+        upper = sum(1 for key, surface in surfaces.items() if surface == key.upper() != key)
+        surface_case = "upper" if upper * 2 > count else "lower"
+        default = str.upper if surface_case == "upper" else str
+        return {key: surface for key, surface in surfaces.items() if surface != default(key)}, surface_case
+
 class CustomWordListEditor(QDialog):
     """
     A class for editing a custom word list
 
     Attributes:
         word_list (WordList): The word list to edit
+        words (list): The words being edited. A copy: the list of the word list is replaced
+            whenever its index changes, by the file watcher and compaction threads, so edits
+            made to it could be lost. The copy is applied to the word list on save.
 
     Methods:
         load_words: Loads the words from the word list
@@ -136,6 +1317,7 @@ class CustomWordListEditor(QDialog):
     def __init__(self, parent, word_list: WordList) -> None:
         super().__init__(parent)
         self.word_list = word_list
+        self.words = list(word_list.get_words())
         self.setWindowTitle("Custom Word List Editor")
 
         # Create UI components
@@ -186,7 +1368,7 @@ class CustomWordListEditor(QDialog):
         # Clear existing items
         self.list_widget.clear()
         # Add words from the custom word list
-        for word in self.word_list.get_words():
+        for word in self.words:
             self.list_widget.addItem(word)
 
 
@@ -206,7 +1388,7 @@ class CustomWordListEditor(QDialog):
         text, ok = QInputDialog.getText(self, "Add Word", "Enter the word:")
         if ok and text:
             self.list_widget.addItem(text)
-            self.word_list.get_words().append(text)
+            self.words.append(text)
 
     def edit_word(self):
         """
@@ -226,8 +1408,8 @@ class CustomWordListEditor(QDialog):
             new_text, ok = QInputDialog.getText(self, "Edit Word", "Edit the word:", text=old_text)
             if ok and new_text:
                 selected_item.setText(new_text)
-                self.word_list.get_words().remove(old_text)
-                self.word_list.get_words().append(new_text)
+                self.words.remove(old_text)
+                self.words.append(new_text)
 
     def delete_word(self):
         """
@@ -243,7 +1425,7 @@ class CustomWordListEditor(QDialog):
             self.delete_word()
         """
         if selected_item := self.list_widget.currentItem():
-            self.word_list.get_words().remove(selected_item.text())
+            self.words.remove(selected_item.text())
             self.list_widget.takeItem(self.list_widget.row(selected_item))
 
 
@@ -262,21 +1444,34 @@ class CustomWordListEditor(QDialog):
         """
         # Save the custom word list to a file
         with open(self.word_list.get_dir(), "w") as file:
-            for word in self.word_list.get_words():
+            for word in self.words:
                 file.write(word + "\n")
         QMessageBox.information(self, "Success", "Changes saved successfully!")
 
-        # Update the trie
-        trie_start, trie_end = self.word_list.get_trie()
-        trie_start.root = TrieNode()  # Clear the trie
-        trie_end.root = TrieNode()
-        for word in self.word_list.get_words():
-            trie_start.insert(word)
-            trie_end.insert(word, reverse=True)
+        # Apply the edits to the index, as a delta; the file watcher then finds the file up to date
+        self.word_list.set_words_from(list(self.words))
 
     def close_editor(self):
         self.close()
 
+# Suggestion pipeline: the stages run in order, each adding at most `k` words found within
+# `budget_us` microseconds, until SUGGESTION_LIMIT words are found. A stage with k = 0 is off.
+SuggestionStage = collections.namedtuple("SuggestionStage", "name k budget_us")
+
+SUGGESTION_STAGE_NAMES = ("learned", "prefix", "suffix", "containing", "fuzzy", "ngram")
+DEFAULT_SUGGESTION_STAGES = (
+    SuggestionStage("learned", 3, 300),  # Words the user accepted before, starting with the word
+    SuggestionStage("prefix", 5, 2000),  # Words starting with the word
+    SuggestionStage("suffix", 3, 2000),  # Words ending with the word
+    SuggestionStage("containing", 0, 5000),  # Words with the word in the middle
+    SuggestionStage("fuzzy", 2, 3000),  # Words starting with a one letter typo of the word
+    SuggestionStage("ngram", 2, 300),  # Likely next words after the previous words, starting with the word
+)
+SUGGESTION_LIMIT = 10  # Suggestions shown; the pipeline stops once it found this many
+SUGGESTION_CACHE_SIZE = 4096  # Stage results cached by run_pipeline, the least recently used are dropped
+FUZZY_MIN_LENGTH = 3  # Shorter words are one typo away from too many words
+FUZZY_MAX_DISTANCE = 1  # Letters inserted, deleted or replaced for a fuzzy match
+
 class Settings:
     """
     A class for storing the settings of the application
@@ -285,6 +1480,11 @@ class Settings:
         auto_correct_enabled (bool): Whether auto-correct is enabled
         auto_complete_enabled (bool): Whether auto-complete is enabled
         autocomplete_key (str): The key to press to auto-complete a word
+        strip_accents (bool): Whether word lists match words regardless of accents
+        next_word_prediction_enabled (bool): Whether to suggest the next word after a space
+        suggestion_stages (list): The SuggestionStage of the suggestion pipeline, in order
+        suggestion_limit (int): The number of suggestions shown
+        profile_seconds (int): The length of a profiling window, see HotPathProfiler
 
     Methods:
         None
@@ -302,6 +1502,11 @@ class Settings:
         self.auto_correct_enabled = True
         self.auto_complete_enabled = True
         self.autocomplete_key = "tab"
+        self.strip_accents = False
+        self.next_word_prediction_enabled = True
+        self.suggestion_stages = list(DEFAULT_SUGGESTION_STAGES)
+        self.suggestion_limit = SUGGESTION_LIMIT
+        self.profile_seconds = PROFILE_SECONDS
 
 class TrieNode:
     """
@@ -323,6 +1528,8 @@ class TrieNode:
     Example:
         node = TrieNode()
     """
+    __slots__ = ("children", "is_word")
+
     def __init__(self):
         self.children = {}
         self.is_word = False
@@ -336,8 +1543,14 @@ class Trie:
 
     Methods:
         insert: Inserts a word into the trie
+        insert_many: Inserts many words at once
+        contains: Returns whether a word is in the trie
         search: Searches for words that start with a given prefix
+        collect: Collects the words below a node
         search_containing: Searches for words that contain a given substring
+        search_fuzzy: Searches for words starting with a prefix, allowing a typo
+        anagrams: Searches for words that can be made from a rack of letters
+        match: Searches for words matching a PatternQuery
 
     Args:
         None
@@ -389,6 +1602,51 @@ class Trie:
             node = node.children[letter]
         node.is_word = True
 
+    def insert_many(self, words, reverse=False):
+        """
+        Inserts many words at once, looking each node up once per letter
+
+        Args:
+            words (iterable): The words to insert
+            reverse (bool): Whether to insert the words reversed
+
+        Returns:
+            None
+
+        Example:
+            trie = Trie()
+            trie.insert_many(["car", "cart", "cat"])
+        """
+        root = self.root
+        for word in words:
+            node = root
+            for letter in (word[::-1] if reverse else word):
+                child = node.children.get(letter)
+                if child is None:
+                    child = node.children[letter] = TrieNode()
+                node = child
+            node.is_word = True
+
+    def contains(self, word):
+        """
+        Returns whether a word is in the trie
+
+        Args:
+            word (str): The word to look up
+
+        Returns:
+            bool: True if the word was inserted
+
+        Example:
+            trie.contains("hello") # Returns True
+        """
+        node = self.root
+        for letter in word:
+            node = node.children.get(letter)
+            if node is None:
+                return False
+        return node.is_word
+
     def search(self, prefix, reverse=False, max_suggestions=None):
         """
         Updates the suggestions in the list_widget by clearing the existing items and adding the new suggestions.
@@ -408,7 +1666,6 @@ class Trie:
             suggestions = ["apple", "banana", "cherry"]
             widget.update_suggestions(suggestions)
         """        
-        suggestions = []
         node = self.root
 
         if reverse:
@@ -420,6 +1677,25 @@ class Trie:
             else:
                 return []
 
+        return self.collect(node, prefix, max_suggestions)
+
+    def collect(self, node, prefix, max_suggestions=None):
+        """
+        Collects the words below a node of the trie, e.g. the node a TrieCursor reached
+
+        Args:
+            node (TrieNode): The node of the prefix
+            prefix (str): The letters leading to the node
+            max_suggestions (int): The maximum number of words to collect, or None for all
+
+        Returns:
+            list: The words starting with the prefix
+
+        Example:
+            trie.collect(cursor.seek("hel"), "hel", max_suggestions=5)
+        """
+        suggestions = []
+
         def search_helper(node, current_word):
             """
             Helps the search function to recursively search for words that start with a given prefix.
@@ -503,21 +1779,682 @@ class Trie:
             if node.is_word and substring in current_word:
                 suggestions.append(current_word)
 
-            for letter, child_node in node.children.items():
-                search_helper(child_node, current_word + letter)
+            for letter, child_node in node.children.items():
+                search_helper(child_node, current_word + letter)
+
+        search_helper(self.root, "")
+        return suggestions
+
+    def search_fuzzy(self, prefix, max_distance=FUZZY_MAX_DISTANCE):
+        """
+        Searches for words starting with a text at most `max_distance` typos away from a
+        prefix, but not starting with the prefix itself. A typo is a letter inserted,
+        deleted or replaced, or two adjacent letters swapped. The first letter is trusted,
+        as it is rarely mistyped, which also keeps the search to one branch of the trie.
+        The trie is walked with a row of edit distances per node, and a branch is dropped
+        once every distance in its row is too large.
+
+        This is a generator, so the caller can stop it once it has enough words. It also
+        yields None for every node visited, so a caller with a time budget can stop it
+        while it is still looking for the first word.
+
+        Args:
+            prefix (str): The (normalized) prefix, as typed
+            max_distance (int): The maximum number of typos
+
+        Returns:
+            generator: The words found, and None ticks
+
+        Example:
+            [word for word in trie.search_fuzzy("recieve") if word] # Returns ["receive", "received", ...]
+        """
+        first = self.root.children.get(prefix[:1])
+        if first is None:
+            return
+        row = [1] + list(range(len(prefix)))  # The distances of the first letter to each prefix of `prefix`
+        stack = [(first, prefix[0], row, None)]
+        while stack:
+            node, word, row, previous_row = stack.pop()
+            yield None
+            if row[-1] <= max_distance:
+                if row[-1] == 0:
+                    continue  # The words starting with the prefix itself are not fuzzy matches
+                below = [(node, word)]
+                while below:
+                    node, word = below.pop()
+                    if node.is_word and not word.startswith(prefix):
+                        yield word
+                    below.extend((child, word + letter) for letter, child in reversed(node.children.items()))
+                continue
+
+            for letter, child in reversed(node.children.items()):
+                next_row = [row[0] + 1]
+                for i, typed in enumerate(prefix, 1):
+                    distance = min(next_row[i - 1] + 1, row[i] + 1, row[i - 1] + (typed != letter))
+                    if i > 1 and previous_row and typed == word[-1] and prefix[i - 2] == letter:
+                        distance = min(distance, previous_row[i - 2] + 1)  # Two letters swapped
+                    next_row.append(distance)
+                if min(next_row) <= max_distance:
+                    stack.append((child, word + letter, next_row, row))
+
+    def anagrams(self, letters, blanks=0, min_length=1, use_all=False):
+        """
+        Returns the words that can be made from a rack of letters, like the tiles of a word
+        game. The trie is walked depth first while the letters are taken from the rack, so
+        a branch ends as soon as the rack has neither its next letter nor a blank left.
+
+        Args:
+            letters (str): The letters of the rack, without the blanks
+            blanks (int): The number of blanks, each standing for any letter
+            min_length (int): The minimum length of a word
+            use_all (bool): Whether the words must use every tile of the rack
+
+        Returns:
+            list: The words, in trie order
+
+        Example:
+            trie.anagrams("tca") # Returns ["act", "at", "cat", "ta"]
+            trie.anagrams("ca", blanks=1, use_all=True) # Returns ["act", "arc", "cab", ...]
+        """
+        counts = collections.Counter(letters)
+        size = len(letters) + blanks
+        if use_all:
+            min_length = size
+        results = []
+
+        def search_helper(node, word, blanks):
+            if node.is_word and len(word) >= min_length:
+                results.append(word)
+            if len(word) == size:
+                return
+            for letter, child in node.children.items():
+                if counts[letter]:
+                    counts[letter] -= 1
+                    search_helper(child, word + letter, blanks)
+                    counts[letter] += 1
+                elif blanks:
+                    search_helper(child, word + letter, blanks - 1)
+
+        search_helper(self.root, "", blanks)
+        return results
+
+    def match(self, query, max_results=None):
+        """
+        Returns the words matching a PatternQuery. The trie is walked depth first while the
+        pattern is followed letter by letter, so only the branches the pattern, the length
+        limits and the required and forbidden letters allow are visited: "c?t" visits the
+        nodes below "c", and a branch is dropped as soon as the letters left to place
+        cannot fit in the maximum length.
+
+        Args:
+            query (PatternQuery): The query
+            max_results (int): The maximum number of words to return, or None for all
+
+        Returns:
+            list: The matching words, in trie order (reversed if the trie is)
+
+        Example:
+            trie.match(PatternQuery("c?t")) # Returns ["cat", "cot", "cut"]
+        """
+        results = []
+        step, bounds = query.step, query.bounds
+        accept, min_length, max_length = query.accept, query.min_length, query.max_length
+        forbidden = query.forbidden
+
+        stack = [(self.root, "", query.start, query.required)]
+        while stack:
+            node, word, state, missing = stack.pop()
+            if node.is_word and state & accept and not missing and len(word) >= min_length:
+                results.append(word)
+                if max_results is not None and len(results) >= max_results:
+                    break
+
+            depth = len(word) + 1
+            if max_length is not None and depth > max_length:
+                continue
+            children = []
+            for letter, child in node.children.items():
+                if letter in forbidden:
+                    continue
+                next_state = step(state, letter)
+                if not next_state:
+                    continue
+                next_missing = missing.replace(letter, "", 1) if letter in missing else missing
+                # The fewest and most letters the pattern still needs after this one
+                fewest, most = bounds(next_state)
+                if max_length is not None and depth + max(fewest, len(next_missing)) > max_length:
+                    continue
+                if most is not None and len(next_missing) > most:
+                    continue
+                children.append((child, word + letter, next_state, next_missing))
+            # Pushed in reverse, so the words come out in the order of the trie
+            stack.extend(reversed(children))
+        return results
+
+class TrieCursor:
+    """
+    Follows a trie letter by letter as a word is typed
+
+    The cursor keeps the path of nodes for the current text. Seeking a text that shares a
+    prefix with the previous one only pops and pushes the letters that differ, so typing
+    or deleting a letter at the end of the word is a single step instead of a walk from the
+    root. When the text leaves the trie, seek returns None and no search is needed.
+
+    Attributes:
+        trie (Trie): The trie followed
+        text (str): The text the cursor is at
+        path (list): The nodes of the prefixes of `text` that are in the trie, from the root
+
+    Methods:
+        seek: Moves the cursor to a text
+
+    Args:
+        trie (Trie): The trie to follow
+
+    Returns:
+        None
+
+    Example:
+        cursor = TrieCursor(trie)
+        cursor.seek("he")
+        node = cursor.seek("hel") # One step from the node of "he"
+    """
+    def __init__(self, trie):
+        self.trie = trie
+        self.text = ""
+        self.path = [trie.root]
+
+    def seek(self, text):
+        """
+        Moves the cursor to a text
+
+        Args:
+            text (str): The (normalized) text
+
+        Returns:
+            TrieNode or None: The node of the text, or None if no word starts with it
+
+        Example:
+            node = cursor.seek("hel")
+        """
+        common = 0
+        limit = min(len(text), len(self.text), len(self.path) - 1)
+        while common < limit and text[common] == self.text[common]:
+            common += 1
+        del self.path[common + 1:]
+
+        node = self.path[-1]
+        for letter in text[common:]:
+            node = node.children.get(letter)
+            if node is None:
+                break
+            self.path.append(node)
+        self.text = text
+        return self.path[-1] if len(self.path) == len(text) + 1 else None
+
+class PatternQuery:
+    """
+    A word game query: a pattern with wildcards, length limits and required or forbidden letters
+
+    In the pattern, "?" stands for any one letter and "*" for any number of letters (none
+    included); other characters stand for themselves. The pattern is compiled to a small
+    automaton whose states are bit masks of the pattern positions reached, so Trie.match can
+    follow it letter by letter. Steps and length bounds are cached per state, since the same
+    few states come back on every branch of the trie.
+
+    Attributes:
+        pattern (str): The pattern, with runs of "*" collapsed
+        min_length (int): The minimum length of a match
+        max_length (int): The maximum length of a match, or None
+        required (str): Letters a match must contain, sorted; a letter given twice must appear twice
+        forbidden (frozenset): Letters a match must not contain
+        start (int): The state before any letter
+        accept (int): The bit of the state that means the whole pattern matched
+
+    Methods:
+        step: Returns the state after a letter
+        bounds: Returns the fewest and most letters still needed from a state
+        matches: Returns whether a word matches, without a trie
+        regex: Returns the query as a regular expression over the keys joined by newlines
+        reversed: Returns the query for reversed words
+        anchors: Returns the number of letters fixed at the start and at the end of the pattern
+
+    Args:
+        pattern (str): The (normalized) pattern
+        min_length (int): The minimum length of a match, or None
+        max_length (int): The maximum length of a match, or None
+        required (str): Letters a match must contain
+        forbidden (str): Letters a match must not contain
+
+    Returns:
+        None
+
+    Example:
+        query = PatternQuery("*ing", max_length=6, required="s")
+        query.matches("sing") # Returns True
+        trie.match(query) # Returns ["aging", "bring", ..., "sting", "swing"]
+    """
+    def __init__(self, pattern, min_length=None, max_length=None, required="", forbidden=""):
+        self.pattern = re.sub(r"\*+", "*", pattern)
+        tokens = self.pattern
+        size = len(tokens)
+        # The letters still needed after each position, and whether a "*" follows it
+        self._fewest = [sum(token != "*" for token in tokens[i:]) for i in range(size + 1)]
+        self._open = ["*" in tokens[i:] for i in range(size + 1)]
+
+        self.min_length = max(min_length or 0, self._fewest[0], len(required))
+        self.max_length = max_length
+        if not self._open[0]:
+            self.max_length = size if max_length is None else min(max_length, size)
+        self.required = "".join(sorted(required))
+        self.forbidden = frozenset(forbidden)
+        self.accept = 1 << size
+        self.start = self._closure(1)
+        self._steps = {}
+        self._bounds = {}
+
+    def _closure(self, state):
+        # A "*" can match no letters, so reaching it also reaches the position after it
+        for i, token in enumerate(self.pattern):
+            if state >> i & 1 and token == "*":
+                state |= 1 << (i + 1)
+        return state
+
+    def step(self, state, letter):
+        """
+        Returns the state after a letter
+
+        Args:
+            state (int): The state before the letter
+            letter (str): The letter
+
+        Returns:
+            int: The state after the letter, 0 if the pattern cannot match any more
+
+        Example:
+            query.step(query.start, "c")
+        """
+        cache_key = (state, letter)
+        next_state = self._steps.get(cache_key)
+        if next_state is None:
+            next_state = 0
+            for i, token in enumerate(self.pattern):
+                if state >> i & 1:
+                    if token == "*":
+                        next_state |= 1 << i
+                    elif token == "?" or token == letter:
+                        next_state |= 1 << (i + 1)
+            next_state = self._steps[cache_key] = self._closure(next_state)
+        return next_state
+
+    def bounds(self, state):
+        """
+        Returns the fewest and most letters the pattern still needs from a state
+
+        Args:
+            state (int): The state
+
+        Returns:
+            tuple: (fewest letters, most letters or None if a "*" is left)
+
+        Example:
+            query.bounds(query.start) # Returns (3, 3) for "c?t"
+        """
+        bounds = self._bounds.get(state)
+        if bounds is None:
+            positions = [i for i in range(len(self.pattern) + 1) if state >> i & 1]
+            most = None if any(self._open[i] for i in positions) else max(self._fewest[i] for i in positions)
+            bounds = self._bounds[state] = (min(self._fewest[i] for i in positions), most)
+        return bounds
+
+    def matches(self, word):
+        """
+        Returns whether a word matches the query, by checking it letter by letter
+
+        Args:
+            word (str): The (normalized) word
+
+        Returns:
+            bool: True if the word matches
+
+        Example:
+            PatternQuery("c?t").matches("cat") # Returns True
+        """
+        if len(word) < self.min_length or (self.max_length is not None and len(word) > self.max_length):
+            return False
+        if self.forbidden.intersection(word):
+            return False
+        counts = collections.Counter(word)
+        if any(counts[letter] < count for letter, count in collections.Counter(self.required).items()):
+            return False
+        state = self.start
+        for letter in word:
+            state = self.step(state, letter)
+            if not state:
+                return False
+        return bool(state & self.accept)
+
+    def reversed(self):
+        """
+        Returns the same query for reversed words, to run it on a trie of reversed words
+
+        Returns:
+            PatternQuery: The reversed query
+
+        Example:
+            trie_end.match(PatternQuery("*ing").reversed()) # Returns ["gniga", ...], i.e. "aging" reversed
+        """
+        return PatternQuery(self.pattern[::-1], self.min_length, self.max_length,
+                            self.required, "".join(self.forbidden))
+
+    def regex(self):
+        """
+        Returns the query as a regular expression matching whole lines, to scan the keys of a
+        word list joined by newlines (see WordList.get_key_text). A pattern that fixes no
+        letter at either end cannot narrow the trie, and the regular expression engine scans
+        the joined keys much faster than the trie can be walked node by node.
+
+        Returns:
+            re.Pattern: The regular expression, in MULTILINE mode
+
+        Example:
+            PatternQuery("*q*", forbidden="u").regex().findall(word_list.get_key_text())
+        """
+        letter = "[^\\n" + "".join(re.escape(forbidden) for forbidden in sorted(self.forbidden)) + "]"
+        parts = ["^"]
+        most = "" if self.max_length is None else self.max_length
+        parts.append(f"(?={letter}{{{self.min_length},{most}}}$)")
+        for required, count in collections.Counter(self.required).items():
+            parts.append(f"(?=(?:[^\\n{re.escape(required)}]*{re.escape(required)}){{{count}}})")
+        for token in self.pattern:
+            if token == "?":
+                parts.append(letter)
+            elif token == "*":
+                parts.append(letter + "*")
+            else:
+                parts.append("(?!)" if token in self.forbidden else re.escape(token))
+        parts.append("$")
+        return re.compile("".join(parts), re.MULTILINE)
+
+    def anchors(self):
+        """
+        Returns the number of letters fixed at the start and at the end of the pattern. The
+        trie is only narrowed by the letters fixed at the start, so a pattern like "*ing"
+        is better run reversed on the trie of reversed words.
+
+        Returns:
+            tuple: (letters fixed at the start, letters fixed at the end)
+
+        Example:
+            PatternQuery("*ing").anchors() # Returns (0, 3)
+        """
+        def fixed(tokens):
+            count = 0
+            for token in tokens:
+                if token in "?*":
+                    break
+                count += 1
+            return count
+
+        return fixed(self.pattern), fixed(self.pattern[::-1])
+
+BOARD_MIN_LENGTH = 3  # Shortest word counted on a letter board, as in Boggle
+BOARD_PARALLEL_CELLS = 100  # Larger boards are solved by a process pool; a 10x10 board takes ~50 ms in one
+BOARD_TASKS_PER_WORKER = 4  # Start cell groups per worker, so the slow corners even out
+
+def parse_board(text):
+    """
+    Parses a letter board, e.g. "abcd/efgh/ijkl/mnop". Rows are separated by "/" or new
+    lines. Each letter of a row is a cell, unless the cells of the row are separated by
+    spaces, which allows tiles of several letters: "a b qu d".
+
+    Args:
+        text (str): The board
+
+    Returns:
+        list: The rows of the board, each a list of (normalized) tiles
+
+    Raises:
+        ValueError: If the rows do not have the same length
+
+    Example:
+        parse_board("ab/cd") # Returns [["a", "b"], ["c", "d"]]
+    """
+    rows = []
+    for line in re.split(r"[/\n]", text):
+        line = normalize_word(line.strip())
+        if line:
+            rows.append(line.split() if " " in line else list(line))
+    if not rows or any(len(row) != len(rows[0]) for row in rows):
+        raise ValueError(f"The rows of the board {text!r} do not have the same length")
+    return rows
+
+def board_neighbours(rows, cols):
+    # The cells next to each cell, diagonals included, by cell index (row * cols + col)
+    return [[r * cols + c for r in range(max(row - 1, 0), min(row + 2, rows))
+             for c in range(max(col - 1, 0), min(col + 2, cols)) if (r, c) != (row, col)]
+            for row in range(rows) for col in range(cols)]
+
+def solve_board_cells(board, trie, starts, min_length=BOARD_MIN_LENGTH):
+    """
+    Finds the words that can be traced on a letter board from some start cells, moving to
+    any adjacent cell and using each cell at most once. The board is walked depth first
+    alongside the trie, so a path ends as soon as no word starts with its letters.
+
+    Args:
+        board (list): The rows of tiles, see parse_board
+        trie (Trie): The prefix trie of the word list
+        starts (list): The indexes of the start cells (row * columns + column)
+        min_length (int): The minimum length of a word
+
+    Returns:
+        set: The (normalized) words found
+
+    Example:
+        solve_board_cells(parse_board("cat/xxx"), trie, [0]) # Returns {"cat"}
+    """
+    tiles = [tile for row in board for tile in row]
+    neighbours = board_neighbours(len(board), len(board[0]))
+    visited = [False] * len(tiles)
+    found = set()
+
+    def walk(cell, node, word):
+        for letter in tiles[cell]:
+            node = node.children.get(letter)
+            if node is None:
+                return
+        word += tiles[cell]
+        if node.is_word and len(word) >= min_length:
+            found.add(word)
+        if not node.children:
+            return
+        visited[cell] = True
+        for neighbour in neighbours[cell]:
+            if not visited[neighbour]:
+                walk(neighbour, node, word)
+        visited[cell] = False
+
+    for cell in starts:
+        walk(cell, trie.root, "")
+    return found
+
+# The trie searched by board worker processes, see solve_board
+_board_trie = None
+
+def init_board_worker(keys):
+    # Runs in each board worker process that did not inherit the trie (no fork): builds a
+    # trie of the words the board can hold
+    global _board_trie
+    _board_trie = Trie()
+    _board_trie.insert_many(keys)
+
+def solve_board_task(board, starts, min_length):
+    return solve_board_cells(board, _board_trie, starts, min_length)
+
+def solve_board(board, word_list, min_length=BOARD_MIN_LENGTH, workers=None):
+    """
+    Finds all the words of a word list that can be traced on a letter board (Boggle).
+
+    Boards with more than BOARD_PARALLEL_CELLS cells (or any board, when `workers` is
+    given) are solved by a process pool, each worker searching from a group of start
+    cells, and the words found are merged into one set, since the same word is often found
+    from several cells. A machine with one CPU solves every board in this process.
+
+    The workers are forked only from a process running a single thread, such as the
+    command line, and never on macOS, where forking is unsafe: a thread of the app could
+    hold a lock (of the logging queue, say) that stays locked forever in the child.
+    Forked workers start with the trie already built. Its pages are shared until the walk
+    touches them, which copies them, since reading a node writes its reference count.
+    Otherwise the workers are started by a fork server or spawned, and each builds a trie
+    of only the words whose letters are all on the board.
+
+    Args:
+        board (list): The rows of tiles, see parse_board
+        word_list (WordList): The word list
+        min_length (int): The minimum length of a word
+        workers (int): The number of worker processes; None for os.cpu_count() on large
+            boards only, 1 to solve in this process
+
+    Returns:
+        set: The (normalized) words found
+
+    Example:
+        solve_board(parse_board("abcd/efgh/ijkl/mnop"), word_list)
+    """
+    global _board_trie
+    trie_start, _ = word_list.get_trie()
+    cells = len(board) * len(board[0])
+    if workers is None:
+        workers = (os.cpu_count() or 1) if cells > BOARD_PARALLEL_CELLS else 1
+    workers = min(workers or 1, cells)
+    if workers <= 1:
+        return solve_board_cells(board, trie_start, range(cells), min_length)
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    groups = [list(range(cells))[i::workers * BOARD_TASKS_PER_WORKER] for i in range(workers * BOARD_TASKS_PER_WORKER)]
+    methods = multiprocessing.get_all_start_methods()
+    if "fork" in methods and sys.platform != "darwin" and threading.active_count() == 1:
+        _board_trie = trie_start  # Inherited by the forked workers
+        executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"))
+    else:
+        letters = "".join(re.escape(letter) for letter in set("".join(tile for row in board for tile in row)))
+        keys = re.findall(f"^[{letters}]+$", word_list.get_key_text(), re.MULTILINE)
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        executor = ProcessPoolExecutor(workers, mp_context=context, initializer=init_board_worker, initargs=(keys,))
+    try:
+        with executor:
+            found = set()
+            for words in executor.map(solve_board_task, itertools.repeat(board), groups, itertools.repeat(min_length)):
+                found |= words
+            return found
+    finally:
+        _board_trie = None
+
+SUGGESTION_FRAME_MS = 16  # Suggestion updates are applied at most once per frame (~60 Hz)
+
+class SuggestionListModel(QAbstractListModel):
+    """
+    A list model holding the suggestions shown in the autocomplete window
+
+    Successive suggestion lists usually share most of their items (typing one more letter
+    mostly keeps the same words), so a new list is applied as a minimal diff: the common
+    head and tail are kept, changed rows are updated in place and only the difference in
+    length is inserted or removed. The view then only repaints the rows that changed.
+
+    Attributes:
+        suggestions (list): The suggestions currently in the model
+
+    Methods:
+        rowCount: Returns the number of suggestions
+        data: Returns the suggestion at a given index
+        set_suggestions: Replaces the suggestions, applying only the differences
+
+    Args:
+        parent (QObject): The parent object of this model
 
-        search_helper(self.root, "")
-        return suggestions
+    Returns:
+        None
+
+    Example:
+        model = SuggestionListModel()
+        list_view.setModel(model)
+        model.set_suggestions(["hello", "help"])
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.suggestions = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.suggestions)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid() and index.row() < len(self.suggestions):
+            return self.suggestions[index.row()]
+        return None
+
+    def set_suggestions(self, suggestions):
+        """
+        Replaces the suggestions in the model, applying only the differences with the current ones
+
+        Args:
+            suggestions (list): The new suggestions
+
+        Returns:
+            None
+
+        Example:
+            model.set_suggestions(["hello", "help"])
+        """
+        old = self.suggestions
+        new = list(suggestions)
+        if old == new:
+            return
+
+        # Length of the common head and of the common tail (not overlapping the head)
+        head = 0
+        limit = min(len(old), len(new))
+        while head < limit and old[head] == new[head]:
+            head += 1
+        tail = 0
+        while tail < limit - head and old[-1 - tail] == new[-1 - tail]:
+            tail += 1
+
+        old_end = len(old) - tail
+        new_end = len(new) - tail
+        changed = min(old_end, new_end) - head
+
+        # Rows present in both lists are updated in place
+        if changed > 0:
+            old[head:head + changed] = new[head:head + changed]
+            self.dataChanged.emit(self.index(head), self.index(head + changed - 1), [Qt.DisplayRole])
+
+        start = head + max(changed, 0)
+        if old_end > new_end:
+            self.beginRemoveRows(QModelIndex(), start, old_end - 1)
+            del old[start:old_end]
+            self.endRemoveRows()
+        elif new_end > old_end:
+            self.beginInsertRows(QModelIndex(), start, new_end - 1)
+            old[start:start] = new[start:new_end]
+            self.endInsertRows()
 
 class AutocompleteWindow(QMainWindow):
     """
     A window that displays autocomplete suggestions
 
+    Suggestions can be posted from any thread (the keyboard hook runs on its own thread).
+    They are handed to the GUI thread through a queued signal and applied at most once per
+    frame by a coalescing timer, so fast typing only shows the latest suggestions and never
+    waits for the list to repaint.
+
     Attributes:
-        list_widget (QListWidget): The list widget that displays the suggestions
+        list_view (QListView): The list view that displays the suggestions
+        model (SuggestionListModel): The model holding the suggestions
 
     Methods:
-        update_suggestions: Updates the suggestions in the list widget
+        update_suggestions: Posts new suggestions to be shown in the list view
+        clear_suggestions: Posts an empty list of suggestions
         mousePressEvent: Hides the window when the user clicks outside of it
         open_settings: Opens the settings dialog
 
@@ -532,16 +2469,30 @@ class AutocompleteWindow(QMainWindow):
         autocomplete_window.show()
     """
 
+    suggestions_posted = pyqtSignal()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.setWindowTitle("Autocomplete Suggestions")
-        self.list_widget = QListWidget(self)
-        self.setCentralWidget(self.list_widget)
+        self.model = SuggestionListModel(self)
+        self.list_view = QListView(self)
+        self.list_view.setModel(self.model)
+        self.list_view.setUniformItemSizes(True)  # Lets the view skip measuring every row
+        self.setCentralWidget(self.list_view)
         self.setWindowFlags(Qt.WindowStaysOnTopHint)
 
+        self._pending_suggestions = None
+        self._pending_lock = threading.Lock()
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(SUGGESTION_FRAME_MS)
+        self._flush_timer.timeout.connect(self._flush_suggestions)
+        self.suggestions_posted.connect(self._schedule_flush, Qt.QueuedConnection)
+
     def update_suggestions(self, suggestions):
         """
-        Updates the suggestions in the list widget
+        Posts new suggestions to be shown in the list view. Safe to call from any thread;
+        only the latest suggestions posted within a frame are shown.
         
         Args:
             suggestions (list): The list of suggestions to display
@@ -558,10 +2509,24 @@ class AutocompleteWindow(QMainWindow):
         Example:
             autocomplete_window.update_suggestions(["hello", "world"])
         """
-
-        self.list_widget.clear()
-        for suggestion in suggestions:
-            self.list_widget.addItem(suggestion)
+        with self._pending_lock:
+            already_posted = self._pending_suggestions is not None
+            self._pending_suggestions = list(suggestions)
+        if not already_posted:
+            self.suggestions_posted.emit()
+
+    def clear_suggestions(self):
+        self.update_suggestions([])
+
+    def _schedule_flush(self):
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush_suggestions(self):
+        with self._pending_lock:
+            suggestions, self._pending_suggestions = self._pending_suggestions, None
+        if suggestions is not None:
+            self.model.set_suggestions(suggestions)
     
     def mousePressEvent(self, event):
         """
@@ -586,7 +2551,9 @@ class AutocompleteWindow(QMainWindow):
         global suggestion_list_active, current_word
         suggestion_list_active = False
         current_word = ""
-        self.list_widget.clear()
+        # The click may have moved the caret anywhere
+        word_list_manager.word_buffer.reset(trusted=False)
+        self.clear_suggestions()
 
     def open_settings(self):
         """
@@ -628,8 +2595,15 @@ class SettingsDialog(QDialog):
         auto_complete_checkbox (QCheckBox): The checkbox for enabling/disabling auto complete
         autocomplete_key_combobox (QComboBox): The combobox for selecting the autocomplete key
         word_list_combobox (QComboBox): The combobox for selecting the word list
+        suggestion_limit_spinbox (QSpinBox): The number of suggestions shown
+        stage_spinboxes (dict): The spinboxes for the number of words and the time budget of
+            each suggestion pipeline stage, by stage name
+        profile_seconds_spinbox (QSpinBox): The length of a profiling window
+        profile_button (QPushButton): Starts or stops profiling
 
     Methods:
+        toggle_profiling: Starts or stops a profiling window
+        update_profile_button: Shows whether a profiling window is open
         save_and_close: Saves the settings and closes the dialog
 
     Args:
@@ -669,12 +2643,73 @@ class SettingsDialog(QDialog):
         self.word_list_combobox.addItems(["Unnoticable", "Risky", "BestList", "Suspicious", "Obvious", "Custom"])
         self.word_list_combobox.setCurrentText(self.word_list_manager.current_word_list.name)
         layout.addWidget(self.word_list_combobox)
+
+        # The suggestion pipeline: how many words each stage adds and how long it may take
+        stages_layout = QGridLayout()
+        stages_layout.addWidget(QLabel("Suggestions shown"), 0, 0)
+        self.suggestion_limit_spinbox = QSpinBox()
+        self.suggestion_limit_spinbox.setRange(1, 50)
+        self.suggestion_limit_spinbox.setValue(self.settings.suggestion_limit)
+        stages_layout.addWidget(self.suggestion_limit_spinbox, 0, 1)
+        stages_layout.addWidget(QLabel("Stage"), 1, 0)
+        stages_layout.addWidget(QLabel("Words (0 = off)"), 1, 1)
+        stages_layout.addWidget(QLabel("Time budget (µs)"), 1, 2)
+        self.stage_spinboxes = {}
+        for row, stage in enumerate(self.settings.suggestion_stages, start=2):
+            k_spinbox = QSpinBox()
+            k_spinbox.setRange(0, 50)
+            k_spinbox.setValue(stage.k)
+            budget_spinbox = QSpinBox()
+            budget_spinbox.setRange(100, 1_000_000)
+            budget_spinbox.setSingleStep(100)
+            budget_spinbox.setValue(stage.budget_us)
+            stages_layout.addWidget(QLabel(stage.name.capitalize()), row, 0)
+            stages_layout.addWidget(k_spinbox, row, 1)
+            stages_layout.addWidget(budget_spinbox, row, 2)
+            self.stage_spinboxes[stage.name] = (k_spinbox, budget_spinbox)
+        layout.addLayout(stages_layout)
+
+        # Profiling: records where the time and memory go for a while, see HotPathProfiler
+        profile_layout = QHBoxLayout()
+        profile_layout.addWidget(QLabel("Profile for"))
+        self.profile_seconds_spinbox = QSpinBox()
+        self.profile_seconds_spinbox.setRange(5, 3600)
+        self.profile_seconds_spinbox.setSuffix(" s")
+        self.profile_seconds_spinbox.setValue(self.settings.profile_seconds)
+        profile_layout.addWidget(self.profile_seconds_spinbox)
+        self.profile_button = QPushButton()
+        self.profile_button.clicked.connect(self.toggle_profiling)
+        profile_layout.addWidget(self.profile_button)
+        self.update_profile_button()
+        layout.addLayout(profile_layout)
+
         button = QPushButton("Close")
         button.clicked.connect(self.save_and_close)
         layout.addWidget(button)
 
         self.setLayout(layout)
 
+    def toggle_profiling(self):
+        """
+        Starts a profiling window of the chosen length, or stops the current one and writes
+        its reports next to the log
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        Example:
+            self.profile_button.clicked.connect(self.toggle_profiling)
+        """
+        self.settings.profile_seconds = self.profile_seconds_spinbox.value()
+        profiler.toggle(self.settings.profile_seconds)
+        self.update_profile_button()
+
+    def update_profile_button(self):
+        self.profile_button.setText("Stop and write the profile" if profiler.active else "Start profiling")
+
     def save_and_close(self):
         """
         Saves the settings and closes the dialog
@@ -687,7 +2722,7 @@ class SettingsDialog(QDialog):
 
         Calls:
              word_list_manager.get_word_list(selected_word_list_name)
-             selected_word_list.get_trie()
+             selected_word_list.get_trie(), in a background thread
 
         Called by:
             self.__init__
@@ -701,32 +2736,935 @@ class SettingsDialog(QDialog):
         self.settings.auto_correct_enabled = self.auto_correct_checkbox.isChecked()
         self.settings.auto_complete_enabled = self.auto_complete_checkbox.isChecked()
         self.settings.autocomplete_key = self.autocomplete_key_combobox.currentText()
+        self.settings.suggestion_limit = self.suggestion_limit_spinbox.value()
+        self.settings.profile_seconds = self.profile_seconds_spinbox.value()
+        self.settings.suggestion_stages = [SuggestionStage(name, k_spinbox.value(), budget_spinbox.value())
+                                           for name, (k_spinbox, budget_spinbox) in self.stage_spinboxes.items()]
         
         selected_word_list_name = self.word_list_combobox.currentText()
         selected_word_list = self.word_list_manager.get_word_list(selected_word_list_name)
         self.word_list_manager.current_word_list = selected_word_list
         if selected_word_list is None:
-            logger.info(f"Word list with name {selected_word_list_name} not found.")
+            logger.info("Word list with name %s not found.", selected_word_list_name)
             return  # Return early if the word list is not found
 
-        global trie_start, trie_end
-        trie_start, trie_end = selected_word_list.get_trie()
-        logger.debug(f"Settings saved: auto_correct_enabled={self.settings.auto_correct_enabled}, auto_complete_enabled={self.settings.auto_complete_enabled}, word_list_name={self.word_list_combobox.currentText()}")
+        # The tries of the list are built on first use, which takes seconds on a large list:
+        # they are built in the background so the dialog closes at once
+        threading.Thread(target=selected_word_list.get_trie, name=f"tries {selected_word_list.name}",
+                         daemon=True).start()
+        logger.debug("Settings saved: auto_correct_enabled=%s, auto_complete_enabled=%s, word_list_name=%s",
+                     self.settings.auto_correct_enabled, self.settings.auto_complete_enabled,
+                     self.word_list_combobox.currentText())
 
         self.close()
 
+WORD_LIST_CHUNK_SIZE = 1 << 20  # Bytes read from a word list file at a time
+# Word list files this large are parsed in worker processes; None to always parse them in
+# this process. Off by default: on a 14 MB list the pool measured 2.33 s against 2.47 s
+# serial, and on one core it adds 0.4 s (of 4.9 s) sending the parsed chunks back
+PARALLEL_LOAD_THRESHOLD = None
+SORT_RUN_SIZE = 1_000_000  # Words kept in memory before a sorted run is spilled to disk
+
+def iter_word_file_chunks(file_path, chunk_size=WORD_LIST_CHUNK_SIZE):
+    """
+    Reads a word list file in large binary chunks. Every chunk ends on a line break, so no
+    word is split between two chunks.
+
+    Args:
+        file_path (str): The path of the word list file
+        chunk_size (int): The number of bytes to read at a time
+
+    Returns:
+        generator: The chunks (bytes)
+
+    Example:
+        for chunk in iter_word_file_chunks("BestList.txt"):
+            words = parse_word_chunk(chunk)
+    """
+    with open(file_path, "rb") as f:
+        remainder = b""
+        while block := f.read(chunk_size):
+            block = remainder + block
+            cut = block.rfind(b"\n") + 1
+            if cut == 0:
+                remainder = block
+                continue
+            remainder = block[cut:]
+            yield block[:cut]
+        if remainder:
+            yield remainder
+
+def parse_word_chunk(chunk, strip_accents=False, index=0):
+    """
+    Decodes, normalizes, validates and sorts the words in a chunk of a word list file, one
+    word per line. Runs in a worker process for large files, so it must stay a module level
+    function.
+
+    Each entry is "key<TAB>position<TAB>spelling": the normalized key of the word, where the
+    word is in the file (the chunk index and line, in fixed width hex) and its spelling,
+    empty when the word is written exactly as its key. The tab sorts before any letter, so
+    entries stay ordered by key, and the entries of a key by position: the first spelling
+    of a word in the file comes first.
+
+    Args:
+        chunk (bytes): A chunk of the file ending on a line break
+        strip_accents (bool): Whether to remove accents while normalizing
+        index (int): The index of the chunk in the file
+
+    Returns:
+        list: The entries of the valid words in the chunk, sorted, one per key
+
+    Example:
+        parse_word_chunk(b"cat\nDog\n3rd\nice cream\n")
+        # Returns ["cat\t00000000000000\t", "dog\t00000000000001\tDog"]
+    """
+    entries = {}
+    for line, word in enumerate(chunk.decode("utf-8", errors="replace").splitlines()):
+        word = word.strip()
+        key = normalize_word(word, strip_accents)
+        # The key is checked, not the word, as in index_words: a decomposed accent is not a
+        # letter until it is composed
+        if key.isalpha() and key not in entries:
+            entries[key] = f"{key}\t{index:08x}{line:06x}\t{'' if key == word else word}"
+    return sorted(entries.values())
+
+def iter_sorted_runs(file_path, parallel, strip_accents=False, chunk_size=WORD_LIST_CHUNK_SIZE):
+    """
+    Parses the chunks of a word list file into sorted runs, in file order. When `parallel` is
+    True the chunks are parsed by a process pool, with at most two chunks per worker in
+    flight.
+
+    Args:
+        file_path (str): The path of the word list file
+        parallel (bool): Whether to parse the chunks in worker processes
+        strip_accents (bool): Whether to remove accents while normalizing
+        chunk_size (int): The number of bytes parsed at a time, see iter_word_file_chunks
+
+    Returns:
+        generator: The sorted runs (lists of entries, see parse_word_chunk)
+
+    Example:
+        for run in iter_sorted_runs("BestList.txt", parallel=False):
+            print(len(run))
+    """
+    chunks = iter_word_file_chunks(file_path, chunk_size)
+    if not parallel:
+        for index, chunk in enumerate(chunks):
+            yield parse_word_chunk(chunk, strip_accents, index)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    workers = os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for index, chunk in enumerate(chunks):
+            pending.append(executor.submit(parse_word_chunk, chunk, strip_accents, index))
+            if len(pending) >= workers * 2:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+def merge_sorted_runs(runs, run_size=SORT_RUN_SIZE):
+    """
+    Merges sorted runs into one sorted stream without duplicates (an external merge sort).
+    Runs are collected in memory until `run_size` words are held, then merged and spilled to
+    a temporary file. The spilled files are merged lazily at the end.
+
+    Args:
+        runs (iterable): The sorted runs (lists of words)
+        run_size (int): The number of words to hold in memory before spilling
+
+    Returns:
+        generator: The words in sorted order
+
+    Example:
+        list(merge_sorted_runs([["b", "c"], ["a", "c"]])) # Returns ["a", "b", "c"]
+    """
+    with tempfile.TemporaryDirectory(prefix="wordsolver-") as spill_dir:
+        spilled = []
+        in_memory = []
+        held = 0
+        for run in runs:
+            in_memory.append(run)
+            held += len(run)
+            if held >= run_size:
+                spill_path = os.path.join(spill_dir, f"run{len(spilled)}.txt")
+                # Timsort merges already sorted runs in linear time, and does it in C
+                merged = sorted(itertools.chain.from_iterable(in_memory))
+                with open(spill_path, "w", encoding="utf-8") as f:
+                    f.write("\n".join(merged))
+                    f.write("\n")
+                spilled.append(spill_path)
+                in_memory = []
+                held = 0
+
+        with contextlib.ExitStack() as stack:
+            streams = [(line[:-1] for line in stack.enter_context(open(path, encoding="utf-8")))
+                       for path in spilled]
+            streams.append(sorted(itertools.chain.from_iterable(in_memory)))
+            previous = None
+            for word in heapq.merge(*streams) if len(streams) > 1 else streams[0]:
+                if word != previous:
+                    yield word
+                    previous = word
+
+def read_word_file(file_path, strip_accents=False):
+    """
+    Streams the valid words of a word list file as normalized (key, spelling) pairs, sorted
+    by key and with one pair per key, spelled as the first time the word is in the file.
+    The spelling is "" when the word is written exactly as its key. Files of at least
+    PARALLEL_LOAD_THRESHOLD bytes, if set, are parsed in parallel. The sort spills to disk
+    past SORT_RUN_SIZE words, but the index built from the pairs (see load_word_list)
+    still holds every key in memory.
+
+    Args:
+        file_path (str): The path of the word list file
+        strip_accents (bool): Whether to remove accents while normalizing
+
+    Returns:
+        generator: The (key, spelling) pairs in sorted order
+
+    Raises:
+        OSError: If the file cannot be opened or read
+
+    Example:
+        keys = [key for key, spelling in read_word_file("BestList.txt")]
+    """
+    parallel = (PARALLEL_LOAD_THRESHOLD is not None and os.path.getsize(file_path) >= PARALLEL_LOAD_THRESHOLD
+                and (os.cpu_count() or 1) > 1)
+    previous = None
+    for entry in merge_sorted_runs(iter_sorted_runs(file_path, parallel, strip_accents)):
+        key, _, spelling = entry.partition("\t")
+        spelling = spelling.partition("\t")[2]
+        if key != previous:
+            yield key, spelling
+            previous = key
+
+LEARNING_FILENAME = "learning.bin"  # Accepted completions and corrections, per word list
+LEARNING_HALF_LIFE_DAYS = 30  # A word accepted a month ago counts half as much as one accepted today
+LEARNING_ACCEPT_WEIGHT = 1.0  # Added when a completion is accepted
+LEARNING_CORRECTION_WEIGHT = 0.5  # Added when a word is auto-corrected to
+LEARNING_FLUSH_SECONDS = 30  # How often learned weights are written to disk
+LEARNING_MAX_COMPLETIONS = 5  # Learned words added to the candidates of a prefix
+
+class LearningStore:
+    """
+    Learns which words the user picks, per word list, to rank suggestions
+
+    Every accepted completion and correction adds to the weight of the word. Weights decay
+    exponentially with a half-life of LEARNING_HALF_LIFE_DAYS, so the ranking follows how the
+    user types now. A weight is stored as (score, time of the last update) and decayed when
+    it is read or updated, so nothing has to be decayed in the background.
+
+    Updates are put on a queue and applied by a background thread, which also writes the
+    weights to disk every LEARNING_FLUSH_SECONDS, so learning never adds work to the
+    keystroke path. Until the thread is started, updates are applied directly.
+
+    The file is a compact binary format: for every word list its name and number of words,
+    then per word its UTF-8 key, its score (float32) and its update time (uint32 seconds).
+
+    Attributes:
+        path (str): The file the weights are stored in, or None to keep them in memory
+        tables (dict): Per word list name, the (score, update time) of each key
+
+    Methods:
+        load: Reads the weights from the file
+        save: Writes the weights to the file
+        start: Starts the background thread
+        stop: Applies the pending updates, writes the weights and stops the thread
+        record: Adds weight to a word
+        weight: Returns the decayed weight of a word
+        complete: Returns the learned words starting with a prefix
+
+    Args:
+        path (str): The file the weights are stored in, or None to keep them in memory
+
+    Returns:
+        None
+
+    Example:
+        store = LearningStore("learning.bin")
+        store.load()
+        store.start()
+        store.record("BestList", "hello", LEARNING_ACCEPT_WEIGHT)
+    """
+    MAGIC = b"WSLS"
+    VERSION = 1
+    HEADER = struct.Struct("<4sII")  # magic, version, number of word lists
+    LIST_HEADER = struct.Struct("<HI")  # name length, number of words
+    ENTRY = struct.Struct("<BfI")  # key length, score, update time
+
+    def __init__(self, path=None):
+        self.path = path
+        self.tables = {}
+        self._sorted_keys = {}  # Per word list name, the sorted keys, for prefix lookups
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._dirty = False
+        self._decay_rate = math.log(2) / (LEARNING_HALF_LIFE_DAYS * 86400)
+
+    def load(self):
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            magic, version, list_count = self.HEADER.unpack_from(data)
+            if magic != self.MAGIC or version != self.VERSION:
+                raise ValueError("unknown format")
+            position = self.HEADER.size
+            for _ in range(list_count):
+                name_size, word_count = self.LIST_HEADER.unpack_from(data, position)
+                position += self.LIST_HEADER.size
+                name = data[position:position + name_size].decode("utf-8")
+                position += name_size
+                table = self.tables.setdefault(name, {})
+                for _ in range(word_count):
+                    key_size, score, stamp = self.ENTRY.unpack_from(data, position)
+                    position += self.ENTRY.size
+                    table[data[position:position + key_size].decode("utf-8")] = (score, stamp)
+                    position += key_size
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, struct.error) as e:
+            logger.error("Could not read the learned weights from %s: %s", self.path, e)
+        else:
+            logger.info("Loaded learned weights of %d words.", sum(len(table) for table in self.tables.values()))
+        finally:
+            # Also after a partial read, so complete finds the words read before the error
+            for name, table in self.tables.items():
+                self._sorted_keys[name] = sorted(table)
+
+    def save(self):
+        if self.path is None:
+            return
+        parts = [self.HEADER.pack(self.MAGIC, self.VERSION, len(self.tables))]
+        for name, table in list(self.tables.items()):
+            # A key length is one byte; longer keys (no real word is) are not stored, as
+            # cutting them could split a character
+            entries = [(key.encode("utf-8"), value) for key, value in list(table.items())]
+            entries = [(key_bytes, value) for key_bytes, value in entries if len(key_bytes) <= 255]
+            name_bytes = name.encode("utf-8")
+            parts.append(self.LIST_HEADER.pack(len(name_bytes), len(entries)))
+            parts.append(name_bytes)
+            for key_bytes, (score, stamp) in entries:
+                parts.append(self.ENTRY.pack(len(key_bytes), score, int(stamp)))
+                parts.append(key_bytes)
+        try:
+            with open(f"{self.path}.tmp", "wb") as f:
+                f.write(b"".join(parts))
+            os.replace(f"{self.path}.tmp", self.path)
+        except OSError as e:
+            logger.error("Could not write the learned weights to %s: %s", self.path, e)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="learning", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        elif self._dirty:
+            self.save()
+            self._dirty = False
+
+    def record(self, list_name, key, weight):
+        """
+        Adds weight to a word of a word list. Returns immediately when the background thread runs.
+
+        Args:
+            list_name (str): The name of the word list
+            key (str): The normalized word
+            weight (float): The weight to add, LEARNING_ACCEPT_WEIGHT or LEARNING_CORRECTION_WEIGHT
+
+        Returns:
+            None
+
+        Example:
+            store.record("BestList", "hello", LEARNING_ACCEPT_WEIGHT)
+        """
+        update = (list_name, key, weight, time.time())
+        if self._thread is not None:
+            self._queue.put(update)
+        else:
+            self._apply(update)
+
+    def weight(self, list_name, key, now=None):
+        table = self.tables.get(list_name)
+        entry = table.get(key) if table else None
+        if entry is None:
+            return 0.0
+        score, stamp = entry
+        return score * math.exp(-self._decay_rate * max(0.0, (now or time.time()) - stamp))
+
+    def complete(self, list_name, prefix, k=LEARNING_MAX_COMPLETIONS):
+        """
+        Returns the learned words of a word list that start with a prefix, highest weight first
+
+        Args:
+            list_name (str): The name of the word list
+            prefix (str): The normalized prefix
+            k (int): The maximum number of words to return
+
+        Returns:
+            list: The learned keys
+
+        Example:
+            store.complete("BestList", "hel") # Returns ["hello"]
+        """
+        keys = self._sorted_keys.get(list_name)
+        if not keys:
+            return []
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + "\U0010ffff", start)
+        now = time.time()
+        return heapq.nlargest(k, keys[start:end], key=lambda key: self.weight(list_name, key, now))
+
+    def _apply(self, update):
+        list_name, key, weight, now = update
+        table = self.tables.setdefault(list_name, {})
+        is_new = key not in table
+        table[key] = (self.weight(list_name, key, now) + weight, now)
+        if is_new:
+            # Replaced as a whole, so a reader on another thread never sees a half sorted list
+            self._sorted_keys[list_name] = sorted(table)
+        self._dirty = True
+
+    def _run(self):
+        next_flush = time.monotonic() + LEARNING_FLUSH_SECONDS
+        while True:
+            try:
+                update = self._queue.get(timeout=max(0.0, next_flush - time.monotonic()))
+            except queue.Empty:
+                update = ()
+            if update:
+                self._apply(update)
+            if update is None or time.monotonic() >= next_flush:
+                if self._dirty:
+                    self._dirty = False
+                    self.save()
+                next_flush = time.monotonic() + LEARNING_FLUSH_SECONDS
+            if update is None:
+                return
+
+def load_word_lists(manager):
+    """
+    Loads the DEFAULT_WORD_LISTS into a word list manager
+
+    Args:
+        manager (WordListManager): The word list manager
+
+    Returns:
+        None
+
+    Example:
+        load_word_lists(word_list_manager)
+    """
+    for name, filename in DEFAULT_WORD_LISTS:
+        manager.load_word_list(name=name, filename=filename)
+
+def file_stamp(file_path):
+    """
+    Returns the size and modification time of a file, used to tell whether it changed
+
+    Args:
+        file_path (str): The path of the file
+
+    Returns:
+        tuple: (size in bytes, modification time in nanoseconds)
+
+    Raises:
+        OSError: If the file cannot be accessed
+
+    Example:
+        file_stamp("BestList.txt") # Returns (3583249, 1703030400000000000)
+    """
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+NGRAM_CORPUS_FILENAME = "corpus.txt"  # Local text the next word predictions are learned from
+NGRAM_MODEL_FILENAME = "ngram_model.bin"  # The compiled n-gram table
+NGRAM_TOP_K = 8  # Next words kept per context
+NGRAM_MIN_COUNT = 2  # Words and contexts seen fewer times are dropped
+NGRAM_MAX_VOCAB = 65_536  # Most frequent words kept in the vocabulary
+NGRAM_MAX_CONTEXTS = 250_000  # Most frequent contexts kept; bounds the table to a few MB
+NGRAM_BACKOFF_PENALTY = 21  # Quantized score added per back-off step (about -log2(0.4) * 16)
+NGRAM_TOKEN_PATTERN = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*|[.!?]")
+
+class NGramModel:
+    """
+    A compact next word prediction model, keyed by the previous one or two words
+
+    The table is built from a local text corpus. Every context (the previous word, or the
+    previous two words) keeps its NGRAM_TOP_K most likely next words, each with a log
+    probability quantized to one byte. The table is stored as flat arrays (sorted context
+    keys, offsets, next word ids and scores) that are memory mapped from the model file, so
+    loading is instant and a lookup is a binary search.
+
+    Contexts are packed into one 64 bit key: (id of the word before + 1) << 32 | (id of the
+    previous word + 1). Single word contexts have 0 in the high half, and key 0 holds the
+    most frequent words, used when nothing better is known.
+
+    Attributes:
+        vocab (list): The words, by id
+        word_ids (dict): The id of each word
+        keys (memoryview): The sorted context keys
+        offsets (memoryview): The start of each context's entries; one more than there are keys
+        next_ids (memoryview): The next word ids, best first within each context
+        scores (memoryview): The quantized scores (-log2(probability) * 16, lower is better)
+
+    Methods:
+        build: Builds a model from a corpus file
+        save: Writes the model to a file
+        load: Memory maps a model file
+        predict: Returns the most likely next words
+        memory_bytes: Returns the size of the table
+
+    Args:
+        vocab (list): The words, by id
+        keys, offsets, next_ids, scores: The table arrays (see Attributes)
+
+    Returns:
+        None
+
+    Example:
+        model = NGramModel.build("corpus.txt")
+        model.predict(["thank"]) # Returns ["you", ...]
+    """
+    MAGIC = b"WSNG"
+    VERSION = 1
+    HEADER = struct.Struct("<4sIIII")  # magic, version, vocab bytes, contexts, entries
+
+    def __init__(self, vocab, keys, offsets, next_ids, scores, mapping=None):
+        self.vocab = vocab
+        self.word_ids = {word: i for i, word in enumerate(vocab)}
+        self.keys = keys
+        self.offsets = offsets
+        self.next_ids = next_ids
+        self.scores = scores
+        self._mapping = mapping  # Keeps the memory map open while the model is used
+
+    @staticmethod
+    def tokenize(lines):
+        """
+        Splits text into sentences of normalized words. Numbers and symbols end nothing but
+        are skipped; ".", "!" and "?" end a sentence, so contexts never span sentences.
+
+        Args:
+            lines (iterable): The lines of text
+
+        Returns:
+            generator: The sentences (lists of words)
+
+        Example:
+            list(NGramModel.tokenize(["Hi there. Bye"])) # Returns [["hi", "there"], ["bye"]]
+        """
+        sentence = []
+        for line in lines:
+            for token in NGRAM_TOKEN_PATTERN.findall(line):
+                if token in ".!?":
+                    if sentence:
+                        yield sentence
+                    sentence = []
+                else:
+                    sentence.append(normalize_word(token))
+        if sentence:
+            yield sentence
+
+    @classmethod
+    def build(cls, corpus_path, top_k=NGRAM_TOP_K, min_count=NGRAM_MIN_COUNT,
+              max_vocab=NGRAM_MAX_VOCAB, max_contexts=NGRAM_MAX_CONTEXTS):
+        """
+        Builds a model from a corpus file. The corpus is read twice: once to pick the
+        vocabulary and once to count which word follows each context.
+
+        Args:
+            corpus_path (str): The path of the corpus, a UTF-8 text file
+            top_k (int): The number of next words kept per context
+            min_count (int): Words and contexts seen fewer times are dropped
+            max_vocab (int): The number of most frequent words kept
+            max_contexts (int): The number of most frequent contexts kept
+
+        Returns:
+            NGramModel: The model
+
+        Raises:
+            OSError: If the corpus cannot be read
+
+        Example:
+            model = NGramModel.build("corpus.txt")
+        """
+        def sentences():
+            with open(corpus_path, encoding="utf-8", errors="replace") as f:
+                yield from cls.tokenize(f)
+
+        unigrams = collections.Counter()
+        for sentence in sentences():
+            unigrams.update(sentence)
+        vocab = [word for word, count in unigrams.most_common(max_vocab) if count >= min_count]
+        word_ids = {word: i for i, word in enumerate(vocab)}
+
+        followers = collections.defaultdict(collections.Counter)
+        for sentence in sentences():
+            ids = [word_ids.get(word, -1) for word in sentence]
+            for i in range(1, len(ids)):
+                next_id = ids[i]
+                if next_id < 0 or ids[i - 1] < 0:
+                    continue
+                followers[ids[i - 1] + 1][next_id] += 1
+                if i >= 2 and ids[i - 2] >= 0:
+                    followers[(ids[i - 2] + 1) << 32 | (ids[i - 1] + 1)][next_id] += 1
+
+        # Keep the most frequent contexts, then the best next words of each
+        totals = {key: sum(counter.values()) for key, counter in followers.items()}
+        kept = [key for key in heapq.nlargest(max_contexts, totals, key=totals.get) if totals[key] >= min_count]
+        followers[0] = collections.Counter({i: unigrams[word] for i, word in enumerate(vocab[:top_k])})
+        totals[0] = sum(unigrams.values())
+        kept.append(0)
+
+        keys = array.array("Q", sorted(kept))
+        offsets = array.array("I", [0])
+        next_ids = array.array("I")
+        scores = array.array("B")
+        for key in keys:
+            total = totals[key]
+            for next_id, count in followers[key].most_common(top_k):
+                next_ids.append(next_id)
+                scores.append(min(255, round(-math.log2(count / total) * 16)))
+            offsets.append(len(next_ids))
+
+        logger.info("Built n-gram model from %s: %d words, %d contexts, %d entries.",
+                    corpus_path, len(vocab), len(keys), len(next_ids))
+        return cls(vocab, memoryview(keys), memoryview(offsets), memoryview(next_ids), memoryview(scores))
+
+    def save(self, path):
+        """
+        Writes the model to a file. Every array starts on an 8 byte boundary so the file can
+        be memory mapped. The arrays are written in the byte order of this machine.
+
+        Args:
+            path (str): The path of the model file
+
+        Returns:
+            None
+
+        Raises:
+            OSError: If the file cannot be written
+
+        Example:
+            model.save("ngram_model.bin")
+        """
+        vocab_bytes = "\n".join(self.vocab).encode("utf-8")
+        sections = [vocab_bytes, self.keys, self.offsets, self.next_ids, self.scores]
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, len(vocab_bytes), len(self.keys), len(self.next_ids)))
+            for section in sections:
+                f.write(b"\0" * (-f.tell() % 8))
+                f.write(section)
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory maps a model file written by save. The table arrays are views on the mapping,
+        so only the pages that lookups touch are read from disk.
+
+        Args:
+            path (str): The path of the model file
+
+        Returns:
+            NGramModel: The model
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If the file is not a model file of this version
+
+        Example:
+            model = NGramModel.load("ngram_model.bin")
+        """
+        import mmap
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, vocab_size, n_contexts, n_entries = cls.HEADER.unpack_from(mapping)
+        if magic != cls.MAGIC or version != cls.VERSION:
+            mapping.close()
+            raise ValueError(f"{path} is not a version {cls.VERSION} n-gram model")
+
+        view = memoryview(mapping)
+        position = cls.HEADER.size
+
+        def section(size, fmt=None):
+            nonlocal position
+            position += -position % 8
+            data = view[position:position + size]
+            position += size
+            return data.cast(fmt) if fmt else data
+
+        vocab_bytes = section(vocab_size)
+        vocab = bytes(vocab_bytes).decode("utf-8").split("\n") if vocab_size else []
+        keys = section(n_contexts * 8, "Q")
+        offsets = section((n_contexts + 1) * 4, "I")
+        next_ids = section(n_entries * 4, "I")
+        scores = section(n_entries, "B")
+        return cls(vocab, keys, offsets, next_ids, scores, mapping)
+
+    def _context(self, key):
+        i = bisect.bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return range(0)
+        return range(self.offsets[i], self.offsets[i + 1])
+
+    def predict(self, previous_words, k=NGRAM_TOP_K, prefix=""):
+        """
+        Returns the most likely next words after the previous words. The two word context is
+        looked up first, then the one word context and then the most frequent words, each
+        back-off step costing NGRAM_BACKOFF_PENALTY.
+
+        Args:
+            previous_words (list): The words typed before, oldest first; only the last two are used
+            k (int): The maximum number of words to return
+            prefix (str): Only return words starting with this (normalized) prefix
+
+        Returns:
+            list: The predicted words, most likely first
+
+        Example:
+            model.predict(["thank"]) # Returns ["you", ...]
+        """
+        ids = [self.word_ids.get(normalize_word(word), -1) for word in previous_words[-2:]]
+        contexts = []
+        if len(ids) == 2 and min(ids) >= 0:
+            contexts.append((ids[0] + 1) << 32 | (ids[1] + 1))
+        if ids and ids[-1] >= 0:
+            contexts.append(ids[-1] + 1)
+        contexts.append(0)
+
+        best = {}
+        for penalty, key in enumerate(contexts):
+            for i in self._context(key):
+                next_id = self.next_ids[i]
+                score = self.scores[i] + penalty * NGRAM_BACKOFF_PENALTY
+                if score < best.get(next_id, 1 << 16):
+                    best[next_id] = score
+        words = (self.vocab[next_id] for next_id in sorted(best, key=best.get))
+        return [word for word in words if word.startswith(prefix)][:k]
+
+    def memory_bytes(self):
+        return sum(view.nbytes for view in (self.keys, self.offsets, self.next_ids, self.scores))
+
+def load_ngram_model(corpus_path=None, model_path=None):
+    """
+    Loads the n-gram model, building it first from the corpus when the model file is missing
+    or older than the corpus.
+
+    Args:
+        corpus_path (str): The path of the corpus, NGRAM_CORPUS_FILENAME in the script directory by default
+        model_path (str): The path of the model file, NGRAM_MODEL_FILENAME in the script directory by default
+
+    Returns:
+        NGramModel or None: The model, or None if there is neither a corpus nor a model file
+
+    Example:
+        word_list_manager.ngram_model = load_ngram_model()
+    """
+    corpus_path = corpus_path or os.path.join(script_dir, NGRAM_CORPUS_FILENAME)
+    model_path = model_path or os.path.join(script_dir, NGRAM_MODEL_FILENAME)
+    try:
+        if os.path.exists(corpus_path) and (not os.path.exists(model_path)
+                                            or os.path.getmtime(model_path) < os.path.getmtime(corpus_path)):
+            NGramModel.build(corpus_path).save(model_path)
+        return NGramModel.load(model_path)
+    except FileNotFoundError:
+        logger.info("No n-gram model or corpus found, next word prediction is off.")
+    except (OSError, ValueError) as e:
+        logger.error("Could not load the n-gram model: %s", e)
+    return None
+
+class WordBuffer:
+    """
+    A model of the word being typed, kept in sync with the keystrokes
+
+    The buffer holds the text of the word and the position of the caret in it, and applies
+    every key the way a text field would: letters are inserted at the caret, backspace and
+    delete remove the letter before or after it, the arrow keys move it and ctrl+backspace
+    deletes back to the start of the word. Space, enter and tab end the word.
+
+    Some keys make the word unknowable: moving the caret out of the word, home/end, paste,
+    undo, selecting with shift, switching windows. The buffer is then marked untrusted. An
+    untrusted word is never completed or replaced (that is how short words like "i" used to
+    replace whole words); the buffer becomes trusted again at the next word break.
+
+    Attributes:
+        text (str): The text of the word
+        caret (int): The position of the caret in the text
+        trusted (bool): Whether the text is known to be the whole word
+        modifiers (set): The modifier keys held down ("ctrl", "alt", "shift", "windows")
+
+    Methods:
+        key_down: Applies a key press
+        key_up: Applies a key release
+        reset: Starts a new word
+        can_replace: Returns whether the word may be completed or replaced
+
+    Args:
+        None
+
+    Returns:
+        None
+
+    Example:
+        buffer = WordBuffer()
+        buffer.key_down("h")
+        buffer.key_down("i")
+        buffer.key_down("left")
+        buffer.text, buffer.caret # Returns ("hi", 1)
+    """
+    # What a key did to the word, returned by key_down
+    UNCHANGED = "unchanged"
+    EDITED = "edited"  # The text changed
+    MOVED = "moved"  # Only the caret moved
+    BREAK = "break"  # The word ended
+    RESET = "reset"  # The word can no longer be known
+
+    BREAK_KEYS = {"space", "enter", "tab"}
+    # Keys that move the caret somewhere the buffer cannot follow
+    NAVIGATION_KEYS = {"home", "end", "up", "down", "page up", "page down"}
+    # Ctrl shortcuts that change the text in ways the buffer cannot follow
+    CTRL_RESET_KEYS = {"v", "x", "z", "y", "a", "left", "right", "home", "end", "up", "down"}
+    MODIFIER_NAMES = {
+        "ctrl": "ctrl", "left ctrl": "ctrl", "right ctrl": "ctrl",
+        "alt": "alt", "left alt": "alt", "right alt": "alt", "alt gr": "alt",
+        "shift": "shift", "left shift": "shift", "right shift": "shift",
+        "windows": "windows", "left windows": "windows", "right windows": "windows",
+    }
+
+    def __init__(self):
+        self.text = ""
+        self.caret = 0
+        self.trusted = True
+        self.modifiers = set()
+
+    def reset(self, trusted=True):
+        self.text = ""
+        self.caret = 0
+        self.trusted = trusted
+
+    def can_replace(self):
+        # The word is only replaced with ctrl+backspace from the end of the word
+        return self.trusted and bool(self.text) and self.caret == len(self.text)
+
+    def key_up(self, name):
+        if modifier := self.MODIFIER_NAMES.get(name):
+            self.modifiers.discard(modifier)
+
+    def key_down(self, name):
+        """
+        Applies a key press to the word
+
+        Args:
+            name (str): The name of the key, as reported by the keyboard module
+
+        Returns:
+            str: What the key did, one of UNCHANGED, EDITED, MOVED, BREAK or RESET
+
+        Example:
+            buffer.key_down("backspace") # Returns WordBuffer.EDITED
+        """
+        if modifier := self.MODIFIER_NAMES.get(name):
+            self.modifiers.add(modifier)
+            return self.UNCHANGED
+
+        if "alt" in self.modifiers or "windows" in self.modifiers:
+            return self._untrust()  # Menus, window switching and shortcuts
+        if "ctrl" in self.modifiers:
+            return self._ctrl_key_down(name)
+
+        if name in self.BREAK_KEYS:
+            self.reset()
+            return self.BREAK
+        if len(name) == 1:
+            self.text = self.text[:self.caret] + name + self.text[self.caret:]
+            self.caret += 1
+            return self.EDITED
+        if "shift" in self.modifiers and (name in self.NAVIGATION_KEYS or name in ("left", "right", "insert")):
+            return self._untrust()  # Selecting text, or shift+insert pasting
+        if name == "backspace":
+            if self.caret == 0:
+                return self._untrust()  # Deleting into the previous word
+            self.text = self.text[:self.caret - 1] + self.text[self.caret:]
+            self.caret -= 1
+            return self.EDITED
+        if name == "delete":
+            if self.caret == len(self.text):
+                return self._untrust()  # Joining the text after the word
+            self.text = self.text[:self.caret] + self.text[self.caret + 1:]
+            return self.EDITED
+        if name == "left":
+            if self.caret == 0:
+                return self._untrust()
+            self.caret -= 1
+            return self.MOVED
+        if name == "right":
+            if self.caret == len(self.text):
+                return self._untrust()
+            self.caret += 1
+            return self.MOVED
+        if name in self.NAVIGATION_KEYS:
+            return self._untrust()
+        return self.UNCHANGED
+
+    def _ctrl_key_down(self, name):
+        if name == "backspace":
+            if self.caret == 0:
+                return self._untrust()
+            # Deletes back to the start of the word
+            self.text = self.text[self.caret:]
+            self.caret = 0
+            return self.EDITED
+        if name == "delete":
+            if self.caret == len(self.text):
+                return self._untrust()
+            self.text = self.text[:self.caret]
+            return self.EDITED
+        if name in self.CTRL_RESET_KEYS:
+            return self._untrust()
+        return self.UNCHANGED  # Shortcuts like ctrl+c or ctrl+s leave the text alone
+
+    def _untrust(self):
+        self.reset(trusted=False)
+        return self.RESET
+
 class WordListManager:
     """
     Represents a WordListManager class that manages word lists. It provides functionality to load word lists from files and store them in a dictionary.
 
     Attributes:
         word_lists (dict): A dictionary to hold all the word lists.
+        strip_accents (bool): Whether the word lists are indexed without accents.
+        ngram_model (NGramModel): The next word prediction model, or None.
+        learning_store (LearningStore): The weights learned from accepted suggestions.
+        previous_words (deque): The last two words typed in the current sentence.
+        word_buffer (WordBuffer): The word being typed, kept in sync with the keystrokes.
+        trie_cursor (TrieCursor): Follows the word being typed in the prefix trie of the current list.
 
     Methods:
         load_word_list(name, filename)
+        refresh_word_lists()
+        start_watching(interval)
         get_word_list(name)
         validate_word_lists()
-        get_suggestions(current_word)
+        get_suggestions(current_word, settings)
+        run_pipeline(word_list, key, stages, limit, settings)
+        iter_stage(name, word_list, key, k, settings)
+        is_known(word)
+        find_words(pattern, ...)
+        find_anagrams(rack, ...)
+        find_board_words(board, ...)
+        record_accepted(word, weight)
+        predict_next_words(settings)
         process_key(e, settings)
 
     Args:
@@ -740,29 +3678,111 @@ class WordListManager:
         manager = WordListManager()
         word_list = manager.load_word_list("English", "english_words.txt")
         if word_list:
-            logger.info(f"Word list '{word_list.name}' loaded successfully!")
+            logger.info("Word list '%s' loaded successfully!", word_list.name)
         else:
             logger.info("Failed to load word list.")
     """
 
-    def __init__(self):
+    def __init__(self, strip_accents=False, learning_store=None):
         self.word_lists = {}  # A dictionary to hold all the word lists
+        self.learning_store = learning_store or LearningStore()  # Learned weights of accepted words
+        self.strip_accents = strip_accents  # Applied to the index and to the queries
         self.current_word_list = None  # The current word list
-        self.suggestions_cache = self.load_cache()
+        self.suggestions_cache = collections.OrderedDict()  # Stage results, least recently used first
+        self.ngram_model = None  # The next word prediction model, see load_ngram_model()
+        self.previous_words = collections.deque(maxlen=2)  # The last words typed in this sentence
+        self.word_buffer = WordBuffer()  # The word being typed, and the caret in it
+        self.trie_cursor = None  # Follows the word being typed in the prefix trie
+        self.snapshot = {}  # Indexed word lists restored from the snapshot file, by name
+        self.snapshot_stale = False  # Whether a word list was indexed from its file
+        self.cache_tags = {}  # The version tag of each word list in suggestions_cache
+
+    def load_snapshot(self, path=None):
+        """
+        Loads the snapshot of indexed word lists written by save_snapshot. load_word_list
+        restores a list from it instead of parsing the file when the file has not changed.
+        A missing, unreadable or outdated snapshot is ignored.
+
+        The snapshot is written with marshal: it only holds lists, dicts and strings, loads
+        much faster than parsing the word lists and, unlike pickle, cannot run code.
+
+        Args:
+            path (str): The path of the snapshot file, SNAPSHOT_FILENAME in the script directory by default
+
+        Returns:
+            None
 
-    def load_cache(self):
-        # Load cache from file if exists
+        Example:
+            manager.load_snapshot()
+        """
+        path = path or os.path.join(script_dir, SNAPSHOT_FILENAME)
         try:
-            with open('suggestions_cache.json', 'r') as file:
-                return json.load(file)
+            # marshal.load reads a file object in small pieces; loading from bytes is ~10x faster
+            with open(path, "rb") as f:
+                snapshot = marshal.loads(f.read())
         except FileNotFoundError:
-            return {}
+            return
+        except (OSError, EOFError, ValueError, TypeError) as e:
+            logger.warning("Ignoring unreadable snapshot %s: %s", path, e)
+            return
+
+        if not isinstance(snapshot, dict) or snapshot.get("version") != (SNAPSHOT_VERSION, sys.version_info[:2]):
+            logger.info("Ignoring snapshot %s written by another version.", path)
+            return
+        # The word lists refer to words by their id in the pool, so the snapshot's pool is
+        # only usable if no other words were pooled yet
+        if not word_pool.restore(*snapshot["pool"]):
+            logger.info("Ignoring snapshot %s, words were loaded before it.", path)
+            return
+        self.snapshot = snapshot["lists"]
+        logger.info("Loaded snapshot of %d word lists from %s.", len(self.snapshot), path)
+
+    def save_snapshot(self, path=None):
+        """
+        Writes the indexed word lists to a snapshot file, so the next startup can skip parsing them.
+
+        Args:
+            path (str): The path of the snapshot file, SNAPSHOT_FILENAME in the script directory by default
+
+        Returns:
+            None
+
+        Example:
+            if manager.snapshot_stale:
+                manager.save_snapshot()
+        """
+        path = path or os.path.join(script_dir, SNAPSHOT_FILENAME)
+        lists = {}
+        for name, word_list in self.word_lists.items():
+            # The snapshot only holds the index, so the delta is merged into it first; a list
+            # still being compacted, or not read from its file, is parsed again next time
+            if word_list.delta:
+                word_list.compact()
+            if word_list.delta or word_list.stamp is None:
+                continue
+            with contextlib.suppress(OSError):
+                lists[name] = {
+                    "file": word_list.get_file(),
+                    "stamp": word_list.stamp,
+                    "strip_accents": word_list.strip_accents,
+                    "ids": word_list.ids.tobytes(),
+                    "tables": word_list.get_tables(),
+                    "surface_forms": word_list.surface_forms,
+                    "surface_case": word_list.surface_case,
+                }
+        try:
+            # Written to a temporary file first, so a crash never leaves a truncated snapshot
+            with open(f"{path}.tmp", "wb") as f:
+                f.write(marshal.dumps({"version": (SNAPSHOT_VERSION, sys.version_info[:2]),
+                                       "pool": word_pool.dump(), "lists": lists}))
+            os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            logger.error("Could not write snapshot %s: %s", path, e)
+            return
+        self.snapshot = lists
+        self.snapshot_stale = False
+        logger.info("Saved snapshot of %d word lists to %s.", len(lists), path)
 
-    def save_cache(self):
-        # Save cache to file
-        with open('suggestions_cache.json', 'w') as file:
-            json.dump(self.suggestions_cache, file)
-    
     def get_word_list(self, name):
         """
         Returns the word list with the given name
@@ -778,6 +3798,7 @@ class WordListManager:
         """
         return self.word_lists.get(name)
     
+    @profiled
     def load_word_list(self, name, filename):
         """
         Loads the words from a file and creates a WordList object to store the words and associated trie. 
@@ -791,10 +3812,8 @@ class WordListManager:
             WordList or None: The loaded WordList object if the file is found, None otherwise.
 
         Calls:
-            WordList.set_words(words)
-            WordList.set_trie((trie_start, trie_end))
-            Trie.insert(word, reverse=False)
-            Trie.insert(word, reverse=True)
+            read_word_file(file_path, strip_accents)
+            WordList.set_index(keys, surfaces)
 
         Called by:
             SettingsDialog.save_and_close()
@@ -804,113 +3823,561 @@ class WordListManager:
             word_list = manager.load_word_list("English", "english_words.txt")
         """
         # Load the words from the file
-        logger.debug(f"Loading words from {filename}...")
+        logger.debug("Loading words from %s...", filename)
 
-        words = []
-        trie_start = Trie()
-        trie_end = Trie()
+        keys = []
+        surfaces = {}
         file_path = os.path.join(script_dir, filename)
         try:
-            with open(file_path, "r") as f:
-                if f.readable():
-                    for word in f:
-                        word = word.strip()
-                        if not word.isalpha():  # Ensurglogg glogg e the word only contains letters
-                            #logger.info(f"Invalid word found: {word}")
-                            continue
-                        words.append(word)
-                        trie_start.insert(word)
-                        trie_end.insert(word, reverse=True)
-                else:
-                    logger.info(f"File {filename} is not readable.")
-                    return None
+            stamp = file_stamp(file_path)
+            if snapshot := self.get_snapshot(name, filename, file_path):
+                word_list = WordList(name, filename, self.strip_accents)
+                word_list.stamp = stamp
+                word_list.set_surface_forms(snapshot["surface_forms"], snapshot["surface_case"])
+                word_list.set_ids(array.array("I", snapshot["ids"]), snapshot["tables"])
+                logger.info("Restored %d words of %s from the snapshot.", len(word_list.ids), filename)
+                self.word_lists[name] = word_list
+                self.current_word_list = word_list
+                return word_list
+
+            for key, spelling in read_word_file(file_path, self.strip_accents):
+                keys.append(key)
+                if spelling:
+                    surfaces[key] = spelling
         except FileNotFoundError:
-            logger.error(f"File {filename} not found.")
+            logger.error("File %s not found.", filename)
             return None
         except PermissionError:
-            logger.error(f"Permission denied when accessing {filename}.")
+            logger.error("Permission denied when accessing %s.", filename)
             return None
         except IOError as e:
-            logger.error(f"An I/O error occurred when reading {filename}: {str(e)}")
+            logger.error("An I/O error occurred when reading %s: %s", filename, e)
             return None
 
         # Create a WordList object and store it
-        logger.info(f"Loaded {len(words)} words from {filename}.")
-        word_list = WordList(name, filename)
-        word_list.set_words(words)
-        word_list.set_trie((trie_start, trie_end))
+        logger.info("Loaded %d words from %s.", len(keys), filename)
+        word_list = WordList(name, filename, self.strip_accents)
+        word_list.stamp = stamp
+        word_list.set_index(keys, surfaces)
+        self.snapshot_stale = True
         self.word_lists[name] = word_list
-        logger.info(f"Word list '{word_list.name}' loaded successfully!")
+        logger.info("Word list '%s' loaded successfully!", word_list.name)
         self.current_word_list = word_list
         return word_list
 
-    @lru_cache(maxsize=100000)
-    def get_suggestions(self, current_word):
-        logger.debug(f"Generating suggestions for word: {current_word}, word list: {self.current_word_list.name}")
-        if cached_suggestions := self.suggestions_cache.get(current_word):
-            return cached_suggestions
+    def refresh_word_lists(self):
+        """
+        Reads the word list files changed since they were read, e.g. edited in another
+        program or by the CustomWordListEditor, and applies the changes. A few changed words
+        go into the delta of the list, like an edit; a file that changed a lot is indexed
+        again. Queries keep running on the current index meanwhile.
+
+        Args:
+            None
+
+        Returns:
+            list: The names of the word lists that changed
+
+        Example:
+            manager.refresh_word_lists() # Returns ["Custom"]
+        """
+        changed = []
+        for name, word_list in list(self.word_lists.items()):
+            try:
+                stamp = file_stamp(word_list.get_dir())
+                if stamp == word_list.stamp:
+                    continue
+                entries = {key: spelling or key for key, spelling in
+                           read_word_file(word_list.get_dir(), self.strip_accents)}
+            except OSError as e:
+                logger.debug("Could not refresh word list %s: %s", name, e)
+                continue
+            current = set(word_list.get_all_keys())
+            added = entries.keys() - current
+            removed = current - entries.keys()
+            if len(added) + len(removed) <= DELTA_COMPACT_SIZE:
+                word_list.update_words(add=[entries[key] for key in added], remove=removed)
+            else:
+                word_list.set_index(sorted(entries), {key: spelling for key, spelling in entries.items()
+                                                      if spelling != key})
+            word_list.stamp = stamp
+            self.snapshot_stale = True
+            if added or removed:
+                logger.info("Word list %s changed on disk: %d words added, %d deleted.", name, len(added), len(removed))
+                changed.append(name)
+        return changed
+
+    def start_watching(self, interval=WATCH_SECONDS):
+        """
+        Starts a background thread checking the word list files for changes every `interval`
+        seconds, see refresh_word_lists
+
+        Args:
+            interval (float): The seconds between two checks
+
+        Returns:
+            threading.Thread: The thread
+
+        Example:
+            manager.start_watching()
+        """
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh_word_lists()
+                except Exception:
+                    logger.exception("Refreshing the word lists failed.")
+        thread = threading.Thread(target=watch, name="word list watcher", daemon=True)
+        thread.start()
+        return thread
+
+    def get_snapshot(self, name, filename, file_path):
+        """
+        Returns the snapshot of a word list if it is still valid: same file, unchanged since
+        the snapshot was written and indexed with the same options.
+
+        Args:
+            name (str): The name of the word list
+            filename (str): The filename of the word list
+            file_path (str): The path of the word list file
+
+        Returns:
+            dict or None: The snapshot of the word list, or None if there is no valid snapshot
+
+        Raises:
+            OSError: If the word list file cannot be accessed
+
+        Example:
+            snapshot = manager.get_snapshot("BestList", "BestList.txt", file_path)
+        """
+        snapshot = self.snapshot.get(name)
+        stamp = file_stamp(file_path)
+        if (snapshot and snapshot["file"] == filename and tuple(snapshot["stamp"]) == stamp
+                and snapshot["strip_accents"] == self.strip_accents):
+            return snapshot
+        return None
+
+    @profiled
+    def get_suggestions(self, current_word, settings=None):
+        """
+        Returns the suggestions for the word being typed, in the current word list. The
+        candidates come from the stages of the suggestion pipeline (see run_pipeline), and
+        are ranked by learned weight, then by whether they match what was typed (fuzzy
+        matches last), then by length.
+
+        Args:
+            current_word (str): The word being typed
+            settings (Settings): The settings with the pipeline stages, or None for the defaults
+
+        Returns:
+            list: The suggestions, spelled as in the word list file
 
+        Example:
+            manager.get_suggestions("hel") # Returns ["hello", "help", ...]
+        """
+        keystroke_logger.debug("Generating suggestions for word: %s, word list: %s", current_word, self.current_word_list.name)
         selected_word_list = self.word_lists.get(self.current_word_list.name)
         if selected_word_list is None:
-            logger.error(f"Word list with name {self.current_word_list.name} not found.")
+            logger.error("Word list with name %s not found.", self.current_word_list.name)
             return []
 
-        trie_start, trie_end = selected_word_list.get_trie()
+        # The tries hold normalized keys, so the typed word is normalized the same way and
+        # the keys found are mapped back to the spelling used in the word list file
+        key = selected_word_list.normalize(current_word)
+        stages = settings.suggestion_stages if settings else DEFAULT_SUGGESTION_STAGES
+        limit = settings.suggestion_limit if settings else SUGGESTION_LIMIT
+        candidates = self.run_pipeline(selected_word_list, key, stages, limit, settings)
+
+        # Learned weights change as the user types, so they are applied on every call
+        # instead of being cached with the candidates
+        store = self.learning_store
+        now = time.time()
+        suggestions = sorted(candidates, key=lambda word: (-store.weight(selected_word_list.name, word, now),
+                                                           candidates[word] == "fuzzy", len(word)))
+        suggestions = [selected_word_list.get_surface(word) for word in suggestions]
+
+        keystroke_logger.debug("Suggestions generated: %s", suggestions)
+        return suggestions
 
-        suggestions_start = trie_start.search(current_word, max_suggestions=5)
-        suggestions_end = trie_end.search(current_word, reverse=True, max_suggestions=3)
+    def run_pipeline(self, word_list, key, stages, limit, settings=None):
+        """
+        Runs the stages of the suggestion pipeline in order. Each stage adds at most `k` new
+        candidates, and is stopped when it runs out of its time budget; the pipeline stops
+        as soon as `limit` candidates are found, so the later stages only run when the
+        earlier ones did not find enough. Candidates are deduplicated by key.
 
-        suggestions_containing = []  # Example: logic to find words containing the current word
+        The words a stage finds for a key only depend on the word list, so they are cached
+        per word list version, stage and key, unless the stage ran out of time; the learned
+        and ngram stages depend on what was typed before and are never cached. When the
+        version of a list changes, its older entries are dropped, and once the cache holds
+        SUGGESTION_CACHE_SIZE entries, the least recently used one is dropped for each new one.
 
-        suggestions = suggestions_start[:]
-        for word in suggestions_end:
-            reversed_word = word[::-1]
-            if reversed_word not in suggestions_start:
-                suggestions.append(reversed_word)
-        for word in suggestions_containing:
-            if word not in suggestions_start and word not in suggestions_end:
-                suggestions.append(word)
+        Args:
+            word_list (WordList): The word list
+            key (str): The normalized word being typed
+            stages (list): The SuggestionStage to run, in order
+            limit (int): The number of candidates wanted
+            settings (Settings): The settings, for the ngram stage, or None
 
-        logger.debug(f"Suggestions generated: {suggestions}")
-        suggestions.sort(key=len)
-        # Store suggestions in cache
-        self.suggestions_cache[current_word] = suggestions
+        Returns:
+            dict: The candidate keys, in the order found, each with the name of its stage
 
-        return suggestions
+        Example:
+            manager.run_pipeline(word_list, "hel", DEFAULT_SUGGESTION_STAGES, 10)
+            # Returns {"hel": "prefix", "held": "prefix", ..., "hell": "fuzzy"}
+        """
+        candidates = {}
+        tag = word_list.get_version_tag()
+        if self.cache_tags.get(word_list.name) != tag:
+            # The words of the list changed: the cached candidates of older versions are dropped
+            self.cache_tags[word_list.name] = tag
+            prefix = f"{word_list.name}\0"
+            current = f"{prefix}{tag}\0"
+            for cache_key in [cache_key for cache_key in self.suggestions_cache
+                              if cache_key.startswith(prefix) and not cache_key.startswith(current)]:
+                del self.suggestions_cache[cache_key]
+        for stage in stages:
+            if len(candidates) >= limit:
+                break
+            if stage.k <= 0:
+                continue
+            cacheable = stage.name not in ("learned", "ngram")
+            cache_key = f"{word_list.name}\0{tag}\0{stage.name}\0{stage.k}\0{key}"
+            words = self.suggestions_cache.get(cache_key) if cacheable else None
+            if words is not None:
+                self.suggestions_cache.move_to_end(cache_key)
+            else:
+                words = []
+                seen = set()
+                deadline = time.perf_counter_ns() + stage.budget_us * 1000
+                timed_out = False
+                for word in self.iter_stage(stage.name, word_list, key, stage.k, settings):
+                    if word is not None and word not in seen:
+                        seen.add(word)
+                        words.append(word)
+                        if len(words) >= stage.k:
+                            break
+                    if time.perf_counter_ns() > deadline:
+                        timed_out = True
+                        keystroke_logger.debug("Suggestion stage %s ran out of time for %s after %d words",
+                                               stage.name, key, len(words))
+                        break
+                if cacheable and not timed_out:
+                    self.suggestions_cache[cache_key] = words
+                    if len(self.suggestions_cache) > SUGGESTION_CACHE_SIZE:
+                        self.suggestions_cache.popitem(last=False)
+
+            for word in words:
+                if word not in candidates:
+                    candidates[word] = stage.name
+                    if len(candidates) >= limit:
+                        break
+        return candidates
+
+    def iter_stage(self, name, word_list, key, k, settings=None):
+        """
+        Returns the candidates of one stage of the suggestion pipeline, as a generator that
+        may also yield None while it searches (see Trie.search_fuzzy)
+
+        Args:
+            name (str): The name of the stage, one of SUGGESTION_STAGE_NAMES
+            word_list (WordList): The word list
+            key (str): The normalized word being typed
+            k (int): The number of candidates wanted
+            settings (Settings): The settings, or None
+
+        Returns:
+            iterator: The candidate keys
+
+        Example:
+            next(manager.iter_stage("prefix", word_list, "hel", 5)) # Returns "hel"
+        """
+        if name == "learned":
+            return (word for word in self.learning_store.complete(word_list.name, key)
+                    if word_list.contains_key(word))
+        if name in ("prefix", "suffix"):
+            # The index is asked for as many more words as were deleted from its results,
+            # and the words added since are merged in, in the order of the index
+            suffix = name == "suffix"
+            matches = str.endswith if suffix else str.startswith
+            base_k = k + sum(1 for word in word_list.delta.deleted if matches(word, key))
+            order = (lambda word: word[::-1]) if suffix else str
+            # The first letters typed are a single lookup in the hot tables, without the trie
+            base = word_list.hot_completions(key, base_k, suffix)
+            if suffix:
+                search = lambda trie_start, trie_end: [word[::-1] for word in trie_end.search(key, True, base_k)]
+                return word_list.query(search, base, order)
+            if base is None:
+                # Typing or deleting a letter moves the cursor by one node instead of walking
+                # the whole prefix again, and a prefix no word starts with skips the search
+                trie_start, _ = word_list.get_trie()
+                if self.trie_cursor is None or self.trie_cursor.trie is not trie_start:
+                    self.trie_cursor = TrieCursor(trie_start)
+                node = self.trie_cursor.seek(key)
+                base = trie_start.collect(node, key, max_suggestions=base_k) if node else []
+            return word_list.query(lambda trie_start, _: trie_start.search(key, max_suggestions=base_k), base, order)
+        if name == "containing":
+            return self.iter_containing(word_list, key)
+        if name == "fuzzy":
+            if len(key) < FUZZY_MIN_LENGTH:
+                return iter(())
+            return word_list.query(lambda trie_start, _: trie_start.search_fuzzy(key))
+        if name == "ngram":
+            if self.ngram_model is None or (settings is not None and not settings.next_word_prediction_enabled):
+                return iter(())
+            return iter(self.ngram_model.predict(list(self.previous_words), k, prefix=key))
+        raise ValueError(f"Unknown suggestion stage {name!r}")
+
+    def iter_containing(self, word_list, key):
+        # The words with the key in the middle: the words starting or ending with it are
+        # found by the prefix and suffix stages
+        text = word_list.get_key_text()
+        delta = word_list.delta
+        position = text.find(key)
+        while position >= 0:
+            start = text.rfind("\n", 0, position) + 1
+            end = text.find("\n", position)
+            end = len(text) if end < 0 else end
+            word = text[start:end]
+            if not word.startswith(key) and not word.endswith(key) and word not in delta.deleted:
+                yield word
+            position = text.find(key, end)
+        for word in sorted(delta.added):
+            if key in word and not word.startswith(key) and not word.endswith(key):
+                yield word
+
+    def is_known(self, word):
+        """
+        Returns whether a word is in the current word list, in constant time
+
+        Args:
+            word (str): The word, as typed
+
+        Returns:
+            bool: True if the current word list contains the word
+
+        Example:
+            manager.is_known("Hello") # Returns True
+        """
+        word_list = self.current_word_list
+        return word_list is not None and word_list.contains(word)
+
+    def find_words(self, pattern, min_length=None, max_length=None, required="", forbidden="",
+                   max_results=None, word_list=None):
+        """
+        Returns the words of a word list matching a pattern, e.g. "c?t" or "*ing". See
+        PatternQuery for the pattern syntax. A pattern with more letters fixed at its end
+        than at its start runs reversed on the trie of reversed words, so "*ing" only walks
+        the words ending in "ing". A pattern that fixes no letter at either end and has no
+        maximum length, like "*q*", cannot narrow the trie and is run as a regular
+        expression over all the keys instead.
+
+        Args:
+            pattern (str): The pattern
+            min_length (int): The minimum length of a word, or None
+            max_length (int): The maximum length of a word, or None
+            required (str): Letters the words must contain
+            forbidden (str): Letters the words must not contain
+            max_results (int): The maximum number of words to return, or None for all
+            word_list (WordList): The word list to search, the current one if None
+
+        Returns:
+            list: The matching words, spelled as in the word list file, sorted
+
+        Example:
+            manager.find_words("c?t") # Returns ["cat", "cot", "cut"]
+            manager.find_words("*", min_length=5, max_length=5, required="qz")
+        """
+        word_list = word_list or self.current_word_list
+        if word_list is None:
+            return []
+        query = PatternQuery(word_list.normalize(pattern), min_length, max_length,
+                             word_list.normalize(required), word_list.normalize(forbidden))
+        fixed_start, fixed_end = query.anchors()
+        # The index is asked for as many more words as were deleted since it was built
+        limit = None if max_results is None else max_results + len(word_list.delta.deleted)
+        base = None
+        order = str  # The order the index finds the words in, so the added words merge into it
+        if not fixed_start and not fixed_end and query.max_length is None:
+            base = itertools.islice(query.regex().finditer(word_list.get_key_text()), limit)
+            base = [match.group() for match in base]
+            search = lambda trie_start, _: trie_start.match(query, limit)
+        elif fixed_end > fixed_start:
+            search = lambda _, trie_end: [key[::-1] for key in trie_end.match(query.reversed(), limit)]
+            order = lambda key: key[::-1]
+        else:
+            search = lambda trie_start, _: trie_start.match(query, limit)
+        keys = list(itertools.islice(word_list.query(search, base, order), max_results))
+        logger.debug("%d words match %r in %s", len(keys), pattern, word_list.name)
+        return sorted(word_list.get_surface(key) for key in keys)
+
+    def find_anagrams(self, rack, min_length=2, use_all=False, word_list=None):
+        """
+        Returns the words of a word list that can be made from a rack of letters, longest
+        first. A "?" or "_" in the rack is a blank tile standing for any letter.
+
+        Args:
+            rack (str): The letters of the rack, e.g. "retains?"
+            min_length (int): The minimum length of a word
+            use_all (bool): Whether the words must use every tile of the rack (anagrams)
+            word_list (WordList): The word list to search, the current one if None
+
+        Returns:
+            list: The words, spelled as in the word list file, longest first, then sorted
+
+        Example:
+            manager.find_anagrams("tca") # Returns ["act", "cat", "at", "ta"]
+            manager.find_anagrams("retains", use_all=True) # Returns ["anestri", "nastier", ...]
+        """
+        word_list = word_list or self.current_word_list
+        if word_list is None:
+            return []
+        letters = word_list.normalize("".join(letter for letter in rack if letter not in RACK_BLANKS))
+        blanks = sum(letter in RACK_BLANKS for letter in rack)
+        keys = list(word_list.query(lambda trie_start, _: trie_start.anagrams(letters, blanks, min_length, use_all)))
+        logger.debug("%d words can be made from %r in %s", len(keys), rack, word_list.name)
+        keys.sort(key=lambda key: (-len(key), key))
+        return [word_list.get_surface(key) for key in keys]
+
+    def find_board_words(self, board, min_length=BOARD_MIN_LENGTH, workers=None, word_list=None):
+        """
+        Returns the words of a word list that can be traced on a letter board, longest first.
+        See solve_board.
+
+        Args:
+            board (str): The board, e.g. "abcd/efgh/ijkl/mnop", see parse_board
+            min_length (int): The minimum length of a word
+            workers (int): The number of worker processes for large boards, or None
+            word_list (WordList): The word list to search, the current one if None
+
+        Returns:
+            list: The words, spelled as in the word list file, longest first, then sorted
+
+        Raises:
+            ValueError: If the rows of the board do not have the same length
+
+        Example:
+            manager.find_board_words("abcd/efgh/ijkl/mnop")
+        """
+        word_list = word_list or self.current_word_list
+        if word_list is None:
+            return []
+        board = parse_board(board)
+        cells = range(len(board) * len(board[0]))
+        # The words added since the index was built are searched here, on their small trie
+        keys = word_list.query(lambda trie_start, _: solve_board_cells(board, trie_start, cells, min_length),
+                               solve_board(board, word_list, min_length, workers))
+        keys = sorted(set(keys), key=lambda key: (-len(key), key))
+        return [word_list.get_surface(key) for key in keys]
+
+    def record_accepted(self, word, weight=LEARNING_ACCEPT_WEIGHT):
+        """
+        Records that the user accepted a word, so it ranks higher in the current word list
+
+        Args:
+            word (str): The accepted word
+            weight (float): LEARNING_ACCEPT_WEIGHT for a completion, LEARNING_CORRECTION_WEIGHT for a correction
+
+        Returns:
+            None
 
+        Example:
+            word_list_manager.record_accepted("hello")
+        """
+        word_list = self.current_word_list
+        if word_list is not None:
+            self.learning_store.record(word_list.name, word_list.normalize(word), weight)
+
+    def predict_next_words(self, settings):
+        """
+        Returns the most likely next words after the words typed before
+
+        Args:
+            settings (Settings): The settings of the application
+
+        Returns:
+            list: The predicted words, or an empty list if prediction is off or there is no model
+
+        Example:
+            autocomplete_window.update_suggestions(manager.predict_next_words(settings))
+        """
+        model = self.ngram_model
+        if model is None or not settings.next_word_prediction_enabled:
+            return []
+        predictions = model.predict(list(self.previous_words))
+        keystroke_logger.debug("Next word predictions after %s: %s", list(self.previous_words), predictions)
+        return predictions
+
+    @profiled
     def process_key(self, e, settings):
+        """
+        Handles a keyboard event: updates the word buffer, completes or corrects the word and
+        updates the suggestions.
+
+        Args:
+            e (KeyboardEvent): The keyboard event
+            settings (Settings): The settings of the application
+
+        Returns:
+            None
+
+        Example:
+            keyboard.hook(lambda e: word_list_manager.process_key(e, settings))
+        """
         global current_word, autocomplete_window, program_enabled
 
         # If the program is disabled, return immediately
         if not program_enabled:
             return
-        
-        if settings.autocomplete_key == e.name:
-            if e.event_type == "down":
-                autocomplete_and_replace(current_word)
-        elif e.name == "backspace":
-            if e.event_type == "down":
-                if current_word := current_word[:-1]:
-                    suggestions = self.get_suggestions(current_word)
-                    autocomplete_window.update_suggestions(suggestions)
-                else:
-                    autocomplete_window.list_widget.clear()
-        elif len(e.name) == 1:
-            if e.event_type == "down":
-                current_word += e.name
-                suggestions = self.get_suggestions(current_word)
-                suggestion_list_active = bool(suggestions)
+
+        buffer = self.word_buffer
+        if e.event_type != "down":
+            buffer.key_up(e.name)
+            return
+
+        # Only a word known from its start, with the caret at its end, is completed or corrected
+        word = buffer.text if buffer.can_replace() else ""
+        shortcut = bool(buffer.modifiers & {"ctrl", "alt", "windows"})
+        # The word left in the text once this key is handled: the completion or correction
+        # typed in its place, if any. A completion is followed by a space.
+        final_word = word
+        completed = False
+        if settings.autocomplete_key == e.name and not shortcut:
+            completed = bool(replacement := autocomplete_and_replace(word))
+            final_word = replacement or word
+
+        # Perform auto-correction on spacebar press
+        if settings.auto_correct_enabled and e.name == 'space' and not shortcut:
+            final_word = auto_correct(word) or word
+
+        change = buffer.key_down(e.name)
+        current_word = buffer.text
+
+        if change == WordBuffer.EDITED:
+            if buffer.trusted and buffer.text:
+                suggestions = self.get_suggestions(buffer.text, settings)
                 autocomplete_window.update_suggestions(suggestions)
+            else:
+                autocomplete_window.clear_suggestions()
+        elif change == WordBuffer.RESET:
+            self.previous_words.clear()
+            autocomplete_window.clear_suggestions()
+        elif change == WordBuffer.BREAK:
+            # The words of the current sentence, as they end up in the text, are the context
+            # of the next word prediction. Enter and tab end it, unless they completed a word.
+            after_space = e.name == 'space' or completed
+            if not after_space or not final_word or final_word[-1] in ('.', '!', '?'):
+                self.previous_words.clear()
+            else:
+                self.previous_words.append(final_word)
+
+            # After a space, the next word is predicted instead of leaving the list empty
+            if after_space and (predictions := self.predict_next_words(settings)):
+                autocomplete_window.update_suggestions(predictions)
+            else:
+                autocomplete_window.clear_suggestions()
 
-        # Perform auto-correction on spacebar or backspace press
-        if settings.auto_correct_enabled and e.name in ['space'] and e.event_type == "down":
-            auto_correct(current_word)
-        
-        # Clear the suggestions when spacebar, enter, or tab is pressed
-        if e.name in ['space', 'enter', 'tab', 'ctrl', 'alt'] and e.event_type == 'down':
-            current_word = ""
-            autocomplete_window.list_widget.clear()
-            
 def toggle_program():
         """
         This function is called when the toggle button is pressed. It toggles the program_enabled variable,
@@ -938,7 +4405,7 @@ def toggle_program():
         toggle_button.setText("Toggle ON" if program_enabled else "Toggle OFF")
     
         # The list widget is cleared, so that it does not contain any suggestions from before
-        autocomplete_window.list_widget.clear()
+        autocomplete_window.clear_suggestions()
 
 def current_to_corrected(current_word: str, corrected_word: str) -> None:
     """
@@ -967,7 +4434,7 @@ def current_to_corrected(current_word: str, corrected_word: str) -> None:
 
     # Press and release ctrl+backspace to delete the word
     keyboard.press('ctrl+backspace')
-    time.sleep(0.05)
+    time.sleep(KEY_RELEASE_DELAY)
     keyboard.release('ctrl+backspace')
 
     # Type the corrected word and add a space
@@ -1003,10 +4470,10 @@ def temp_key_block(arg0: str) -> None:
         autocomplete_and_replace("current")
     """
     keyboard.block_key(arg0)
-    time.sleep(0.05)
+    time.sleep(KEY_RELEASE_DELAY)
     keyboard.unblock_key(arg0)
 
-def auto_correct(current_word: str) -> None:
+def auto_correct(current_word: str):
     """
     Executes the auto_correct function, which performs auto-correction of a current word. 
     If the current word is empty or ends with punctuation, the function returns immediately. 
@@ -1018,7 +4485,7 @@ def auto_correct(current_word: str) -> None:
         current_word (str): The word to be auto-corrected
 
     Returns:
-        None
+        str: The corrected word typed in its place, or None if the word was left alone
 
     Calls:
         - current_to_corrected(current_word, corrected_word):
@@ -1032,92 +4499,703 @@ def auto_correct(current_word: str) -> None:
     """
     # if auto correct checkbox is unchecked, return immediately
     if not settings.auto_correct_enabled:
-        return
+        return None
     
     if not current_word or current_word[-1] in string.punctuation:
-        return
+        return None
 
+    # Words of the current word list are spelled correctly, and the membership test is much
+    # cheaper than asking the spell checker (which is not even loaded if every word is known)
+    if word_list_manager.is_known(current_word):
+        return None
+
+    spell = get_spell_checker()
     if misspelled := spell.unknown([current_word]):
         corrected_word = spell.correction(list(misspelled)[0])
 
         if corrected_word and corrected_word != current_word:
             current_to_corrected(current_word, corrected_word)
-            autocomplete_window.list_widget.clear()  # Clear the suggestions
+            word_list_manager.record_accepted(corrected_word, LEARNING_CORRECTION_WEIGHT)
+            autocomplete_window.clear_suggestions()  # Clear the suggestions
+            return corrected_word
+    return None
 
 def autocomplete_and_replace(current_word):
+    # Returns the suggestion typed in place of the word, or None if the word was left alone
     if not current_word or current_word[-1] in string.punctuation:
-        return
+        return None
 
-    suggestions = word_list_manager.get_suggestions(current_word)
+    suggestions = word_list_manager.get_suggestions(current_word, settings)
     corrected_word = suggestions[0] if suggestions else current_word
 
     # if autocomplete checkbox is unchecked, return immediately
     if not settings.auto_complete_enabled:
-        return
+        return None
 
-    if corrected_word and corrected_word != current_word:
+    # Words that only differ in case or other normalization are not replaced
+    if corrected_word and normalize_word(corrected_word) != normalize_word(current_word):
         current_to_corrected(current_word, corrected_word)
-        autocomplete_window.list_widget.clear()  # Clear the suggestions
+        word_list_manager.record_accepted(corrected_word)
+        autocomplete_window.clear_suggestions()  # Clear the suggestions
+        return corrected_word
+    return None
+
+# Keystroke recording and replay
+
+KeyEvent = collections.namedtuple("KeyEvent", "event_type name time")
+
+KEYSTROKE_FILE_MAGIC = b"WSKR"
+KEYSTROKE_FILE_VERSION = 1
+KEYSTROKE_FILE_HEADER = struct.Struct("<4sIII")  # magic, version, name table bytes, events
+KEYSTROKE_RECORD = struct.Struct("<IBH")  # milliseconds since the previous event, key down, name index
+
+def write_keystroke_file(path, events):
+    """
+    Writes keyboard events to a compact keystroke file: a table of the key names, then 7 bytes
+    per event (time since the previous event, up or down, index of the key name).
+
+    Args:
+        path (str): The path of the file
+        events (list): The events (anything with event_type, name and time, like keyboard.KeyboardEvent)
+
+    Returns:
+        None
+
+    Example:
+        write_keystroke_file("typing.keys", events)
+    """
+    names = {}
+    records = []
+    previous = events[0].time if events else 0
+    for event in events:
+        index = names.setdefault(event.name, len(names))
+        delay = max(0, min(0xFFFFFFFF, round((event.time - previous) * 1000)))
+        records.append(KEYSTROKE_RECORD.pack(delay, event.event_type == "down", index))
+        previous = event.time
+    name_table = "\n".join(names).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(KEYSTROKE_FILE_HEADER.pack(KEYSTROKE_FILE_MAGIC, KEYSTROKE_FILE_VERSION, len(name_table), len(records)))
+        f.write(name_table)
+        f.write(b"".join(records))
+
+def read_keystroke_file(path):
+    """
+    Reads a keystroke file written by write_keystroke_file
+
+    Args:
+        path (str): The path of the file
+
+    Returns:
+        list: The events (KeyEvent), with times in seconds from the first event
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not a keystroke file
+
+    Example:
+        events = read_keystroke_file("typing.keys")
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, table_size, count = KEYSTROKE_FILE_HEADER.unpack_from(data)
+    if magic != KEYSTROKE_FILE_MAGIC or version != KEYSTROKE_FILE_VERSION:
+        raise ValueError(f"{path} is not a version {KEYSTROKE_FILE_VERSION} keystroke file")
+    position = KEYSTROKE_FILE_HEADER.size
+    names = data[position:position + table_size].decode("utf-8").split("\n")
+    position += table_size
+
+    events = []
+    now = 0.0
+    for delay, down, index in KEYSTROKE_RECORD.iter_unpack(data[position:position + count * KEYSTROKE_RECORD.size]):
+        now += delay / 1000
+        events.append(KeyEvent("down" if down else "up", names[index], now))
+    return events
+
+def keystrokes_from_text(text, interval=0.08):
+    """
+    Turns text into the keystrokes of typing it without mistakes, for replays without a recording
+
+    Args:
+        text (str): The text to type
+        interval (float): Seconds between keystrokes
 
-# load the cache
-cache_filename = "cache.json"
+    Returns:
+        list: The events (KeyEvent)
+
+    Example:
+        events = keystrokes_from_text("hello world")
+    """
+    key_names = {" ": "space", "\n": "enter", "\t": "tab"}
+    events = []
+    for i, char in enumerate(text):
+        name = key_names.get(char, char)
+        events.append(KeyEvent("down", name, i * interval))
+        events.append(KeyEvent("up", name, i * interval + interval / 2))
+    return events
+
+def record_keystrokes(path, stop_key="esc"):
+    """
+    Records the keyboard events of the whole system until the stop key is pressed, then writes
+    them to a keystroke file
+
+    Args:
+        path (str): The path of the keystroke file
+        stop_key (str): The key that stops the recording
+
+    Returns:
+        int: The number of events recorded
+
+    Example:
+        record_keystrokes("typing.keys")
+    """
+    import keyboard
+    events = []
+    keyboard.hook(events.append)
+    print(f"Recording keystrokes to {path}, press {stop_key} to stop.")
+    keyboard.wait(stop_key)
+    keyboard.unhook_all()
+    while events and events[-1].name == stop_key:
+        events.pop()
+    write_keystroke_file(path, events)
+    return len(events)
+
+class FakeKeyboard:
+    """
+    Stands in for the keyboard module during a replay: keystrokes the program sends are
+    recorded instead of typed
+
+    Attributes:
+        output (list): What the program typed since the last take_output()
+    """
+    def __init__(self):
+        self.output = []
+
+    def press(self, hotkey):
+        self.output.append(f"<{hotkey}>")
+
+    def release(self, hotkey):
+        pass
+
+    def write(self, text):
+        self.output.append(text)
+
+    def block_key(self, key):
+        pass
+
+    def unblock_key(self, key):
+        pass
+
+    def take_output(self):
+        output, self.output = "".join(self.output), []
+        return output
+
+class FakeAutocompleteWindow:
+    """
+    Stands in for the autocomplete window during a replay, keeping the suggestions shown
+
+    Attributes:
+        suggestions (list): The suggestions shown
+    """
+    def __init__(self):
+        self.suggestions = []
+
+    def update_suggestions(self, suggestions):
+        self.suggestions = list(suggestions)
+
+    def clear_suggestions(self):
+        self.suggestions = []
 
+def replay_keystrokes(events, manager, replay_settings):
+    """
+    Feeds keyboard events through WordListManager.process_key without a keyboard hook or a
+    display. The keyboard module and the autocomplete window are replaced with fakes, and
+    auto_correct and autocomplete_and_replace run as usual against them.
 
-settings = Settings()
+    Args:
+        events (list): The events to replay
+        manager (WordListManager): The word list manager, with the word list to use selected
+        replay_settings (Settings): The settings to replay with
 
-suggestion_list_active = False
-global word_list_manager
-word_list_manager = WordListManager()
+    Returns:
+        tuple: (the process_key latency of each key down in nanoseconds, the transcript). The
+            transcript has one line per key down: the key, the suggestions shown after it
+            and what the program typed.
 
-word_list_manager.load_word_list(name="Unnoticable", filename=UNNOTICABLE_WORD_LIST_FILENAME)
-word_list_manager.load_word_list(name="Risky", filename=RISKY_WORD_LIST_FILENAME)
-word_list_manager.load_word_list(name="BestList", filename=BESTLIST_WORD_LIST_FILENAME)
-word_list_manager.load_word_list(name="Suspicious", filename=BABYHACKER_WORD_LIST_FILENAME)
-word_list_manager.load_word_list(name="Obvious", filename=EXTREMEHACKER_WORD_LIST_FILENAME)
-word_list_manager.load_word_list(name="Custom", filename=CUSTOM_WORD_LIST_FILENAME)
+    Example:
+        latencies, transcript = replay_keystrokes(events, manager, Settings())
+    """
+    fake_keyboard = FakeKeyboard()
+    fake_window = FakeAutocompleteWindow()
+    # The globals the key handling uses, replaced while replaying and restored after, so a
+    # replay run from a test or the app leaves the real keyboard and window in place
+    replaced = {
+        "keyboard": fake_keyboard,
+        "autocomplete_window": fake_window,
+        "settings": replay_settings,
+        "word_list_manager": manager,
+        "program_enabled": True,
+        "current_word": "",
+        "KEY_RELEASE_DELAY": 0,  # Nothing to wait for with a fake keyboard
+    }
+    module_globals = globals()
+    saved = {name: module_globals[name] for name in replaced if name in module_globals}
+    module_globals.update(replaced)
+
+    latencies = []
+    transcript = []
+    try:
+        for event in events:
+            started = time.perf_counter_ns()
+            manager.process_key(event, replay_settings)
+            elapsed = time.perf_counter_ns() - started
+            if event.event_type == "down":
+                latencies.append(elapsed)
+                transcript.append(f"{event.name}\t{' '.join(fake_window.suggestions)}\t{fake_keyboard.take_output()}")
+    finally:
+        for name in replaced:
+            if name in saved:
+                module_globals[name] = saved[name]
+            else:
+                module_globals.pop(name, None)
+    return latencies, transcript
 
-app = QApplication(sys.argv)
-autocomplete_window = AutocompleteWindow()
+def run_replay(args):
+    """
+    Replays a keystroke file (or a text file typed without mistakes, with --from-text) and
+    reports throughput, per key latency and, with --baseline, the differences from a
+    previous transcript.
+    """
+    if args.from_text:
+        with open(args.replay, encoding="utf-8") as f:
+            events = keystrokes_from_text(f.read())
+    else:
+        events = read_keystroke_file(args.replay)
+
+    replay_settings = Settings()
+    learning_store = LearningStore()  # In memory, so replays do not learn from each other
+    manager = WordListManager(strip_accents=replay_settings.strip_accents, learning_store=learning_store)
+    manager.load_snapshot()
+    load_word_lists(manager)
+    manager.current_word_list = manager.get_word_list(args.word_list)
+    if manager.current_word_list is None:
+        sys.exit(f"Word list {args.word_list} not found.")
+    manager.ngram_model = load_ngram_model()
+
+    # Built before the replay so it only measures the keystroke path
+    manager.current_word_list.get_trie()
+    get_spell_checker()
+
+    started = time.perf_counter()
+    latencies, transcript = replay_keystrokes(events, manager, replay_settings)
+    elapsed = time.perf_counter() - started
+
+    print(f"Replayed {len(events)} events ({len(latencies)} keys) with word list {args.word_list} in {elapsed:.2f} s")
+    print(f"  throughput: {len(latencies) / elapsed if elapsed else 0:.0f} keys/s")
+    print(f"  process_key latency: {latency_summary(latencies)}")
+
+    if args.transcript:
+        with open(args.transcript, "w", encoding="utf-8") as f:
+            f.write("\n".join(transcript) + "\n")
+    if args.baseline:
+        import difflib
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = f.read().splitlines()
+        diff = list(difflib.unified_diff(baseline, transcript, "baseline", "replay", lineterm="", n=1))
+        changed = sum(1 for line in diff if line.startswith("+") and not line.startswith("+++"))
+        print(f"  correctness: {changed} of {len(transcript)} keys differ from {args.baseline}")
+        for line in diff[:40]:
+            print(f"    {line}")
+
+# Word game queries
+
+def run_find(args):
+    """
+    Prints the words of --word-list matching the --find pattern and the length and letter
+    options, the words that can be made from the --rack or the words on the --board, one
+    per line.
+    """
+    manager = WordListManager()
+    manager.load_snapshot()
+    load_word_lists(manager)
+    word_list = manager.get_word_list(args.word_list)
+    if word_list is None:
+        sys.exit(f"Word list {args.word_list} not found.")
+    if args.board:
+        try:
+            words = manager.find_board_words(args.board, args.min_length or BOARD_MIN_LENGTH, args.workers,
+                                             word_list=word_list)
+        except ValueError as error:
+            sys.exit(f"Invalid --board: {error}")
+    elif args.rack:
+        words = manager.find_anagrams(args.rack, args.min_length or 2, args.use_all, word_list=word_list)
+    else:
+        words = manager.find_words(args.find, args.min_length, args.max_length, args.require,
+                                   args.forbid, word_list=word_list)
+    for word in words:
+        print(word)
 
-# Create the settings button
-settings_button = QPushButton("Settings")
-settings_button.clicked.connect(autocomplete_window.open_settings)
+# Benchmarks
 
-# Create the toggle button
-toggle_button = QPushButton("Toggle ON/OFF")
-toggle_button.setCheckable(True)
-toggle_button.setChecked(True)
+def latency_summary(samples_ns):
+    """
+    Summarizes latency samples as percentiles
 
-# Create the button to open the custom word list editor
-edit_custom_list_button = QPushButton("Edit Custom Word List")
-edit_custom_list_button.clicked.connect(autocomplete_window.open_custom_word_list_editor)
+    Args:
+        samples_ns (list): The latencies in nanoseconds
 
-# Create the layout
-layout = QVBoxLayout()
-layout.addWidget(autocomplete_window.list_widget)
-layout.addWidget(toggle_button)
-layout.addWidget(settings_button)
-layout.addWidget(edit_custom_list_button)
+    Returns:
+        str: The p50, p95, p99 and maximum latency in microseconds
 
-# Create the main widget and set the layout
-main_widget = QWidget()
-main_widget.setLayout(layout)
-autocomplete_window.setCentralWidget(main_widget)
+    Example:
+        latency_summary([1200, 1500, 9000]) # Returns "p50 1.5 us, p95 9.0 us, ..."
+    """
+    if not samples_ns:
+        return "no samples"
+    ordered = sorted(samples_ns)
 
-autocomplete_window.show()
+    def percentile(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] / 1000
 
-trie_start = Trie()
-trie_end = Trie()
+    return (f"p50 {percentile(0.50):.1f} us, p95 {percentile(0.95):.1f} us, "
+            f"p99 {percentile(0.99):.1f} us, max {ordered[-1] / 1000:.1f} us")
 
-current_word = ""
-spell = SpellChecker()
+def synthetic_corpus(path, sentences=100_000, vocabulary=20_000, seed=0):
+    """
+    Writes a random corpus for benchmarks: sentences of words drawn from BestList.txt with a
+    Zipf-like frequency distribution, like word frequencies in real text.
 
-# Flag to check if the program is enabled or disabled
-program_enabled = True
+    Args:
+        path (str): The path of the corpus to write
+        sentences (int): The number of sentences
+        vocabulary (int): The number of distinct words used
+        seed (int): The random seed
 
-# Connect the toggle button to the function
-toggle_button.clicked.connect(toggle_program)
+    Returns:
+        None
 
-# Listen for key presses
-keyboard.hook(lambda e: word_list_manager.process_key(e, settings))
-sys.exit(app.exec_())
+    Example:
+        synthetic_corpus("/tmp/corpus.txt")
+    """
+    rng = random.Random(seed)
+    words = [key for key, _ in read_word_file(os.path.join(script_dir, BESTLIST_WORD_LIST_FILENAME))]
+    words = rng.sample(words, min(vocabulary, len(words)))
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(sentences):
+            f.write(" ".join(rng.choices(words, weights, k=rng.randint(4, 16))) + ".\n")
+
+def bench_ngram(args):
+    """
+    Benchmarks the n-gram model: build time, table size, load time and prediction latency.
+    Uses --corpus if given, else a synthetic corpus.
+    """
+    with tempfile.TemporaryDirectory(prefix="wordsolver-bench-") as bench_dir:
+        corpus_path = args.corpus
+        if corpus_path is None:
+            corpus_path = os.path.join(bench_dir, "corpus.txt")
+            synthetic_corpus(corpus_path)
+        model_path = os.path.join(bench_dir, "ngram_model.bin")
+
+        started = time.perf_counter()
+        NGramModel.build(corpus_path).save(model_path)
+        build_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        model = NGramModel.load(model_path)
+        load_seconds = time.perf_counter() - started
+
+        with open(corpus_path, encoding="utf-8", errors="replace") as f:
+            contexts = [sentence[i - 2:i] for sentence in itertools.islice(NGramModel.tokenize(f), 5000)
+                        for i in range(2, len(sentence))]
+        random.Random(0).shuffle(contexts)
+        samples = []
+        for context in contexts[:20_000]:
+            started = time.perf_counter_ns()
+            model.predict(context)
+            samples.append(time.perf_counter_ns() - started)
+
+        print(f"n-gram model: {len(model.vocab)} words, {len(model.keys)} contexts, {len(model.next_ids)} entries")
+        print(f"  build {build_seconds:.2f} s, load {load_seconds * 1000:.1f} ms, "
+              f"table {model.memory_bytes() / 1024:.0f} KiB, file {os.path.getsize(model_path) / 1024:.0f} KiB")
+        print(f"  predict ({len(samples)} contexts): {latency_summary(samples)}")
+
+PATTERN_BENCH_QUERIES = [
+    ("c?t", {}),
+    ("*ing", {}),
+    ("*ing", {"max_length": 6, "required": "s"}),
+    ("a*z", {}),
+    ("??x??", {}),
+    ("*q*", {"forbidden": "u"}),
+    ("*", {"min_length": 5, "max_length": 5, "required": "zq"}),
+    ("s*s*s", {"max_length": 8}),
+    ("*", {"min_length": 15}),
+]
+
+def bench_pattern(args):
+    """
+    Benchmarks pattern queries on --word-list (BestList by default) against a scan of every
+    word, and checks that both find the same words.
+    """
+    manager = WordListManager()
+    manager.load_snapshot()
+    load_word_lists(manager)
+    word_list = manager.get_word_list(args.word_list)
+    if word_list is None:
+        sys.exit(f"Word list {args.word_list} not found.")
+    started = time.perf_counter()
+    word_list.get_trie()
+    print(f"{word_list.name}: {len(word_list.ids)} words, tries built in {time.perf_counter() - started:.2f} s")
+    keys = word_list.get_keys()
+
+    for pattern, options in PATTERN_BENCH_QUERIES:
+        samples = []
+        for _ in range(5):
+            started = time.perf_counter_ns()
+            found = manager.find_words(pattern, word_list=word_list, **options)
+            samples.append(time.perf_counter_ns() - started)
+        query = PatternQuery(pattern, options.get("min_length"), options.get("max_length"),
+                             options.get("required", ""), options.get("forbidden", ""))
+        started = time.perf_counter_ns()
+        expected = sorted(word_list.get_surface(key) for key in keys if query.matches(key))
+        scan_ns = time.perf_counter_ns() - started
+        status = "ok" if found == expected else "MISMATCH"
+        print(f"  {pattern!r:10} {str(options):48} {len(found):6} words  "
+              f"query {sorted(samples)[2] / 1e6:8.2f} ms  brute force {scan_ns / 1e6:8.1f} ms  {status}")
+
+def bench_anagram(args):
+    """
+    Benchmarks rack queries on --word-list (BestList by default): random racks of 7 to 15
+    tiles with up to two blanks, drawn with the letter frequencies of the list. The first
+    racks of each size are checked against a scan of every word.
+    """
+    manager = WordListManager()
+    manager.load_snapshot()
+    load_word_lists(manager)
+    word_list = manager.get_word_list(args.word_list)
+    if word_list is None:
+        sys.exit(f"Word list {args.word_list} not found.")
+    started = time.perf_counter()
+    word_list.get_trie()
+    print(f"{word_list.name}: {len(word_list.ids)} words, tries built in {time.perf_counter() - started:.2f} s")
+    keys = word_list.get_keys()
+    frequencies = collections.Counter(itertools.chain.from_iterable(keys))
+    alphabet, weights = zip(*frequencies.most_common())
+    rng = random.Random(0)
+
+    def playable(key, rack):
+        missing = collections.Counter(key) - collections.Counter(rack)
+        return sum(missing.values()) <= rack.count("?")
+
+    for size in (7, 10, 12, 15):
+        for blanks in (0, 1, 2):
+            racks = ["".join(rng.choices(alphabet, weights, k=size - blanks)) + "?" * blanks for _ in range(20)]
+            samples = []
+            found = 0
+            for rack in racks:
+                started = time.perf_counter_ns()
+                found += len(manager.find_anagrams(rack, word_list=word_list))
+                samples.append(time.perf_counter_ns() - started)
+            rack = racks[0]
+            expected = sorted((word_list.get_surface(key) for key in keys if len(key) >= 2 and playable(key, rack)),
+                              key=lambda word: (-len(word), word))
+            status = "ok" if manager.find_anagrams(rack, word_list=word_list) == expected else "MISMATCH"
+            print(f"  {size:2} tiles, {blanks} blanks: {found / len(racks):7.0f} words per rack  "
+                  f"{latency_summary(samples)}  {status}")
+
+def bench_board(args):
+    """
+    Benchmarks letter boards of 4x4 to 20x20 on --word-list (BestList by default), solved
+    in this process and by a pool of --workers processes (at least 2), and checks that
+    both find the same words.
+    """
+    manager = WordListManager()
+    manager.load_snapshot()
+    load_word_lists(manager)
+    word_list = manager.get_word_list(args.word_list)
+    if word_list is None:
+        sys.exit(f"Word list {args.word_list} not found.")
+    started = time.perf_counter()
+    word_list.get_trie()
+    print(f"{word_list.name}: {len(word_list.ids)} words, tries built in {time.perf_counter() - started:.2f} s")
+    frequencies = collections.Counter(itertools.chain.from_iterable(word_list.get_keys()))
+    alphabet, weights = zip(*frequencies.most_common())
+    rng = random.Random(0)
+    workers = args.workers or max(2, os.cpu_count() or 1)
+
+    for size in (*range(4, 11), 15, 20):
+        board = [rng.choices(alphabet, weights, k=size) for _ in range(size)]
+        started = time.perf_counter()
+        serial = solve_board_cells(board, word_list.get_trie()[0], range(size * size))
+        serial_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        parallel = solve_board(board, word_list, workers=workers)
+        parallel_seconds = time.perf_counter() - started
+        status = "ok" if parallel == serial else "MISMATCH"
+        print(f"  {size:2}x{size:<2} {len(serial):6} words  1 process {serial_seconds * 1000:8.1f} ms  "
+              f"{workers} workers {parallel_seconds * 1000:8.1f} ms  {status}")
+
+BENCHMARKS = {
+    "ngram": bench_ngram,
+    "pattern": bench_pattern,
+    "anagram": bench_anagram,
+    "board": bench_board,
+}
+
+if __name__ == "__main__":
+    # Worker processes used to parse large word lists import this module, so everything that
+    # starts the application only runs in the main process
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+        multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description="Autocomplete and spellchecking as you type.")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print how long each startup phase takes, up to the first suggestion, and exit")
+    parser.add_argument("--build-ngram", metavar="CORPUS",
+                        help=f"build the next word prediction model ({NGRAM_MODEL_FILENAME}) from a text file and exit")
+    parser.add_argument("--bench", choices=sorted(BENCHMARKS), help="run a benchmark and exit")
+    parser.add_argument("--corpus", help="corpus for the ngram benchmark (default: a synthetic corpus)")
+    parser.add_argument("--record", metavar="FILE", help="record keystrokes to FILE until esc is pressed, and exit")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="replay a keystroke FILE without a keyboard hook or window, report latency, and exit")
+    parser.add_argument("--from-text", action="store_true", help="replay FILE as text typed without mistakes")
+    parser.add_argument("--word-list", default="BestList",
+                        help="word list to replay, search or benchmark with (default: BestList)")
+    parser.add_argument("--find", metavar="PATTERN",
+                        help='print the words matching PATTERN ("?" is any letter, "*" any letters) and exit')
+    parser.add_argument("--min-length", type=int, help="minimum length of the words found with --find")
+    parser.add_argument("--max-length", type=int, help="maximum length of the words found with --find")
+    parser.add_argument("--require", default="", metavar="LETTERS", help="letters the words found with --find must contain")
+    parser.add_argument("--rack", metavar="LETTERS",
+                        help='print the words that can be made from a rack of LETTERS ("?" is a blank) and exit')
+    parser.add_argument("--board", metavar="BOARD",
+                        help='print the words that can be traced on a letter BOARD, e.g. "abcd/efgh/ijkl/mnop", and exit')
+    parser.add_argument("--workers", type=int, help="worker processes for --board and the board benchmark")
+    parser.add_argument("--use-all", action="store_true", help="only print the words using every tile of --rack")
+    parser.add_argument("--forbid", default="", metavar="LETTERS", help="letters the words found with --find must not contain")
+    parser.add_argument("--transcript", metavar="FILE", help="write the replay transcript to FILE")
+    parser.add_argument("--baseline", metavar="FILE", help="compare the replay transcript with a previous one")
+    args, qt_args = parser.parse_known_args()
+    setup_logging(logging.DEBUG, background=not (args.find or args.rack or args.board or args.bench))
+
+    if args.record:
+        print(f"Recorded {record_keystrokes(args.record)} events.")
+        sys.exit(0)
+    if args.replay:
+        run_replay(args)
+        sys.exit(0)
+
+    if args.find or args.rack or args.board:
+        run_find(args)
+        sys.exit(0)
+
+    if args.build_ngram:
+        NGramModel.build(args.build_ngram).save(os.path.join(script_dir, NGRAM_MODEL_FILENAME))
+        sys.exit(0)
+    if args.bench:
+        BENCHMARKS[args.bench](args)
+        sys.exit(0)
+
+    startup_profile = StartupProfiler(STARTUP_STARTED)
+    startup_profile.mark("standard library imports", STDLIB_IMPORTS_DONE)
+    startup_profile.mark("PyQt5 imports", THIRD_PARTY_IMPORTS_DONE)
+    import keyboard  # Only the app and --record hook the keyboard, the other commands never import it
+    startup_profile.mark("keyboard import")
+
+    settings = Settings()
+
+    suggestion_list_active = False
+    global word_list_manager
+    learning_store = LearningStore(os.path.join(script_dir, LEARNING_FILENAME))
+    learning_store.load()
+    learning_store.start()
+    word_list_manager = WordListManager(strip_accents=settings.strip_accents, learning_store=learning_store)
+    word_list_manager.load_snapshot()
+    startup_profile.mark("snapshot")
+
+    load_word_lists(word_list_manager)
+    startup_profile.mark("word lists")
+    if word_list_manager.snapshot_stale:
+        word_list_manager.save_snapshot()
+        startup_profile.mark("snapshot update")
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    autocomplete_window = AutocompleteWindow()
+
+    # Create the settings button
+    settings_button = QPushButton("Settings")
+    settings_button.clicked.connect(autocomplete_window.open_settings)
+
+    # Create the toggle button
+    toggle_button = QPushButton("Toggle ON/OFF")
+    toggle_button.setCheckable(True)
+    toggle_button.setChecked(True)
+
+    # Create the button to open the custom word list editor
+    edit_custom_list_button = QPushButton("Edit Custom Word List")
+    edit_custom_list_button.clicked.connect(autocomplete_window.open_custom_word_list_editor)
+
+    # Create the layout
+    layout = QVBoxLayout()
+    layout.addWidget(autocomplete_window.list_view)
+    layout.addWidget(toggle_button)
+    layout.addWidget(settings_button)
+    layout.addWidget(edit_custom_list_button)
+
+    # Create the main widget and set the layout
+    main_widget = QWidget()
+    main_widget.setLayout(layout)
+    autocomplete_window.setCentralWidget(main_widget)
+
+    autocomplete_window.show()
+    startup_profile.mark("window")
+
+    current_word = ""
+
+    if args.startup_report:
+        if word_list_manager.current_word_list is not None:
+            word_list_manager.get_suggestions("a")
+            startup_profile.mark("first suggestion")
+            # A prefix longer than the hot tables hold is looked up in the trie, built on first use
+            key_text = word_list_manager.current_word_list.get_key_text()
+            longer = re.search(f"^[^\\n]{{{HOT_PREFIX_LENGTH + 1}}}", key_text, re.MULTILINE)
+            if longer:
+                word_list_manager.get_suggestions(longer.group())
+                startup_profile.mark("first trie lookup (cold)")
+        print(startup_profile.report())
+        sys.exit(0)
+    logger.info(startup_profile.report())
+
+    def warm_up():
+        # Builds the tries of the current word list, the spell checker and the next word
+        # prediction model in the background, so none of them is built on the first keystroke
+        if word_list_manager.current_word_list is not None:
+            word_list_manager.current_word_list.get_trie()
+        get_spell_checker()
+        word_list_manager.ngram_model = load_ngram_model()
+        # The objects built so far live as long as the program: once any garbage is
+        # collected, they are frozen so later collections on the keystroke path skip them.
+        # This is done once, here: freezing affects every object of the process.
+        gc.collect()
+        gc.freeze()
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    word_list_manager.start_watching()
+
+    # Flag to check if the program is enabled or disabled
+    program_enabled = True
+
+    # Connect the toggle button to the function
+    toggle_button.clicked.connect(toggle_program)
+
+    # Profiling can also be toggled from outside, with `kill -USR1 <pid>` (Ctrl+Break on Windows)
+    profile_signal = getattr(signal, "SIGUSR1", None) or getattr(signal, "SIGBREAK", None)
+    if profile_signal is not None:
+        signal.signal(profile_signal, lambda signum, frame: profiler.toggle(settings.profile_seconds))
+        # Python only handles signals in the main thread, which spends its time in the Qt
+        # event loop, so a timer hands control back to Python regularly
+        signal_timer = QTimer()
+        signal_timer.timeout.connect(lambda: None)
+        signal_timer.start(PROFILE_SIGNAL_POLL_MS)
+
+    # Listen for key presses
+    keyboard.hook(lambda e: word_list_manager.process_key(e, settings))
+    sys.exit(app.exec_())
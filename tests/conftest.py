@@ -0,0 +1,34 @@
+import os
+import random
+import sys
+
+import pytest
+
+# The tests import WordSolver.py from the root of the repository, and run its widgets
+# without a display
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+@pytest.fixture
+def seed(request):
+    """
+    The random seed of a test: WORDSOLVER_SEED if set, so a failure can be replayed,
+    otherwise a new one every run. It is printed with the report of a failed test.
+    """
+    value = int(os.environ.get("WORDSOLVER_SEED") or random.randrange(2 ** 32))
+    request.node.user_properties.append(("seed", value))
+    return value
+
+@pytest.fixture(scope="session")
+def qapp():
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    if report.failed:
+        for name, value in item.user_properties:
+            if name == "seed":
+                report.sections.append(("seed", f"Replay with WORDSOLVER_SEED={value}"))
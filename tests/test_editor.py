@@ -0,0 +1,50 @@
+import threading
+
+import WordSolver
+from WordSolver import CustomWordListEditor, Settings, SettingsDialog, WordList, WordListManager
+
+def test_edits_survive_index_changes(tmp_path, monkeypatch, qapp):
+    path = tmp_path / "Custom.txt"
+    path.write_text("apple\npear\n", encoding="utf-8")
+    word_list = WordList("Custom", str(path))
+    word_list.set_dir(str(path))
+    word_list.index_words(["apple", "pear"])
+    answers = iter([("kiwi", True), ("Plum", True)])
+    monkeypatch.setattr(WordSolver.QInputDialog, "getText", lambda *args, **kwargs: next(answers))
+    monkeypatch.setattr(WordSolver.QMessageBox, "information", lambda *args: None)
+
+    editor = CustomWordListEditor(None, word_list)
+    editor.add_word()
+    # The file watcher applies a change while the editor is open, replacing the words of the list
+    word_list.update_words(add=["fig"])
+    editor.list_widget.setCurrentRow(1)
+    editor.edit_word()
+    editor.list_widget.setCurrentRow(0)
+    editor.delete_word()
+    editor.save_changes()
+
+    assert path.read_text(encoding="utf-8").split() == ["kiwi", "Plum"]
+    assert word_list.get_words() == ["kiwi", "Plum"]
+
+def test_switching_lists_builds_tries_in_background(monkeypatch, qapp):
+    manager = WordListManager()
+    for name in ("BestList", "Risky"):
+        word_list = WordList(name, f"{name}.txt")
+        word_list.index_words(["apple", "pear"])
+        manager.word_lists[name] = manager.current_word_list = word_list
+    building = threading.Event()
+    release = threading.Event()
+    get_trie = WordList.get_trie
+
+    def slow_get_trie(word_list):
+        building.set()
+        release.wait(5)
+        return get_trie(word_list)
+
+    monkeypatch.setattr(WordList, "get_trie", slow_get_trie)
+    dialog = SettingsDialog(None, Settings(), manager)
+    dialog.word_list_combobox.setCurrentText("BestList")
+    dialog.save_and_close()  # Returns while the tries are still being built
+    assert manager.current_word_list is manager.word_lists["BestList"]
+    assert building.wait(5) and manager.current_word_list.trie is None
+    release.set()
@@ -0,0 +1,426 @@
+"""
+Checks the word list indexes and searches of WordSolver.py against brute force, on
+generated word lists. Every test takes a random seed, see conftest.py.
+
+    python -m pytest tests
+    WORDSOLVER_SEED=1234 python -m pytest tests  # Replays a failed run
+    WORDSOLVER_SCALE_WORDS=1000000 python -m pytest tests -k scale -s  # Also runs the scale test
+"""
+import collections
+import gc
+import itertools
+import math
+import os
+import random
+import re
+import threading
+import time
+import tracemalloc
+
+import pytest
+
+import WordSolver
+from WordSolver import (HOT_PREFIX_K, NGRAM_BACKOFF_PENALTY, NGramModel, StringPool, SuggestionStage, Trie,
+                        WordList, WordListManager, latency_summary, parse_board, solve_board)
+
+# The generated word lists, with their sizes: long words make deep tries, and
+# search_containing builds every word of the trie, so the long list is kept small
+CORPORA = {"syllables": 5000, "random": 5000, "long": 300, "prefixes": 5000, "unicode": 5000}
+SCALE_SIZES = (10_000, 30_000, 100_000, 300_000, 1_000_000)  # Word list sizes of the scale test
+SCALE_MAX_WORDS = int(os.environ.get("WORDSOLVER_SCALE_WORDS") or 0)  # The scale test is skipped unless set
+
+def generate_corpus(kind, size, seed=0):
+    """
+    Generates a random word list
+
+    Args:
+        kind (str): A kind of CORPORA:
+            "syllables": made up words of one to four syllables and an ending, like a real list
+            "random": short words of six letters, so most prefixes are shared by many words
+            "long": words of 50 to 300 letters sharing long runs, the deepest tries
+            "prefixes": chains of words each a prefix of the next, and their extensions
+            "unicode": accented letters and uppercase spellings, normalized by the index
+        size (int): The number of distinct words
+        seed (int): The random seed
+
+    Returns:
+        list: The words, sorted, so the same seed always gives the same list
+
+    Example:
+        generate_corpus("syllables", 100_000)
+    """
+    rng = random.Random(seed)
+    onsets = "b c d f g h j k l m n p r s t v w z ch sh th st pr tr bl gr".split()
+    vowels = "a e i o u ai ea ou y".split()
+    endings = ("", "", "s", "ing", "ed", "er", "ly", "tion")
+    words = set()
+    while len(words) < size:
+        if kind == "syllables":
+            word = "".join(rng.choice(onsets) + rng.choice(vowels) for _ in range(rng.randint(1, 4))) + rng.choice(endings)
+        elif kind == "random":
+            word = "".join(rng.choices("abcdef", k=rng.randint(1, 8)))
+        elif kind == "long":
+            word = rng.choice("ab") * rng.randint(0, 250) + "".join(rng.choices("abc", k=rng.randint(50, 300)))
+            word = word[:300]
+        elif kind == "prefixes":
+            root = "".join(rng.choices("abcd", k=rng.randint(8, 20)))
+            words.update(root[:length] for length in range(1, len(root) + 1))
+            word = root + "".join(rng.choices("abcd", k=rng.randint(1, 5)))
+        elif kind == "unicode":
+            word = "".join(rng.choices("aeéèêøåßçñüœ", k=rng.randint(2, 9)))
+            word = word.upper() if rng.random() < 0.2 else word
+        else:
+            raise ValueError(f"Unknown corpus {kind!r}")
+        words.add(word)
+    return sorted(words)[:size]
+
+def make_manager(name, words):
+    # A manager whose current word list holds the words
+    word_list = WordList(name, f"{name}.txt")
+    word_list.index_words(words)
+    manager = WordListManager()
+    manager.word_lists[name] = manager.current_word_list = word_list
+    return manager, word_list
+
+def verify_word_list(manager, word_list, reference, rng, probes=40):
+    """
+    Checks every index of a word list against a brute force scan of the reference keys: the
+    prefix and suffix tries, search_containing and the hot tables (while there is no
+    delta), and the suggestion stages, pattern and rack queries and membership, merged
+    with the delta.
+
+    Args:
+        manager (WordListManager): The manager running the queries
+        word_list (WordList): The word list
+        reference (set): The normalized keys the word list should hold
+        rng (random.Random): Picks the probes
+        probes (int): The number of prefixes probed
+
+    Returns:
+        list: The failed checks
+
+    Example:
+        failures = verify_word_list(manager, word_list, set(keys), random.Random(0))
+    """
+    keys = sorted(reference)
+    by_suffix = sorted(keys, key=lambda key: key[::-1])
+    failures = []
+
+    def expect(name, probe, found, expected):
+        if found != expected:
+            failures.append(f"{name} {probe!r}: {len(found)} words, expected {len(expected)}")
+
+    # Prefixes of words, of words that are not in the list any more, and random letters
+    samples = rng.sample(keys, min(probes, len(keys)))
+    letters = sorted(set(itertools.chain.from_iterable(samples)))
+    samples = [key[:rng.randint(1, min(len(key), 6))] for key in samples]
+    samples += ["".join(rng.choices(letters, k=rng.randint(1, 3))) for _ in range(probes // 4)]
+    expect("keys", "", word_list.get_all_keys(), keys)
+    for probe in samples:
+        prefixed = [key for key in keys if key.startswith(probe)]
+        suffixed = [key for key in by_suffix if key.endswith(probe)]
+        containing = [key for key in keys if probe in key]
+        if not word_list.delta:
+            trie_start, trie_end = word_list.get_trie()
+            expect("trie prefix", probe, trie_start.search(probe), prefixed)
+            expect("trie prefix top 5", probe, trie_start.search(probe, max_suggestions=5), prefixed[:5])
+            expect("trie suffix", probe, [word[::-1] for word in trie_end.search(probe, reverse=True)], suffixed)
+            expect("search_containing", probe, sorted(trie_start.search_containing(probe)), containing)
+            if (hot := word_list.hot_completions(probe, HOT_PREFIX_K)) is not None:
+                expect("hot prefix", probe, hot, prefixed[:HOT_PREFIX_K])
+            if (hot := word_list.hot_completions(probe, HOT_PREFIX_K, suffix=True)) is not None:
+                expect("hot suffix", probe, hot, suffixed[:HOT_PREFIX_K])
+        expect("contains", probe, word_list.contains_key(probe), probe in reference)
+        # A stage may find more than k words, run_pipeline keeps the first k
+        for stage, expected in (("prefix", prefixed), ("suffix", suffixed)):
+            found = list(itertools.islice(manager.iter_stage(stage, word_list, probe, 5), 5))
+            expect(f"{stage} stage", probe, found, expected[:5])
+        expect("containing stage", probe, sorted(manager.iter_containing(word_list, probe)),
+               [key for key in containing if not key.startswith(probe) and not key.endswith(probe)])
+        for pattern in (f"{probe}*", f"*{probe}", f"*{probe}*", f"{probe[0]}?*{probe[-1]}"):
+            regex = re.compile(pattern.replace("?", ".").replace("*", ".*"))
+            expected = sorted(word_list.get_surface(key) for key in keys if regex.fullmatch(key))
+            expect("pattern", pattern, manager.find_words(pattern, word_list=word_list), expected)
+    for rack in ("".join(rng.choices(letters, k=6)) + "?" for _ in range(3)):
+        expected = [key for key in keys if len(key) >= 2
+                    and sum((collections.Counter(key) - collections.Counter(rack)).values()) <= 1]
+        expected = [word_list.get_surface(key) for key in sorted(expected, key=lambda key: (-len(key), key))]
+        expect("rack", rack, manager.find_anagrams(rack, word_list=word_list), expected)
+    return failures
+
+@pytest.mark.parametrize("kind", sorted(CORPORA))
+def test_indexes(kind, seed):
+    # Once indexed, after random edits held in the delta, and once the delta is compacted
+    rng = random.Random(seed)
+    size = CORPORA[kind]
+    manager, word_list = make_manager(kind, generate_corpus(kind, size, seed=rng.random()))
+    reference = set(word_list.get_keys())
+    extra = [word_list.normalize(word) for word in generate_corpus(kind, size // 5, seed=rng.random())]
+    edits = size // 200  # Fewer than DELTA_COMPACT_SIZE in all, so they stay in the delta
+    for phase in ("indexed", "edited", "compacted"):
+        if phase == "edited":
+            for _ in range(3):
+                added = rng.sample(extra, edits)
+                removed = rng.sample(sorted(reference), edits)
+                word_list.update_words(add=added, remove=removed)
+                reference = (reference - set(removed)) | set(added)
+            assert word_list.delta
+        elif phase == "compacted":
+            while word_list.delta:
+                if not word_list.compact():
+                    time.sleep(0.01)  # A compaction started by the edits is still running
+        failures = verify_word_list(manager, word_list, reference, rng)
+        assert not failures, f"{phase}: " + "\n".join(failures[:10])
+
+def test_delta_order(seed):
+    # More added words share a prefix (or suffix) than a stage asks for, added in random order
+    rng = random.Random(seed)
+    manager, word_list = make_manager("delta", generate_corpus("syllables", 2000, seed=rng.random()))
+    added = sorted({"".join(rng.choices("abcdef", k=rng.randint(0, 3))) for _ in range(200)})
+    added = [f"he{middle}" for middle in added] + [f"{middle}ez" for middle in added]
+    rng.shuffle(added)
+    word_list.update_words(add=added)
+    keys = word_list.get_all_keys()
+    for probe in ("he", "hea", "ez", "aez"):
+        prefixed = [key for key in keys if key.startswith(probe)]
+        suffixed = sorted((key for key in keys if key.endswith(probe)), key=lambda key: key[::-1])
+        for stage, expected in (("prefix", prefixed), ("suffix", suffixed)):
+            assert list(itertools.islice(manager.iter_stage(stage, word_list, probe, 5), 5)) == expected[:5], (stage, probe)
+        assert manager.find_words(f"{probe}*", max_results=5, word_list=word_list) == prefixed[:5], probe
+        assert manager.find_words(f"*{probe}", max_results=5, word_list=word_list) == sorted(suffixed[:5]), probe
+
+def test_unchanged_edits():
+    # Edits that change nothing keep the version, so the cached suggestions stay valid
+    _, word_list = make_manager("edits", ["apple", "pear", "AAH"])
+    word_list.update_words(add=["kiwi"], remove=["pear"])
+    tag = word_list.get_version_tag()
+    word_list.update_words()
+    word_list.update_words(add=["Apple", "kiwi"], remove=["pear", "plum"])
+    word_list.set_words_from(["apple", "kiwi", "AAH"])
+    assert word_list.get_version_tag() == tag
+    word_list.update_words(remove=["kiwi"])
+    assert word_list.get_version_tag() != tag
+
+def test_suggestion_cache(monkeypatch):
+    # The cache keeps the most recently used stage results, and only those of the current version
+    monkeypatch.setattr(WordSolver, "SUGGESTION_CACHE_SIZE", 8)
+    manager, word_list = make_manager("cache", generate_corpus("syllables", 2000, seed=1))
+    stages = [SuggestionStage("prefix", 5, 10 ** 9)]  # One entry per key, never out of time
+    keys = sorted({key[:3] for key in word_list.get_keys()})[:20]
+    expected = {key: manager.run_pipeline(word_list, key, stages, 10) for key in keys}
+    cached = lambda: [cache_key.rpartition("\0")[2] for cache_key in manager.suggestions_cache]
+    assert cached() == keys[-8:]
+    for key in keys[-8:-6] + keys[:3]:  # Hits move to the end, misses push the oldest out
+        assert manager.run_pipeline(word_list, key, stages, 10) == expected[key]
+    assert cached() == keys[-3:] + keys[-8:-6] + keys[:3]
+
+    word_list.update_words(add=["zzyzx"])
+    manager.run_pipeline(word_list, keys[0], stages, 10)
+    assert cached() == keys[:1]
+
+def osa_distances(word, typed):
+    # The optimal string alignment distance (typos: a letter inserted, deleted or replaced,
+    # or two adjacent letters swapped) from each prefix of `word` to `typed`, by length
+    rows = [list(range(len(typed) + 1))]
+    for i, letter in enumerate(word, 1):
+        row = [i]
+        for j, typed_letter in enumerate(typed, 1):
+            distance = min(row[j - 1] + 1, rows[-1][j] + 1, rows[-1][j - 1] + (letter != typed_letter))
+            if i > 1 and j > 1 and letter == typed[j - 2] and word[i - 2] == typed_letter:
+                distance = min(distance, rows[-2][j - 2] + 1)
+            row.append(distance)
+        rows.append(row)
+    return [row[-1] for row in rows]
+
+def mistype(word, rng):
+    # The word with a random typo after its first letter, which search_fuzzy trusts
+    i = rng.randint(1, len(word))
+    letter = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    typo = rng.choice(("insert", "delete", "replace", "swap"))
+    if typo == "delete" and i < len(word):
+        return word[:i] + word[i + 1:]
+    if typo == "replace" and i < len(word):
+        return word[:i] + letter + word[i + 1:]
+    if typo == "swap" and i + 1 < len(word):
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + letter + word[i:]
+
+@pytest.mark.parametrize("max_distance", [1, 2])
+def test_search_fuzzy(max_distance, seed):
+    rng = random.Random(seed)
+    keys = sorted(generate_corpus("syllables", 3000, seed=rng.random()))
+    trie = Trie()
+    trie.insert_many(keys)
+    probes = [mistype(key[:rng.randint(3, min(len(key), 7))], rng) for key in rng.sample([key for key in keys if len(key) >= 3], 30)]
+    probes += ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(3, 6))) for _ in range(10)]
+    for probe in probes:
+        expected = {key for key in keys if key[0] == probe[0] and not key.startswith(probe)
+                    and min(osa_distances(key, probe)[1:]) <= max_distance}
+        found = [word for word in trie.search_fuzzy(probe, max_distance) if word]
+        assert len(found) == len(set(found)), f"{probe!r}: words found twice"
+        assert set(found) == expected, f"{probe!r}: extra {sorted(set(found) - expected)[:5]}, missing {sorted(expected - set(found))[:5]}"
+
+def board_oracle(board, keys, min_length):
+    # The keys that can be traced on the board, by searching a path for each key on its own
+    tiles = [tile for row in board for tile in row]
+    cols = len(board[0])
+
+    def trace(cell, rest, used):
+        if not rest.startswith(tiles[cell]):
+            return False
+        rest = rest[len(tiles[cell]):]
+        if not rest:
+            return True
+        used = used | {cell}
+        row, col = divmod(cell, cols)
+        return any(trace(other, rest, used) for other in range(len(tiles))
+                   if other not in used and abs(other // cols - row) <= 1 and abs(other % cols - col) <= 1)
+
+    return {key for key in keys if len(key) >= min_length and any(trace(cell, key, frozenset()) for cell in range(len(tiles)))}
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_board(workers, seed):
+    rng = random.Random(seed)
+    manager, word_list = make_manager("board", generate_corpus("random", 5000, seed=rng.random()))
+    for _ in range(5):
+        size = rng.randint(2, 5)
+        tiles = rng.choice(("abcdefABC", ("a", "b", "c", "d", "e", "f", "ab", "fe")))  # Tiles of one or two letters
+        board = "/".join(" ".join(rng.choice(tiles) for _ in range(size)) for _ in range(rng.randint(2, 5)))
+        min_length = rng.randint(1, 4)
+        keys = word_list.get_all_keys()
+        expected = board_oracle(parse_board(board), keys, min_length)
+        assert solve_board(parse_board(board), word_list, min_length, workers) == expected, board
+        expected = [word_list.get_surface(key) for key in sorted(expected, key=lambda key: (-len(key), key))]
+        assert manager.find_board_words(board, min_length, workers) == expected, board
+
+    # The words added or removed since the index was built
+    keys = set(word_list.get_keys())
+    removed = rng.sample(sorted(keys), 50)
+    added = ["".join(rng.choices("abcdef", k=rng.randint(3, 9))) for _ in range(50)]
+    word_list.update_words(add=added, remove=removed)
+    keys = (keys - set(removed)) | set(added)
+    board = "abc/def/fed/cba"
+    expected = sorted(board_oracle(parse_board(board), keys, 3), key=lambda key: (-len(key), key))
+    assert manager.find_board_words(board, 3, workers) == expected
+
+def test_board_threaded(seed):
+    # A process running other threads starts its workers without forking
+    rng = random.Random(seed)
+    _, word_list = make_manager("board", generate_corpus("random", 5000, seed=rng.random()))
+    board = parse_board("/".join("".join(rng.choices("abcdef", k=4)) for _ in range(4)))
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        assert solve_board(board, word_list, 3, 2) == board_oracle(board, word_list.get_all_keys(), 3)
+    finally:
+        stop.set()
+        thread.join()
+
+def test_board_ragged():
+    with pytest.raises(ValueError):
+        parse_board("ab/c")
+
+def ngram_oracle(sentences, previous_words):
+    # The score of every word predicted after the previous words, counted from the sentences
+    unigrams = collections.Counter(itertools.chain.from_iterable(sentences))
+    followers = collections.defaultdict(collections.Counter)
+    for sentence in sentences:
+        for i in range(1, len(sentence)):
+            followers[sentence[i - 1]][sentence[i]] += 1
+            if i >= 2:
+                followers[tuple(sentence[i - 2:i])][sentence[i]] += 1
+    contexts = []
+    if len(previous_words) >= 2 and all(word in unigrams for word in previous_words[-2:]):
+        contexts.append(followers.get(tuple(previous_words[-2:]), {}))
+    if previous_words and previous_words[-1] in unigrams:
+        contexts.append(followers.get(previous_words[-1], {}))
+    contexts.append(unigrams)
+    best = {}
+    for penalty, counts in enumerate(contexts):
+        total = sum(counts.values())
+        for word, count in counts.items():
+            score = min(255, round(-math.log2(count / total) * 16)) + penalty * NGRAM_BACKOFF_PENALTY
+            best[word] = min(best.get(word, score), score)
+    return best
+
+def test_ngram_model(tmp_path, seed):
+    rng = random.Random(seed)
+    vocabulary = sorted(set(generate_corpus("syllables", 40, seed=rng.random())))
+    weights = [rng.random() ** 3 for _ in vocabulary]  # Some words are much more frequent
+    sentences = [rng.choices(vocabulary, weights, k=rng.randint(1, 8)) for _ in range(500)]
+    corpus = tmp_path / "corpus.txt"
+    # Numbers are skipped and capitals normalized, and every sentence ends the context
+    corpus.write_text("".join(f"{' '.join(sentence).capitalize()} 42{rng.choice('.!?')}\n" for sentence in sentences),
+                      encoding="utf-8")
+    assert list(NGramModel.tokenize(corpus.read_text(encoding="utf-8").splitlines())) == sentences
+
+    # With every word and context kept, the table holds every count
+    model = NGramModel.build(str(corpus), top_k=len(vocabulary), min_count=1)
+    model.save(str(tmp_path / "model.bin"))
+    loaded = NGramModel.load(str(tmp_path / "model.bin"))
+    for _ in range(50):
+        previous_words = rng.choices(vocabulary + ["unknown"], k=rng.randint(0, 3))
+        k = rng.randint(1, len(vocabulary))
+        prefix = rng.choice(["", "", rng.choice(vocabulary)[:rng.randint(1, 2)]])
+        best = {word: score for word, score in ngram_oracle(sentences, previous_words).items() if word.startswith(prefix)}
+        for current in (model, loaded):
+            predicted = current.predict(previous_words, k, prefix)
+            assert len(predicted) == len(set(predicted)) and set(predicted) <= set(best), previous_words
+            assert [best[word] for word in predicted] == sorted(best.values())[:k], previous_words
+
+@pytest.mark.skipif(not SCALE_MAX_WORDS, reason="set WORDSOLVER_SCALE_WORDS to the largest word list to build")
+def test_scale(monkeypatch, seed):
+    """
+    Checks that indexing time and memory grow about linearly with the size of the word
+    list, on generated lists of SCALE_SIZES words up to WORDSOLVER_SCALE_WORDS, with a few
+    queries checked against brute force at every size. Each size is built twice with its
+    own word_pool: once traced by tracemalloc for the memory, once untraced for the time.
+    """
+    rng = random.Random(seed)
+    results = []
+    for size in (size for size in SCALE_SIZES if size <= SCALE_MAX_WORDS):
+        words = generate_corpus("syllables", size, seed=rng.random())
+        monkeypatch.setattr(WordSolver, "word_pool", StringPool())
+        tracemalloc.start()
+        word_list = WordList("scale", "scale.txt")
+        word_list.index_words(words)
+        word_list.get_trie()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del word_list
+        gc.collect()
+
+        monkeypatch.setattr(WordSolver, "word_pool", StringPool())
+        started = time.perf_counter()
+        manager, word_list = make_manager("scale", words)
+        index_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        word_list.get_trie()
+        trie_seconds = time.perf_counter() - started
+
+        keys = word_list.get_keys()
+        probes = [key[:rng.randint(1, min(len(key), 5))] for key in rng.choices(keys, k=2000)]
+        latencies = {"prefix": [], "suffix": [], "contains": []}
+        for probe in probes:
+            for stage in ("prefix", "suffix"):
+                started = time.perf_counter_ns()
+                list(manager.iter_stage(stage, word_list, probe, 5))
+                latencies[stage].append(time.perf_counter_ns() - started)
+            started = time.perf_counter_ns()
+            word_list.contains_key(probe)
+            latencies["contains"].append(time.perf_counter_ns() - started)
+        for probe in probes[:10]:
+            assert list(manager.iter_stage("prefix", word_list, probe, 5)) == [key for key in keys if key.startswith(probe)][:5]
+        del word_list, manager, keys
+        gc.collect()
+
+        results.append((size, index_seconds + trie_seconds, memory))
+        print(f"  {size:9} words  index {index_seconds:6.2f} s  tries {trie_seconds:6.2f} s  "
+              f"memory {memory / 2 ** 20:7.1f} MiB ({memory / size:5.0f} B/word)")
+        for name, samples in latencies.items():
+            print(f"    {name:8} {latency_summary(samples)}")
+
+    (first, first_seconds, first_memory), (last, last_seconds, last_memory) = results[0], results[-1]
+    assert (last_seconds / last) / (first_seconds / first) < 2, "build time per word grew superlinearly"
+    assert (last_memory / last) / (first_memory / first) < 2, "memory per word grew superlinearly"
@@ -0,0 +1,36 @@
+import random
+
+from WordSolver import LEARNING_ACCEPT_WEIGHT, LearningStore
+
+def test_save_and_load(tmp_path, seed):
+    rng = random.Random(seed)
+    path = str(tmp_path / "learning.bin")
+    store = LearningStore(path)
+    keys = ["".join(rng.choices("aéœ", k=rng.randint(1, 20))) for _ in range(100)]
+    for key in keys:
+        store.record("BestList", key, LEARNING_ACCEPT_WEIGHT * rng.randint(1, 3))
+    # Longer than the one byte key length allows; cutting these would split a character
+    store.record("BestList", "é" * 200, LEARNING_ACCEPT_WEIGHT)
+    store.record("Custom", "œ" * 127 + "a", LEARNING_ACCEPT_WEIGHT)
+    store.save()
+
+    loaded = LearningStore(path)
+    loaded.load()
+    assert loaded.tables["BestList"].keys() == set(keys)
+    assert loaded.tables["Custom"].keys() == {"œ" * 127 + "a"}
+    for key in keys:
+        assert abs(loaded.weight("BestList", key) - store.weight("BestList", key)) < 1e-3
+    assert sorted(loaded.complete("BestList", keys[0][:1], k=200)) == sorted(key for key in set(keys) if key[0] == keys[0][0])
+
+def test_load_truncated(tmp_path):
+    path = tmp_path / "learning.bin"
+    store = LearningStore(str(path))
+    for key in ("hello", "help", "helm", "world"):
+        store.record("BestList", key, LEARNING_ACCEPT_WEIGHT)
+    store.save()
+    path.write_bytes(path.read_bytes()[:-8])  # In the middle of the last entry
+
+    # The words read before the end of the file are still completed
+    loaded = LearningStore(str(path))
+    loaded.load()
+    assert sorted(loaded.complete("BestList", "hel")) == ["hello", "helm", "help"]
@@ -0,0 +1,121 @@
+import marshal
+import random
+import sys
+import unicodedata
+
+import pytest
+
+import WordSolver
+from WordSolver import StringPool, WordList, WordListManager, iter_sorted_runs, read_word_file
+
+WORDS = ["cat", "Dog", "3rd", "ice cream", "", "  zebra  ", "Café", "CAFÉ", "œuvre", "ÆON", "naïve"]
+
+def write_words(path, words, newline="\n"):
+    path.write_bytes(newline.join(words).encode("utf-8") + newline.encode())
+    return str(path)
+
+def test_decomposed_words(tmp_path, monkeypatch):
+    # A decomposed accent is a combining mark, not a letter, until the word is normalized
+    words = [unicodedata.normalize("NFD", word) if i % 2 else word for i, word in enumerate(WORDS)]
+    path = write_words(tmp_path / "list.txt", words, "\r\n")
+    expected = WordList("expected", "list.txt")
+    expected.index_words(word.strip() for word in words)  # The loader strips the lines
+    assert [key for key, _ in read_word_file(path)] == expected.get_keys()
+    assert "café" in expected.get_keys() and "naïve" in expected.get_keys()
+
+    monkeypatch.setattr(WordSolver, "script_dir", str(tmp_path))
+    word_list = WordListManager().load_word_list("list", "list.txt")
+    assert word_list.get_keys() == expected.get_keys()
+    assert [word_list.get_surface(key) for key in word_list.get_keys()] == \
+        [expected.get_surface(key) for key in expected.get_keys()]
+
+@pytest.mark.parametrize("strip_accents", [False, True])
+def test_parallel_parsing(tmp_path, seed, strip_accents):
+    # Small chunks, so a spelling repeated in another chunk has to lose to the first one
+    rng = random.Random(seed)
+    words = [rng.choice(WORDS) + "".join(rng.choices("abcé", k=rng.randint(0, 2))) for _ in range(2000)]
+    path = write_words(tmp_path / "list.txt", words)
+    serial = list(iter_sorted_runs(path, False, strip_accents, chunk_size=1000))
+    assert len(serial) > 10
+    assert list(iter_sorted_runs(path, True, strip_accents, chunk_size=1000)) == serial
+
+    expected = WordList("expected", "list.txt", strip_accents)
+    expected.index_words(word.strip() for word in words)  # The loader strips the lines
+    pairs = list(read_word_file(path, strip_accents))
+    assert [key for key, _ in pairs] == expected.get_keys()
+    assert [spelling or key for key, spelling in pairs] == [expected.get_surface(key) for key, _ in pairs]
+
+def query_results(manager, word_list, probes):
+    # What the suggestion stages and searches return for each probe
+    results = [word_list.get_all_keys(), [word_list.get_surface(key) for key in word_list.get_all_keys()]]
+    for probe in probes:
+        results.append([list(manager.iter_stage(stage, word_list, probe, 5)) for stage in ("prefix", "suffix")])
+        results.append(list(word_list.query(lambda trie_start, _: trie_start.search(probe), order=str)))
+        results.append(manager.find_words(f"*{probe}*", word_list=word_list))
+        results.append(word_list.contains(probe))
+    return results
+
+def test_snapshot(tmp_path, monkeypatch, seed):
+    rng = random.Random(seed)
+    monkeypatch.setattr(WordSolver, "script_dir", str(tmp_path))
+    lists = {name: [word + "".join(rng.choices("abcdéZ", k=rng.randint(1, 6))) for word in rng.choices(WORDS, k=500)]
+             for name in ("BestList", "Custom")}
+    for name, words in lists.items():
+        write_words(tmp_path / f"{name}.txt", words)
+    snapshot_path = str(tmp_path / "snapshot.bin")
+    probes = ["".join(rng.choices("abcdé", k=rng.randint(1, 3))) for _ in range(20)]
+
+    def load():
+        # A new process: an empty pool, the snapshot if valid, then the files
+        monkeypatch.setattr(WordSolver, "word_pool", StringPool())
+        manager = WordListManager()
+        manager.load_snapshot(snapshot_path)
+        for name in lists:
+            manager.load_word_list(name, f"{name}.txt")
+        return manager
+
+    def expect_fresh(manager):
+        for name, words in lists.items():
+            fresh = WordList(name, f"{name}.txt")
+            fresh.index_words(word.strip() for word in words)
+            assert query_results(manager, manager.word_lists[name], probes) == \
+                query_results(manager, fresh, probes), name
+
+    manager = load()
+    assert manager.snapshot_stale
+    manager.save_snapshot(snapshot_path)
+
+    # Restored without parsing, with the same results as a fresh index
+    manager = load()
+    assert not manager.snapshot_stale
+    expect_fresh(manager)
+
+    # A list edited since the snapshot was written is parsed again, the other one is restored
+    lists["Custom"] = lists["Custom"][:400] + ["kiwi", "Ærø"]
+    write_words(tmp_path / "Custom.txt", lists["Custom"])
+    manager = load()
+    assert manager.snapshot_stale and manager.get_snapshot("BestList", "BestList.txt", str(tmp_path / "BestList.txt"))
+    expect_fresh(manager)
+
+    # Edits in the delta are merged into the index before it is saved
+    word_list = manager.word_lists["BestList"]
+    removed = {word_list.normalize(word) for word in lists["BestList"][:50]}
+    word_list.update_words(add=["kiwi", "Ærø"], remove=removed)
+    lists["BestList"] = [word for word in lists["BestList"] if word_list.normalize(word) not in removed] + ["kiwi", "Ærø"]
+    write_words(tmp_path / "BestList.txt", lists["BestList"])
+    word_list.stamp = WordSolver.file_stamp(str(tmp_path / "BestList.txt"))
+    manager.save_snapshot(snapshot_path)
+    manager = load()
+    assert not manager.snapshot_stale
+    expect_fresh(manager)
+
+@pytest.mark.parametrize("content", [b"", b"not a snapshot", None])
+def test_unusable_snapshot(tmp_path, monkeypatch, content):
+    monkeypatch.setattr(WordSolver, "word_pool", StringPool())
+    path = tmp_path / "snapshot.bin"
+    if content is None:
+        content = marshal.dumps({"version": (WordSolver.SNAPSHOT_VERSION - 1, sys.version_info[:2]), "lists": {}})
+    path.write_bytes(content)
+    manager = WordListManager()
+    manager.load_snapshot(str(path))
+    assert manager.snapshot == {}
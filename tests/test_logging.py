@@ -0,0 +1,48 @@
+import logging
+
+import WordSolver
+from WordSolver import RateLimitFilter, WordList, WordListManager
+
+def make_record(msg, *args):
+    return logging.LogRecord("WordSolver.keystroke", logging.DEBUG, __file__, 1, msg, args, None)
+
+def test_rate_limit(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(WordSolver.time, "monotonic", lambda: now[0])
+    rate_limit = RateLimitFilter(rate=2, burst=3)
+    records = [make_record("key %s", i) for i in range(7)]
+    assert [rate_limit.filter(record) for record in records] == [True] * 3 + [False] * 4
+    assert rate_limit.suppressed == 4
+
+    # Half a record per quarter second: the second quarter lets one through, with the count
+    now[0] += 0.25
+    assert not rate_limit.filter(make_record("key %s", 7))
+    now[0] += 0.25
+    record = make_record("key %s", 8)
+    assert rate_limit.filter(record)
+    assert record.getMessage() == "key 8 (5 similar records suppressed)"
+    assert rate_limit.suppressed == 0
+
+    # A long pause refills the bucket up to the burst, not beyond
+    now[0] += 100
+    records = [make_record("plain") for _ in range(5)]
+    assert [rate_limit.filter(record) for record in records] == [True] * 3 + [False] * 2
+    assert [record.getMessage() for record in records[:3]] == ["plain"] * 3
+    now[0] += 0.5
+    record = make_record("plain")
+    assert rate_limit.filter(record)
+    assert record.getMessage() == "plain (2 similar records suppressed)"
+
+def test_queries_are_not_rate_limited(caplog):
+    # Searches are run on request, not per keystroke, so they do not use up the keystroke bucket
+    word_list = WordList("logging", "logging.txt")
+    word_list.index_words(["rate", "tear", "tare", "limit"])
+    manager = WordListManager()
+    manager.word_lists["logging"] = manager.current_word_list = word_list
+    with caplog.at_level(logging.DEBUG):
+        for _ in range(WordSolver.KEYSTROKE_LOG_BURST * 2):
+            manager.find_words("t*", word_list=word_list)
+            manager.find_anagrams("etar", word_list=word_list)
+    names = [record.name for record in caplog.records if "words" in record.getMessage()]
+    assert len(names) == WordSolver.KEYSTROKE_LOG_BURST * 4
+    assert set(names) == {WordSolver.logger.name}
@@ -0,0 +1,22 @@
+import cProfile
+import logging
+
+from WordSolver import HotPathProfiler
+
+class BusyProfile(cProfile.Profile):
+    # Since Python 3.12, enabling a profiler while another one runs raises ValueError
+    def enable(self, *args, **kwargs):
+        raise ValueError("Another profiling tool is already active")
+
+def test_skipped_calls_are_reported(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(cProfile, "Profile", BusyProfile)
+    profiler = HotPathProfiler(str(tmp_path))
+    profiler.start(60)
+    assert [profiler.call(sum, ([1, 2],), {}) for _ in range(3)] == [3, 3, 3]
+    with caplog.at_level(logging.WARNING):
+        paths = profiler.stop()
+
+    report = next(path for path in paths if path.endswith(".txt") and not path.endswith("-memory.txt"))
+    with open(report, encoding="utf-8") as f:
+        assert f.readline().startswith("WARNING: 3 calls were not profiled")
+    assert "3 calls were not profiled" in caplog.text
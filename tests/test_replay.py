@@ -0,0 +1,40 @@
+import pytest
+
+import WordSolver
+from WordSolver import Settings, WordList, WordListManager, keystrokes_from_text, replay_keystrokes
+
+def make_manager():
+    word_list = WordList("replay", "replay.txt")
+    word_list.index_words(["hello", "help", "world", "word"])
+    manager = WordListManager()
+    manager.word_lists["replay"] = manager.current_word_list = word_list
+    return manager
+
+def test_replay_restores_globals():
+    # The keyboard module is only imported by the app
+    keyboard = getattr(WordSolver, "keyboard", None)
+    delay = WordSolver.KEY_RELEASE_DELAY
+    latencies, transcript = replay_keystrokes(keystrokes_from_text("hel wor "), make_manager(), Settings())
+    assert len(latencies) == len(transcript) == 8
+    assert sorted(transcript[2].split("\t")[1].split()) == ["hello", "help"]
+    assert getattr(WordSolver, "keyboard", None) is keyboard
+    assert WordSolver.KEY_RELEASE_DELAY == delay
+    assert not hasattr(WordSolver, "autocomplete_window")
+
+def test_replay_restores_globals_on_error():
+    keyboard = getattr(WordSolver, "keyboard", None)
+    with pytest.raises(AttributeError):
+        replay_keystrokes(keystrokes_from_text("he") + [None], make_manager(), Settings())
+    assert getattr(WordSolver, "keyboard", None) is keyboard
+    assert not hasattr(WordSolver, "current_word")
+
+def test_context_is_the_final_text():
+    # The next word is predicted after the words as they end up in the text: the correction
+    # of a typo, or the completion accepted with tab, which does not end the sentence
+    manager = make_manager()
+    _, transcript = replay_keystrokes(keystrokes_from_text("teh wor\t"), manager, Settings())
+    assert transcript[3].endswith("the ") and transcript[-1].endswith("word ")
+    assert list(manager.previous_words) == ["the", "word"]
+
+    replay_keystrokes(keystrokes_from_text("hel\n"), manager, Settings())
+    assert list(manager.previous_words) == []
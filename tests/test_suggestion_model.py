@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from WordSolver import SuggestionListModel
+
+def record_changes(model):
+    # The rows each signal of the model reports, in the order they are emitted
+    changes = []
+    model.dataChanged.connect(lambda first, last, roles: changes.append(("changed", first.row(), last.row())))
+    model.rowsInserted.connect(lambda parent, first, last: changes.append(("inserted", first, last)))
+    model.rowsRemoved.connect(lambda parent, first, last: changes.append(("removed", first, last)))
+    model.modelReset.connect(lambda: changes.append(("reset",)))
+    return changes
+
+def rows(model):
+    return [model.data(model.index(row)) for row in range(model.rowCount())]
+
+@pytest.mark.parametrize("old, new, expected", [
+    # One more letter typed: the head and tail are kept, the middle changes
+    ("hello help helm held", "hello helm held", [("removed", 1, 1)]),
+    ("hello helm held", "hello help helm held", [("inserted", 1, 1)]),
+    ("hello help helm held", "hello hells helm held", [("changed", 1, 1)]),
+    ("hello help helm held", "hello hells helms held", [("changed", 1, 2)]),
+    ("a b c d e", "a x y e", [("changed", 1, 2), ("removed", 3, 3)]),
+    ("a x y e", "a b c d e", [("changed", 1, 2), ("inserted", 3, 3)]),
+    # Only a head or a tail in common
+    ("a b c", "a b c d e", [("inserted", 3, 4)]),
+    ("a b c d e", "a b", [("removed", 2, 4)]),
+    ("c d", "a b c d", [("inserted", 0, 1)]),
+    ("a b c d", "d", [("removed", 0, 2)]),
+    # Nothing in common
+    ("a b c", "x y z", [("changed", 0, 2)]),
+    ("a b c", "x", [("changed", 0, 0), ("removed", 1, 2)]),
+    ("a", "x y z", [("changed", 0, 0), ("inserted", 1, 2)]),
+    ("", "a b", [("inserted", 0, 1)]),
+    ("a b", "", [("removed", 0, 1)]),
+    ("a b", "a b", []),
+    # A repeated word is matched once, by the head
+    ("a a", "a", [("removed", 1, 1)]),
+    ("a", "a a", [("inserted", 1, 1)]),
+])
+def test_set_suggestions(qapp, old, new, expected):
+    model = SuggestionListModel()
+    model.set_suggestions(old.split())
+    changes = record_changes(model)
+    model.set_suggestions(new.split())
+    assert changes == expected
+    assert rows(model) == model.suggestions == new.split()
+
+def test_set_suggestions_random(qapp, seed):
+    # Replaying the reported changes on a copy of the old rows gives the new rows
+    rng = random.Random(seed)
+    model = SuggestionListModel()
+    changes = record_changes(model)
+    shown = []
+    for _ in range(500):
+        words = model.suggestions[:]
+        for _ in range(rng.randint(0, 3)):
+            i = rng.randint(0, len(words))
+            edit = rng.choice(("insert", "remove", "replace"))
+            if edit == "insert" or i == len(words):
+                words.insert(i, rng.choice("abcdefgh"))
+            elif edit == "remove":
+                del words[i]
+            else:
+                words[i] = rng.choice("abcdefgh")
+        words = words[:10]
+        changes.clear()
+        old_length = len(shown)
+        model.set_suggestions(words)
+        for change in changes:
+            kind, first, last = change
+            if kind == "changed":
+                shown[first:last + 1] = [model.data(model.index(row)) for row in range(first, last + 1)]
+            elif kind == "inserted":
+                shown[first:first] = [model.data(model.index(row)) for row in range(first, last + 1)]
+            else:
+                del shown[first:last + 1]
+        assert shown == rows(model) == words
+        assert sum(last - first + 1 for _, first, last in changes) <= max(old_length, len(words))
@@ -0,0 +1,117 @@
+import pytest
+
+from WordSolver import WordBuffer
+
+def typed(keys, buffer=None):
+    # The buffer after pressing and releasing each key in turn; a tuple of keys is a chord
+    buffer = buffer or WordBuffer()
+    for key in keys:
+        chord = key if isinstance(key, tuple) else (key,)
+        for name in chord:
+            buffer.key_down(name)
+        for name in reversed(chord):
+            buffer.key_up(name)
+    return buffer
+
+def state(buffer):
+    return buffer.text, buffer.caret, buffer.trusted
+
+@pytest.mark.parametrize("keys, expected", [
+    ("hello", ("hello", 5, True)),
+    (["h", "i", "left"], ("hi", 1, True)),
+    (["h", "i", "left", "left", "right"], ("hi", 1, True)),
+    (["h", "i", "left", "left", "o"], ("ohi", 1, True)),
+    (["c", "t", "left", "a"], ("cat", 2, True)),
+    # Backspace and delete inside the word, and at both of its ends
+    (["c", "a", "t", "backspace"], ("ca", 2, True)),
+    (["c", "a", "t", "left", "backspace"], ("ct", 1, True)),
+    (["c", "a", "t", "left", "left", "left", "delete"], ("at", 0, True)),
+    (["c", "a", "t", "left", "delete"], ("ca", 2, True)),
+    (["c", "a", "t", "left", "left", "left", "backspace"], ("", 0, False)),
+    (["c", "a", "t", "delete"], ("", 0, False)),
+    (["backspace"], ("", 0, False)),
+    # Moving the caret out of the word
+    (["c", "a", "t", "right"], ("", 0, False)),
+    (["c", "a", "t", "left", "left", "left", "left"], ("", 0, False)),
+    (["c", "a", "t", "home"], ("", 0, False)),
+    (["c", "a", "t", "up"], ("", 0, False)),
+    # Ctrl+backspace deletes back to the start of the word, ctrl+delete to its end
+    (["c", "a", "t", ("ctrl", "backspace")], ("", 0, True)),
+    (["c", "a", "t", "left", ("ctrl", "backspace")], ("t", 0, True)),
+    (["c", "a", "t", "left", "left", ("ctrl", "delete")], ("c", 1, True)),
+    (["c", "a", "t", "left", "left", "left", ("ctrl", "backspace")], ("", 0, False)),
+    (["c", "a", "t", ("ctrl", "delete")], ("", 0, False)),
+    # Paste, cut, undo and selections change the text out of sight
+    (["c", "a", ("ctrl", "v")], ("", 0, False)),
+    (["c", "a", ("ctrl", "x")], ("", 0, False)),
+    (["c", "a", ("ctrl", "z")], ("", 0, False)),
+    (["c", "a", ("ctrl", "left")], ("", 0, False)),
+    (["c", "a", ("shift", "insert")], ("", 0, False)),
+    (["c", "a", ("left shift", "left")], ("", 0, False)),
+    (["c", "a", ("alt", "tab")], ("", 0, False)),
+    (["c", "a", ("left windows", "d")], ("", 0, False)),
+    # Shortcuts that leave the text alone, and shifted letters
+    (["c", "a", ("ctrl", "c"), ("ctrl", "s"), "t"], ("cat", 3, True)),
+    (["c", ("shift", "A"), "t"], ("cAt", 3, True)),
+    (["c", "a", "f1", "caps lock", "t"], ("cat", 3, True)),
+])
+def test_keys(keys, expected):
+    assert state(typed(keys)) == expected
+
+@pytest.mark.parametrize("key", ["space", "enter", "tab"])
+def test_word_break(key):
+    # A word break starts a new word, and trusts the buffer again after a reset
+    buffer = typed(["c", "a", ("ctrl", "v")])
+    assert not buffer.trusted and not buffer.can_replace()
+    assert buffer.key_down(key) == WordBuffer.BREAK
+    assert state(buffer) == ("", 0, True)
+    assert state(typed("dog", buffer)) == ("dog", 3, True)
+
+def test_results():
+    buffer = WordBuffer()
+    assert buffer.key_down("a") == WordBuffer.EDITED
+    assert buffer.key_down("b") == WordBuffer.EDITED
+    assert buffer.key_down("left") == WordBuffer.MOVED
+    assert buffer.key_down("right") == WordBuffer.MOVED
+    assert buffer.key_down("backspace") == WordBuffer.EDITED
+    assert buffer.key_down("f5") == WordBuffer.UNCHANGED
+    assert buffer.key_down("ctrl") == WordBuffer.UNCHANGED
+    assert buffer.key_down("s") == WordBuffer.UNCHANGED
+    assert buffer.key_down("v") == WordBuffer.RESET
+    assert buffer.key_down("space") == WordBuffer.UNCHANGED  # Ctrl is still held down
+    buffer.key_up("ctrl")
+    assert buffer.key_down("space") == WordBuffer.BREAK
+
+def test_can_replace():
+    buffer = typed("cat")
+    assert buffer.can_replace()
+    buffer.key_down("left")
+    assert not buffer.can_replace()  # Only from the end of the word
+    buffer.key_down("right")
+    assert buffer.can_replace()
+    assert not WordBuffer().can_replace()
+
+def test_modifiers():
+    # Both sides of a modifier are the same modifier, released by either name
+    buffer = WordBuffer()
+    for name in ("left ctrl", "right shift", "alt gr", "windows"):
+        buffer.key_down(name)
+    assert buffer.modifiers == {"ctrl", "shift", "alt", "windows"}
+    for name in ("ctrl", "left shift", "right alt"):
+        buffer.key_up(name)
+    assert buffer.modifiers == {"windows"}
+    buffer.key_up("c")  # Other keys are not modifiers
+    assert buffer.modifiers == {"windows"}
+    buffer.key_up("right windows")
+    assert buffer.modifiers == set()
+
+    # Keys pressed while a modifier is held down are shortcuts until it is released: ctrl+space
+    # does not end the word
+    buffer.key_down("right ctrl")
+    assert buffer.key_down("space") == WordBuffer.UNCHANGED
+    buffer.key_up("right ctrl")
+    typed(["space", "c", "a", "t"], buffer)
+    buffer.key_down("left ctrl")
+    assert buffer.key_down("backspace") == WordBuffer.EDITED and state(buffer) == ("", 0, True)
+    buffer.key_up("left ctrl")
+    assert state(typed("ok", buffer)) == ("ok", 2, True)